@@ -0,0 +1,172 @@
+"""
+Circuit breaker and bulkhead for calls to external services.
+
+A bulkhead caps how many request threads may be blocked on one dependency
+at a time, so a slow provider can only ever hold those few threads and the
+rest of the API keeps serving. The breaker watches recent outcomes and,
+once too many fail (errors or calls slower than `slow_call_seconds`),
+rejects calls outright for `open_seconds`; then it lets a few probe calls
+through and closes again only if they all succeed.
+
+State is per process, like the in-memory rate limiter: each worker learns
+about an outage from its own calls.
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, Tuple
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class Unavailable(Exception):
+    """A guarded call was refused without being attempted."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        window_seconds: float = 30,
+        min_calls: int = 10,
+        failure_rate: float = 0.5,
+        open_seconds: float = 15,
+        probes: int = 3,
+        slow_call_seconds: float = 5,
+    ):
+        self.name = name
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.open_seconds = open_seconds
+        self.probes = probes
+        self.slow_call_seconds = slow_call_seconds
+        self.state = CLOSED
+        self._lock = threading.Lock()
+        self._outcomes: Deque[Tuple[float, bool]] = deque()   # (monotonic time, failed)
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes_started = 0
+        self._probes_passed = 0
+
+    def _trim(self, now: float) -> None:
+        while self._outcomes and self._outcomes[0][0] < now - self.window_seconds:
+            _, failed = self._outcomes.popleft()
+            self._failures -= failed
+
+    def _open(self, now: float) -> None:
+        self.state = OPEN
+        self._opened_at = now
+        self._outcomes.clear()
+        self._failures = 0
+
+    def allow(self) -> None:
+        """Take permission for one call, or raise Unavailable."""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == OPEN:
+                remaining = self._opened_at + self.open_seconds - now
+                if remaining > 0:
+                    raise Unavailable(f"{self.name} is unavailable", remaining)
+                self.state = HALF_OPEN
+                self._probes_started = self._probes_passed = 0
+            if self.state == HALF_OPEN:
+                if self._probes_started >= self.probes:
+                    raise Unavailable(f"{self.name} is recovering", self.open_seconds)
+                self._probes_started += 1
+
+    def record(self, failed: bool) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if self.state == HALF_OPEN:
+                if failed:
+                    self._open(now)
+                else:
+                    self._probes_passed += 1
+                    if self._probes_passed >= self.probes:
+                        self.state = CLOSED
+                return
+            if self.state == OPEN:
+                return  # a call admitted before the breaker opened
+            self._outcomes.append((now, failed))
+            self._failures += failed
+            self._trim(now)
+            calls = len(self._outcomes)
+            if calls >= self.min_calls and self._failures / calls >= self.failure_rate:
+                self._open(now)
+
+    @contextmanager
+    def guard(self) -> Iterator[None]:
+        """Run the body as one call: refused while open, recorded as it ends."""
+        self.allow()
+        start = time.monotonic()
+        try:
+            yield
+        except BaseException:
+            self.record(True)
+            raise
+        self.record(time.monotonic() - start > self.slow_call_seconds)
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._trim(time.monotonic())
+            calls = len(self._outcomes)
+            return {
+                "state": self.state,
+                "calls": calls,
+                "failure_rate": round(self._failures / calls, 3) if calls else 0.0,
+            }
+
+
+class Bulkhead:
+    def __init__(self, name: str, limit: int, wait_seconds: float = 0.0):
+        self.name = name
+        self.limit = limit
+        self.wait_seconds = wait_seconds
+        self._slots = threading.BoundedSemaphore(limit)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.rejected = 0
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        if not self._slots.acquire(timeout=self.wait_seconds):
+            with self._lock:
+                self.rejected += 1
+            raise Unavailable(f"Too many concurrent {self.name} calls", 1)
+        with self._lock:
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            self._slots.release()
+
+    def stats(self) -> dict:
+        return {"limit": self.limit, "in_flight": self.in_flight, "rejected": self.rejected}
+
+
+# name -> (breaker, bulkhead) of each guarded dependency, for /admin/circuits
+GUARDS: Dict[str, Tuple[CircuitBreaker, Bulkhead]] = {}
+
+
+@contextmanager
+def guarded(breaker: CircuitBreaker, bulkhead: Bulkhead) -> Iterator[None]:
+    """
+    Bulkhead slot first, then the breaker: an open breaker still answers
+    instantly (nothing is in flight to hold the slots), and a half-open
+    probe is only spent on a call that will actually be made.
+    """
+    with bulkhead.slot(), breaker.guard():
+        yield
+
+
+def guard_stats() -> Dict[str, dict]:
+    """State of every registered guard (created on first use of its dependency)."""
+    return {name: {**breaker.stats(), "bulkhead": bulkhead.stats()} for name, (breaker, bulkhead) in GUARDS.items()}
@@ -0,0 +1,314 @@
+import hashlib
+import threading
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+# Preferred first when the client weighs several encodings equally
+PREFERENCE = ("zstd", "br", "gzip")
+
+COMPRESSIBLE_TYPES = (
+    "text/", "application/json", "application/javascript", "application/xml", "image/svg+xml",
+)
+
+# Bodies at least this large are compressed off the event loop
+THREADPOOL_MIN_SIZE = 64 * 1024
+
+
+class Codec(ABC):
+    """One content-coding at a fixed level: one-shot and incremental."""
+
+    def __init__(self, name: str, level: int):
+        self.name = name
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        stream = self.stream()
+        return stream.compress(data, flush=False) + stream.finish()
+
+    @abstractmethod
+    def stream(self) -> "_Stream":
+        """A fresh incremental compressor."""
+
+
+class _Stream(ABC):
+    @abstractmethod
+    def compress(self, data: bytes, flush: bool = True) -> bytes:
+        """Compress `data`; with `flush`, also emit everything buffered so far."""
+
+    @abstractmethod
+    def finish(self) -> bytes:
+        """End the stream."""
+
+
+class _GzipStream(_Stream):
+    def __init__(self, level: int):
+        self._c = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, flush: bool = True) -> bytes:
+        out = self._c.compress(data)
+        return out + self._c.flush(zlib.Z_SYNC_FLUSH) if flush else out
+
+    def finish(self) -> bytes:
+        return self._c.flush()
+
+
+class _BrotliStream(_Stream):
+    def __init__(self, brotli, level: int):
+        self._c = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes, flush: bool = True) -> bytes:
+        out = self._c.process(data)
+        return out + self._c.flush() if flush else out
+
+    def finish(self) -> bytes:
+        return self._c.finish()
+
+
+class _ZstdStream(_Stream):
+    def __init__(self, zstandard, level: int):
+        self._zstd = zstandard
+        self._c = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes, flush: bool = True) -> bytes:
+        out = self._c.compress(data)
+        return out + self._c.flush(self._zstd.COMPRESSOBJ_FLUSH_BLOCK) if flush else out
+
+    def finish(self) -> bytes:
+        return self._c.flush()
+
+
+class GzipCodec(Codec):
+    def __init__(self, level: int):
+        super().__init__("gzip", level)
+
+    def stream(self) -> _Stream:
+        return _GzipStream(self.level)
+
+
+class BrotliCodec(Codec):
+    def __init__(self, level: int):
+        import brotli
+        super().__init__("br", level)
+        self._brotli = brotli
+
+    def compress(self, data: bytes) -> bytes:
+        return self._brotli.compress(data, quality=self.level)
+
+    def stream(self) -> _Stream:
+        return _BrotliStream(self._brotli, self.level)
+
+
+class ZstdCodec(Codec):
+    def __init__(self, level: int):
+        import zstandard
+        super().__init__("zstd", level)
+        self._zstd = zstandard
+        self._local = threading.local()
+
+    def compress(self, data: bytes) -> bytes:
+        # ZstdCompressor objects are not thread-safe; keep one per thread
+        compressor = getattr(self._local, "compressor", None)
+        if compressor is None:
+            compressor = self._local.compressor = self._zstd.ZstdCompressor(level=self.level)
+        return compressor.compress(data)
+
+    def stream(self) -> _Stream:
+        return _ZstdStream(self._zstd, self.level)
+
+
+def available_codecs(levels: Dict[str, int]) -> Dict[str, Codec]:
+    """gzip always; br and zstd when the `brotli` / `zstandard` packages are installed."""
+    codecs: Dict[str, Codec] = {"gzip": GzipCodec(levels.get("gzip", 6))}
+    for name, cls in (("br", BrotliCodec), ("zstd", ZstdCodec)):
+        try:
+            codecs[name] = cls(levels.get(name, 3))
+        except ImportError:
+            pass
+    return codecs
+
+
+def negotiate(accept_encoding: str, codecs: Dict[str, Codec]) -> Optional[Codec]:
+    """Best codec for an Accept-Encoding header: highest q, then PREFERENCE order."""
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            weights[name.strip()] = q
+    wildcard = weights.get("*", 0.0)
+    best, best_q = None, 0.0
+    for name in PREFERENCE:
+        if name not in codecs:
+            continue
+        q = weights.get(name, wildcard)
+        if q > best_q:
+            best, best_q = codecs[name], q
+    return best
+
+
+class CompressedBodyCache:
+    """
+    LRU of compressed bodies keyed by (encoding, level, body digest), bounded
+    in bytes. Hashing a body is far cheaper than compressing it, so an
+    unchanged catalog is compressed once, not once per request.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, int, bytes], bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(codec: Codec, body: bytes) -> Tuple[str, int, bytes]:
+        return codec.name, codec.level, hashlib.blake2b(body, digest_size=16).digest()
+
+    def get(self, key) -> Optional[bytes]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value: bytes) -> None:
+        if len(value) > self.max_bytes // 4:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = value
+            self.size += len(value)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses with zstd, br or gzip as the client accepts.
+
+    Whole bodies under COMPRESSION_MIN_SIZE go out as they are; larger ones
+    are compressed once (through the body cache). Streaming responses are
+    compressed chunk by chunk and flushed after each, so clients receive
+    data as it is produced.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._codecs: Optional[Dict[str, Codec]] = None
+        self.cache: Optional[CompressedBodyCache] = None
+
+    def _setup(self) -> None:
+        # Settings are read on the first request, not when the app is built
+        self._codecs = available_codecs(settings.COMPRESSION_LEVELS)
+        self.cache = CompressedBodyCache(settings.COMPRESSION_CACHE_MB * 1024 * 1024)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.COMPRESSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        if self._codecs is None:
+            self._setup()
+        codec = negotiate(Headers(scope=scope).get("accept-encoding", ""), self._codecs)
+        if codec is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _Responder(send, codec, self.cache, settings.COMPRESSION_MIN_SIZE)
+        await self.app(scope, receive, responder)
+
+
+class _Responder:
+    def __init__(self, send: Send, codec: Codec, cache: CompressedBodyCache, min_size: int):
+        self.send = send
+        self.codec = codec
+        self.cache = cache
+        self.min_size = min_size
+        self.start: Optional[Message] = None
+        self.passthrough = False
+        self.stream: Optional[_Stream] = None
+
+    async def __call__(self, message: Message) -> None:
+        kind = message["type"]
+        if kind == "http.response.start":
+            self.start = message
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            self.passthrough = (
+                "content-encoding" in headers
+                or message["status"] in (204, 304)
+                or not content_type.startswith(COMPRESSIBLE_TYPES)
+            )
+            if self.passthrough:
+                await self.send(message)
+            return
+        if kind != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more = message.get("more_body", False)
+        if self.stream is None and self.start is not None:
+            start, self.start = self.start, None
+            if not more:
+                await self._send_whole(start, body)
+                return
+            self.stream = self.codec.stream()
+            self._set_headers(start, length=None)
+            await self.send(start)
+
+        if self.stream is not None:
+            if more:
+                chunk = self.stream.compress(body)
+            else:
+                chunk = self.stream.compress(body, flush=False) + self.stream.finish()
+            if chunk or not more:
+                await self.send({"type": "http.response.body", "body": chunk, "more_body": more})
+
+    async def _send_whole(self, start: Message, body: bytes) -> None:
+        if len(body) < self.min_size:
+            await self.send(start)
+            await self.send({"type": "http.response.body", "body": body, "more_body": False})
+            return
+        key = self.cache.key(self.codec, body)
+        compressed = self.cache.get(key)
+        if compressed is None:
+            if len(body) >= THREADPOOL_MIN_SIZE:
+                compressed = await run_in_threadpool(self.codec.compress, body)
+            else:
+                compressed = self.codec.compress(body)
+            self.cache.put(key, compressed)
+        self._set_headers(start, length=len(compressed))
+        await self.send(start)
+        await self.send({"type": "http.response.body", "body": compressed, "more_body": False})
+
+    def _set_headers(self, start: Message, length: Optional[int]) -> None:
+        headers = MutableHeaders(raw=start["headers"])
+        headers["content-encoding"] = self.codec.name
+        headers.add_vary_header("Accept-Encoding")
+        if length is None:
+            del headers["content-length"]
+        else:
+            headers["content-length"] = str(length)
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            # The bytes differ from the identity representation now
+            headers["etag"] = "W/" + etag
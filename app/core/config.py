@@ -1,12 +1,143 @@
-import os
-from dotenv import load_dotenv
-from pydantic_settings import BaseSettings
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
-load_dotenv()
+BASE_DIR = Path(__file__).resolve().parents[2]
 
 class Settings(BaseSettings):
-    MONETBIL_SERVICE_KEY: str
-    MONETBIL_SECRET_KEY: str
+    model_config = SettingsConfigDict(env_file=BASE_DIR / ".env", extra="ignore")
+
+    DATABASE_URL: str = "sqlite:///./Eco-Waste.db"
+    # Read-only handlers (get_read_db) use this replica when set; for SQLite
+    # they otherwise get a read-only pool on DATABASE_URL.
+    DATABASE_READ_URL: Optional[str] = None
+    # After a write, a client's reads stay on the primary for this long
+    # (tracked per process and in the primary_until cookie, see app/db/session.py).
+    READ_YOUR_WRITES_SECONDS: float = 5
+    SQLITE_WAL: bool = True
+    SQLITE_BUSY_TIMEOUT_MS: int = 30000
+    SQLITE_SYNCHRONOUS: str = "NORMAL"          # FULL = fsync on every commit
+    # Funnel all SQLite writes (across threads and worker processes) through
+    # one writer at a time; see app/db/writer.py.
+    DB_SINGLE_WRITER: bool = False
+
+    # Group commit: batch concurrent inserts from the citizen endpoints into
+    # one transaction per window (see app/db/group_commit.py).
+    GROUP_COMMIT_ENABLED: bool = False
+    GROUP_COMMIT_WINDOW_MS: float = 5
+    GROUP_COMMIT_MAX_BATCH: int = 256
+
+    # GET /admin/analytics folds newly changed rows into the daily rollups
+    # at most this often (per worker).
+    ANALYTICS_REFRESH_SECONDS: float = 60
+
+    # Archival: completed collections and closed orders untouched for this
+    # many days move to the *_archive tables, in batches of this many rows.
+    ARCHIVE_AFTER_DAYS: int = 90
+    ARCHIVE_BATCH_SIZE: int = 500
+
+    # Demand forecasts (scripts/run_forecasts.py): days of history fitted
+    # and days ahead stored per location.
+    FORECAST_HISTORY_DAYS: int = 182
+    FORECAST_HORIZON_DAYS: int = 14
+
+    # Location matching (app/services/locations.py): minimum share of a
+    # location name's/address's trigrams found in a collection's free text,
+    # and the per-process cache of resolved texts.
+    LOCATION_MATCH_THRESHOLD: float = 0.6
+    LOCATION_CACHE_SIZE: int = 10000
+    LOCATION_CACHE_SECONDS: float = 300
+    LOCATION_BACKFILL_BATCH_SIZE: int = 1000
+
+    # Dispatcher (app/services/dispatch.py): requests solved per assignment
+    # problem, cost of each request a collector already holds relative to
+    # working outside their area (1.0), and history used to learn areas.
+    DISPATCH_CHUNK_SIZE: int = 1000
+    DISPATCH_LOAD_WEIGHT: float = 0.25
+    DISPATCH_AREA_DAYS: int = 30
+
+    # Response compression (app/core/compression.py); br and zstd need the
+    # optional `brotli` / `zstandard` packages. Levels picked with
+    # scripts/bench_compression.py.
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_LEVELS: Dict[str, int] = {"zstd": 9, "br": 6, "gzip": 6}
+    COMPRESSION_CACHE_MB: int = 32
+
+    # Background jobs (app/core/jobs.py). Each API process runs
+    # JOB_EMBEDDED_WORKERS job threads of its own; payment webhooks, stock
+    # releases and backfills only happen while some process runs jobs, so set
+    # it to 0 only when dedicated `python -m app.worker` processes (JOB_WORKERS
+    # slots each) are deployed. Failed attempts retry after
+    # JOB_BACKOFF_SECONDS * 2^(attempt - 1), capped at JOB_BACKOFF_MAX_SECONDS;
+    # finished jobs are pruned after JOB_RETENTION_DAYS.
+    JOB_EMBEDDED_WORKERS: int = 2
+    JOB_WORKERS: int = 4
+    JOB_POOL: str = "thread"                    # "thread" or "process"
+    JOB_POLL_SECONDS: float = 1.0
+    JOB_LEASE_SECONDS: float = 300
+    JOB_MAX_ATTEMPTS: int = 5
+    JOB_BACKOFF_SECONDS: float = 5
+    JOB_BACKOFF_MAX_SECONDS: float = 3600
+    JOB_RETENTION_DAYS: int = 7
+
+    # Stack sampling period of the route profiler (/admin/profiling).
+    PROFILE_INTERVAL_MS: float = 5
+
+    # Authorize admin/collector routes from the signed role/active claims
+    # alone, checking tokens against an in-memory revocation list refreshed
+    # from token_revocations every REVOCATION_REFRESH_SECONDS.
+    STATELESS_AUTH: bool = False
+    REVOCATION_REFRESH_SECONDS: float = 5
+
+    # Only needed by the payment endpoints, which answer 503 while unset.
+    MONETBIL_SERVICE_KEY: str = ""
+    MONETBIL_SECRET_KEY: str = ""
     MONETBIL_API_URL: str = "https://api.monetbil.com/widget/v2.1"
+    MONETBIL_TIMEOUT_SECONDS: float = 30
+    # Isolation of Monetbil calls (app/core/circuit.py), per worker process:
+    # at most MONETBIL_CONCURRENCY in flight, extra requests wait up to
+    # MONETBIL_QUEUE_SECONDS for a slot (holding a request thread meanwhile)
+    # and then get a 503. The breaker opens
+    # when at least MONETBIL_BREAKER_MIN_CALLS calls in the last window failed
+    # (errors, 5xx, or slower than MONETBIL_SLOW_CALL_SECONDS) at
+    # MONETBIL_BREAKER_FAILURE_RATE or more, answers 503 for
+    # MONETBIL_BREAKER_OPEN_SECONDS, then closes after MONETBIL_BREAKER_PROBES
+    # successful trial calls.
+    MONETBIL_CONCURRENCY: int = 8
+    MONETBIL_QUEUE_SECONDS: float = 0.0
+    MONETBIL_SLOW_CALL_SECONDS: float = 5
+    MONETBIL_BREAKER_WINDOW_SECONDS: float = 30
+    MONETBIL_BREAKER_MIN_CALLS: int = 10
+    MONETBIL_BREAKER_FAILURE_RATE: float = 0.5
+    MONETBIL_BREAKER_OPEN_SECONDS: float = 15
+    MONETBIL_BREAKER_PROBES: int = 3
+
+    # Rate limiting: "<scope>:<ip|user>" -> "<requests>/<second|minute|hour>".
+    # Scopes without an entry for a key type are not limited on that key.
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"          # "memory" or "redis"
+    RATE_LIMIT_REDIS_URL: Optional[str] = None
+    RATE_LIMIT_TRUST_FORWARDED: bool = False    # honour X-Forwarded-For behind a proxy
+    RATE_LIMITS: Dict[str, str] = {
+        "login:ip": "10/minute",
+        "payments:user": "10/minute",
+        "payments:ip": "60/minute",
+        "collections:user": "30/minute",
+        "complaints:user": "20/minute",
+    }
+
+
+@lru_cache
+def get_settings() -> Settings:
+    """Read the environment / .env once, on first use rather than at import."""
+    return Settings()
+
+
+class _LazySettings:
+    def __getattr__(self, name):
+        return getattr(get_settings(), name)
+
 
-settings = Settings()
+settings = _LazySettings()
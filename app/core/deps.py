@@ -1,36 +1,76 @@
+from dataclasses import dataclass
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.revocation import get_revocation_list
 from app.core.security import SECRET_KEY, ALGORITHM
 from app.db.session import get_db
-from app.models.user import User
+from app.models.user import User, UserRole
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
+def _credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
     )
+
+def _decode(token: str) -> dict:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
     except JWTError:
-        raise credentials_exception
-    user = db.query(User).get(int(user_id))
+        raise _credentials_exception()
+    if payload.get("sub") is None:
+        raise _credentials_exception()
+    return payload
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    payload = _decode(token)
+    user = db.query(User).get(int(payload["sub"]))
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
     return user
 
-def get_current_admin(current_user: User = Depends(get_current_user)):
+
+@dataclass
+class TokenUser:
+    """The caller as described by a verified token, without loading the row."""
+    id: int
+    role: UserRole
+    is_active: bool
+
+
+def get_current_principal(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    """
+    With STATELESS_AUTH, trust the token's signed role/active claims and
+    reject tokens of revoked users: no database query per request. Otherwise
+    (or for tokens minted before those claims existed) load the user row.
+    """
+    payload = _decode(token)
+    if not settings.STATELESS_AUTH or "role" not in payload:
+        return get_current_user(token, db)
+    try:
+        principal = TokenUser(
+            id=int(payload["sub"]),
+            role=UserRole(payload["role"]),
+            is_active=payload.get("active", True),
+        )
+    except ValueError:
+        raise _credentials_exception()
+    if get_revocation_list().is_revoked(principal.id, payload.get("iat")):
+        raise _credentials_exception()
+    if not principal.is_active:
+        raise HTTPException(status_code=403, detail="Inactive user")
+    return principal
+
+def get_current_admin(current_user: User = Depends(get_current_principal)):
     if current_user.role.value != "admin":
         raise HTTPException(status_code=403, detail="Admins only")
     return current_user
 
-def get_current_collector(current_user: User = Depends(get_current_user)):
+def get_current_collector(current_user: User = Depends(get_current_principal)):
     if current_user.role.value != "collector":
         raise HTTPException(status_code=403, detail="Collectors only")
     return current_user
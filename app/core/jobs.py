@@ -0,0 +1,240 @@
+import random
+import traceback
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.job import Job, JobStatus
+
+# kind -> handler(db, **payload); filled by @job in app/services/tasks.py
+HANDLERS: Dict[str, Callable] = {}
+
+
+def job(kind: str):
+    """
+    Register the decorated function as the handler for `kind`.
+
+    Handlers get a fresh session plus the payload as keyword arguments.
+    Delivery is at-least-once (a worker can die after the work but before
+    marking the job done), so handlers must be safe to run twice.
+    """
+    def register(fn: Callable) -> Callable:
+        HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+# ---------------- Producing ----------------
+
+
+def enqueue(
+    db: Session,
+    kind: str,
+    payload: Optional[dict] = None,
+    *,
+    priority: int = 0,
+    delay: float = 0,
+    max_attempts: Optional[int] = None,
+    dedupe_key: Optional[str] = None,
+) -> Job:
+    """
+    Add a job to `db`'s transaction: it becomes visible to workers when the
+    caller commits, so it never runs for work that was rolled back. With
+    `dedupe_key`, an existing queued or running job with the same key is
+    returned instead of adding another.
+    """
+    if dedupe_key is not None:
+        existing = db.query(Job).filter(
+            Job.dedupe_key == dedupe_key, Job.status.in_([JobStatus.queued, JobStatus.running])
+        ).first()
+        if existing is not None:
+            return existing
+    new = Job(
+        kind=kind,
+        payload=payload or {},
+        priority=priority,
+        run_at=datetime.utcnow() + timedelta(seconds=delay),
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+        dedupe_key=dedupe_key,
+    )
+    db.add(new)
+    db.flush()
+    return new
+
+
+# ---------------- Consuming ----------------
+
+
+def _claimable(now: datetime):
+    return or_(
+        and_(Job.status == JobStatus.queued, Job.run_at <= now),
+        and_(Job.status == JobStatus.running, Job.lease_expires_at < now),  # worker died
+    )
+
+
+def claim(db: Session, worker: str, limit: int) -> List[tuple]:
+    """
+    Lease up to `limit` ready jobs, highest priority first; returns
+    (job id, lease) pairs. The UPDATE re-checks claimability, so when
+    workers race for the same rows each row goes to exactly one of them.
+    """
+    now = datetime.utcnow()
+    ids = db.execute(
+        select(Job.id).where(_claimable(now)).order_by(Job.priority.desc(), Job.run_at, Job.id).limit(limit)
+    ).scalars().all()
+    if not ids:
+        return []
+    lease = f"{worker}:{uuid.uuid4().hex[:12]}"
+    db.execute(
+        update(Job)
+        .where(Job.id.in_(ids), _claimable(now))
+        .values(
+            status=JobStatus.running,
+            lease=lease,
+            lease_expires_at=now + timedelta(seconds=settings.JOB_LEASE_SECONDS),
+            attempts=Job.attempts + 1,
+            started_at=now,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    claimed = db.execute(select(Job.id).where(Job.lease == lease)).scalars().all()
+    return [(id_, lease) for id_ in claimed]
+
+
+def extend_leases(db: Session, leases: List[tuple]) -> None:
+    """Heartbeat for long jobs still running under these (id, lease) pairs."""
+    if not leases:
+        return
+    expires = datetime.utcnow() + timedelta(seconds=settings.JOB_LEASE_SECONDS)
+    for id_, lease in leases:
+        db.execute(
+            update(Job).where(Job.id == id_, Job.lease == lease).values(lease_expires_at=expires)
+            .execution_options(synchronize_session=False)
+        )
+    db.commit()
+
+
+def backoff(attempts: int) -> float:
+    """Seconds before retry number `attempts`: exponential, capped, with jitter."""
+    delay = min(settings.JOB_BACKOFF_MAX_SECONDS, settings.JOB_BACKOFF_SECONDS * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def execute(db: Session, job_id: int, lease: str) -> bool:
+    """
+    Run one leased job and record the outcome; returns True on success.
+    Does nothing if the lease was lost (expired and claimed elsewhere).
+    """
+    current = db.get(Job, job_id)
+    if current is None or current.lease != lease:
+        return False
+    kind, payload, attempts, max_attempts = current.kind, current.payload, current.attempts, current.max_attempts
+    db.rollback()  # don't hold a read transaction open while the handler works
+    handler = HANDLERS.get(kind)
+    try:
+        if handler is None:
+            raise LookupError(f"No handler registered for job kind {kind!r}")
+        handler(db, **payload)
+        db.commit()
+        values = {"status": JobStatus.done, "finished_at": datetime.utcnow(), "last_error": None}
+        ok = True
+    except Exception:
+        db.rollback()
+        error = traceback.format_exc(limit=20)
+        if attempts >= max_attempts:
+            values = {"status": JobStatus.failed, "finished_at": datetime.utcnow(), "last_error": error}
+        else:
+            retry_at = datetime.utcnow() + timedelta(seconds=backoff(attempts))
+            values = {"status": JobStatus.queued, "run_at": retry_at, "last_error": error}
+        ok = False
+    db.execute(
+        update(Job).where(Job.id == job_id, Job.lease == lease)
+        .values(lease=None, lease_expires_at=None, **values)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return ok
+
+
+def prune(db: Session) -> int:
+    """Delete jobs that finished successfully more than JOB_RETENTION_DAYS ago."""
+    cutoff = datetime.utcnow() - timedelta(days=settings.JOB_RETENTION_DAYS)
+    deleted = db.execute(
+        delete(Job).where(Job.status == JobStatus.done, Job.finished_at < cutoff)
+    ).rowcount
+    db.commit()
+    return deleted
+
+
+def retry(db: Session, job_id: int) -> Optional[Job]:
+    """Queue a failed job again with a fresh set of attempts."""
+    failed = db.query(Job).filter(Job.id == job_id, Job.status == JobStatus.failed).first()
+    if failed is None:
+        return None
+    failed.status = JobStatus.queued
+    failed.attempts = 0
+    failed.run_at = datetime.utcnow()
+    failed.finished_at = None
+    db.commit()
+    return failed
+
+
+# ---------------- Metrics ----------------
+
+
+def _percentiles(seconds: list) -> Optional[dict]:
+    if not seconds:
+        return None
+    p50, p95, p99 = np.percentile(seconds, [50, 95, 99])
+    return {"p50": round(float(p50), 3), "p95": round(float(p95), 3), "p99": round(float(p99), 3)}
+
+
+def queue_stats(db: Session, window_minutes: int = 60) -> dict:
+    """
+    Queue depth now, plus wait (due -> started) and run (started ->
+    finished) latency of jobs finished within the last `window_minutes`.
+    """
+    now = datetime.utcnow()
+    depth = {"ready": 0, "scheduled": 0, "running": 0, "failed": 0}
+    by_kind: Dict[str, Dict[str, int]] = {}
+
+    def count(key: str, kind: str, n: int) -> None:
+        depth[key] += n
+        by_kind.setdefault(kind, {}).setdefault(key, 0)
+        by_kind[kind][key] += n
+
+    for kind, status, n in db.execute(
+        select(Job.kind, Job.status, func.count()).where(Job.status != JobStatus.done).group_by(Job.kind, Job.status)
+    ):
+        count("ready" if status == JobStatus.queued else status.value, kind, n)
+    for kind, n in db.execute(
+        select(Job.kind, func.count())
+        .where(Job.status == JobStatus.queued, Job.run_at > now)
+        .group_by(Job.kind)
+    ):
+        count("ready", kind, -n)
+        count("scheduled", kind, n)
+
+    ready = and_(Job.status == JobStatus.queued, Job.run_at <= now)
+    oldest = db.execute(select(func.min(Job.run_at)).where(ready)).scalar()
+    since = now - timedelta(minutes=window_minutes)
+    finished = db.execute(
+        select(Job.status, Job.run_at, Job.started_at, Job.finished_at).where(Job.finished_at >= since)
+    ).all()
+    done = [r for r in finished if r.status == JobStatus.done and r.started_at is not None]
+    return {
+        "depth": depth,
+        "by_kind": by_kind,
+        "oldest_ready_seconds": round((now - oldest).total_seconds(), 3) if oldest else 0,
+        "window_minutes": window_minutes,
+        "done": len(done),
+        "failed": sum(r.status == JobStatus.failed for r in finished),
+        "wait_seconds": _percentiles([max((r.started_at - r.run_at).total_seconds(), 0) for r in done]),
+        "run_seconds": _percentiles([(r.finished_at - r.started_at).total_seconds() for r in done]),
+    }
@@ -0,0 +1,267 @@
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import routing as fastapi_routing
+from starlette.routing import Match, compile_path
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+
+# Frames (in any thread) that show a request is being served by a route:
+# the endpoint itself, and FastAPI validating/serializing its response
+# (recognised by the response model, so two routes sharing a response model
+# and profiled at the same time share those samples). Sync endpoints have
+# their response validated in a pool thread, where the only trace of the
+# route is a `validate` method of the response field.
+_SERIALIZE_CODE = getattr(fastapi_routing.serialize_response, "__code__", None)
+
+_PREFIXES = sorted({p for p in sys.path if p and os.path.isdir(p)}, key=len, reverse=True)
+
+
+def _short(filename: str) -> str:
+    for prefix in _PREFIXES:
+        if filename.startswith(prefix):
+            return filename[len(prefix):].lstrip(os.sep)
+    return filename
+
+
+class RouteProfile:
+    """
+    Sampled CPU stacks and allocation diffs for one route.
+
+    `stacks` maps folded stacks ("root;caller;callee", the input format of
+    flamegraph.pl and speedscope) to sample counts.
+    """
+
+    def __init__(self, route, method: str, rate: float, max_requests: int, memory: bool):
+        self.path = route.path
+        self.method = method
+        self._regex = compile_path(route.path)[0]
+        self._endpoint_code = getattr(route.endpoint, "__code__", None)
+        self._response_model = getattr(route, "response_model", None)
+        self.rate = rate
+        self.max_requests = max_requests
+        self.memory = memory
+        self.requests = 0
+        self.seconds = 0.0
+        self.samples = 0
+        self.stacks: Counter = Counter()
+        self.allocations: Dict[str, List[int]] = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return self.method, self.path
+
+    def matches(self, scope: Scope) -> bool:
+        return scope["method"] == self.method and self._regex.match(scope["path"]) is not None
+
+    def _is_response_field(self, field) -> bool:
+        info = getattr(field, "field_info", None)
+        return self._response_model is not None and getattr(info, "annotation", None) == self._response_model
+
+    def claim(self) -> bool:
+        """Decide whether to profile the next request (sampling rate and budget)."""
+        with self._lock:
+            if self.requests >= self.max_requests or random.random() >= self.rate:
+                return False
+            self.requests += 1
+            return True
+
+    def owns(self, frame) -> bool:
+        while frame is not None:
+            code = frame.f_code
+            if code is self._endpoint_code:
+                return True
+            if code is _SERIALIZE_CODE and self._is_response_field(frame.f_locals.get("field")):
+                return True
+            if code.co_name == "validate" and self._is_response_field(frame.f_locals.get("self")):
+                return True
+            frame = frame.f_back
+        return False
+
+    def add_stack(self, frame) -> None:
+        labels = []
+        while frame is not None:
+            code = frame.f_code
+            labels.append(f"{code.co_name} ({_short(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        with self._lock:
+            self.stacks[";".join(reversed(labels))] += 1
+            self.samples += 1
+
+    def add_allocations(self, before, after) -> None:
+        for stat in after.compare_to(before, "lineno"):
+            if stat.size_diff <= 0:
+                continue
+            frame = stat.traceback[0]
+            site = f"{_short(frame.filename)}:{frame.lineno}"
+            with self._lock:
+                entry = self.allocations.setdefault(site, [0, 0])
+                entry[0] += stat.size_diff
+                entry[1] += stat.count_diff
+
+    def folded(self) -> str:
+        with self._lock:
+            stacks = self.stacks.most_common()
+        return "\n".join(f"{stack} {count}" for stack, count in stacks)
+
+    def top_allocations(self, limit: int = 20) -> List[dict]:
+        with self._lock:
+            top = sorted(self.allocations.items(), key=lambda item: item[1][0], reverse=True)[:limit]
+        n = max(self.requests, 1)
+        return [
+            {"site": site, "bytes": size, "blocks": count, "bytes_per_request": size // n}
+            for site, (size, count) in top
+        ]
+
+    def summary(self) -> dict:
+        return {
+            "method": self.method,
+            "path": self.path,
+            "rate": self.rate,
+            "max_requests": self.max_requests,
+            "memory": self.memory,
+            "requests": self.requests,
+            "mean_ms": round(self.seconds / self.requests * 1000, 2) if self.requests else None,
+            "samples": self.samples,
+        }
+
+
+class Profiler:
+    """
+    Registry of route profiles plus one sampler thread.
+
+    The sampler only runs while a sampled request is in flight: every
+    PROFILE_INTERVAL_MS it reads the stacks of all threads and keeps those
+    that belong to a profiled route (see RouteProfile.owns). Requests to
+    other routes cost one route match while any profile is enabled, none
+    otherwise. tracemalloc likewise runs only while a memory-profiled request is
+    in flight.
+    """
+
+    def __init__(self):
+        self.profiles: Dict[Tuple[str, str], RouteProfile] = {}
+        self._active: Counter = Counter()
+        self._tracing = 0
+        self._owns_tracemalloc = False
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ---- configuration ----
+
+    def enable(self, route, method: str, rate: float, max_requests: int, memory: bool) -> RouteProfile:
+        profile = RouteProfile(route, method, rate, max_requests, memory)
+        self.profiles[profile.key] = profile
+        return profile
+
+    def disable(self, method: str, path: str) -> Optional[RouteProfile]:
+        return self.profiles.pop((method, path), None)
+
+    def match(self, scope: Scope) -> Optional[RouteProfile]:
+        for profile in list(self.profiles.values()):
+            if profile.matches(scope):
+                return profile
+        return None
+
+    # ---- sampling ----
+
+    def begin(self, profile: RouteProfile):
+        with self._lock:
+            self._active[profile.key] += 1
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+                self._thread.start()
+            self._wake.set()
+            if profile.memory:
+                if self._tracing == 0 and not tracemalloc.is_tracing():
+                    tracemalloc.start(1)
+                    self._owns_tracemalloc = True
+                self._tracing += 1
+        return tracemalloc.take_snapshot() if profile.memory else None
+
+    def end(self, profile: RouteProfile, before, elapsed: float) -> None:
+        after = tracemalloc.take_snapshot() if before is not None else None
+        with self._lock:
+            profile.seconds += elapsed
+            self._active[profile.key] -= 1
+            if self._active[profile.key] <= 0:
+                del self._active[profile.key]
+            if not self._active:
+                self._wake.clear()
+            if before is not None:
+                self._tracing -= 1
+                if self._tracing == 0 and self._owns_tracemalloc:
+                    tracemalloc.stop()
+                    self._owns_tracemalloc = False
+        if after is not None:
+            filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+            profile.add_allocations(before.filter_traces(filters), after.filter_traces(filters))
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while True:
+            self._wake.wait()
+            interval = settings.PROFILE_INTERVAL_MS / 1000
+            profiles = [self.profiles[key] for key in list(self._active) if key in self.profiles]
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == me:
+                    continue
+                for profile in profiles:
+                    if profile.owns(frame):
+                        profile.add_stack(frame)
+                        break
+            time.sleep(interval)
+
+
+profiler = Profiler()
+
+
+class ProfilingMiddleware:
+    """Profiles a sampled fraction of requests to routes enabled via /admin/profiling."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not profiler.profiles:
+            await self.app(scope, receive, send)
+            return
+        profile = profiler.match(scope)
+        if profile is None or not profile.claim():
+            await self.app(scope, receive, send)
+            return
+        before = profiler.begin(profile)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.end(profile, before, time.perf_counter() - start)
+
+
+def find_route(routers, method: str, path: str):
+    """
+    The route of `routers` (the app's APIRouters) that serves `method` on
+    `path`, preferring one declared with exactly that path. Uses the
+    routes' own matching, so /citizens/orders/{order_id}/cancel and
+    /citizens/orders/42/cancel both find the cancel route.
+    """
+    scope = {"type": "http", "method": method, "path": path, "root_path": ""}
+    matching = [
+        route
+        for router in routers
+        for route in router.routes
+        if getattr(route, "endpoint", None) is not None and route.matches(scope)[0] == Match.FULL
+    ]
+    for route in matching:
+        if route.path == path:
+            return route
+    return matching[0] if matching else None
@@ -0,0 +1,198 @@
+import math
+import threading
+import time
+from typing import Dict, Optional, Protocol, Tuple
+
+from fastapi import Depends, HTTPException, Request, status
+
+from app.core.config import settings
+from app.core.deps import get_current_user
+from app.models.user import User
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+def parse_limit(spec: str) -> Tuple[float, float]:
+    """'10/minute' -> (refill rate per second, bucket capacity)."""
+    count, _, period = spec.partition("/")
+    capacity = float(count)
+    seconds = _PERIODS[period.strip().rstrip("s")] if period else 1
+    return capacity / seconds, capacity
+
+
+class RateLimitBackend(Protocol):
+    def take(self, key: str, rate: float, capacity: float) -> float:
+        """Consume one token; return 0 if allowed, else seconds until a token is available."""
+
+    def refund(self, key: str, rate: float, capacity: float) -> None:
+        """Give back a token taken for a request that another bucket then rejected."""
+
+
+class MemoryBackend:
+    """
+    Token buckets kept in process memory.
+
+    Keys are spread over independently locked shards so concurrent requests
+    for different clients rarely contend. A bucket that has been idle long
+    enough to refill completely is equivalent to a missing one, so such
+    entries are swept lazily from a shard every `sweep_every` operations
+    instead of by a background thread.
+    """
+
+    def __init__(self, shards: int = 64, sweep_every: int = 1024):
+        self._shards = [(threading.Lock(), {}) for _ in range(shards)]
+        self._ops = [0] * shards
+        self._sweep_every = sweep_every
+
+    def take(self, key: str, rate: float, capacity: float) -> float:
+        index = hash(key) % len(self._shards)
+        lock, buckets = self._shards[index]
+        now = time.monotonic()
+        with lock:
+            state = buckets.get(key)
+            if state is None:
+                tokens = capacity
+            else:
+                tokens = min(capacity, state[0] + (now - state[1]) * rate)
+
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / rate
+            # Third field: when the bucket will be full again and can be dropped
+            buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+
+            self._ops[index] += 1
+            if self._ops[index] >= self._sweep_every:
+                self._ops[index] = 0
+                for k in [k for k, v in buckets.items() if v[2] <= now]:
+                    del buckets[k]
+        return wait
+
+    def refund(self, key: str, rate: float, capacity: float) -> None:
+        lock, buckets = self._shards[hash(key) % len(self._shards)]
+        now = time.monotonic()
+        with lock:
+            state = buckets.get(key)
+            if state is None:
+                return  # swept: already full
+            tokens = min(capacity, state[0] + (now - state[1]) * rate + 1)
+            buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+
+    def __len__(self) -> int:
+        return sum(len(buckets) for _, buckets in self._shards)
+
+
+class RedisBackend:
+    """Shared buckets for multi-worker deployments (needs the `redis` package)."""
+
+    _SCRIPT = """
+    local rate, capacity, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + (now - ts) * rate)
+    local wait = 0
+    if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate * 1000) + 1000)
+    return tostring(wait)
+    """
+
+    _REFUND = """
+    local rate, capacity, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    if not state[1] then return 0 end
+    local tokens = math.min(capacity, tonumber(state[1]) + (now - tonumber(state[2])) * rate + 1)
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate * 1000) + 1000)
+    return 0
+    """
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requires the 'redis' package") from e
+        self._client = redis.Redis.from_url(url)
+        self._take = self._client.register_script(self._SCRIPT)
+        self._refund = self._client.register_script(self._REFUND)
+
+    def take(self, key: str, rate: float, capacity: float) -> float:
+        return float(self._take(keys=[f"ratelimit:{key}"], args=[rate, capacity, time.time()]))
+
+    def refund(self, key: str, rate: float, capacity: float) -> None:
+        self._refund(keys=[f"ratelimit:{key}"], args=[rate, capacity, time.time()])
+
+
+_backend: Optional[RateLimitBackend] = None
+_limits: Dict[str, Tuple[float, float]] = {}
+
+
+def get_backend() -> RateLimitBackend:
+    global _backend
+    if _backend is None:
+        if settings.RATE_LIMIT_BACKEND == "redis":
+            _backend = RedisBackend(settings.RATE_LIMIT_REDIS_URL or "redis://localhost:6379/0")
+        else:
+            _backend = MemoryBackend()
+    return _backend
+
+
+def _limit_for(name: str) -> Optional[Tuple[float, float]]:
+    if name not in _limits:
+        spec = settings.RATE_LIMITS.get(name)
+        _limits[name] = parse_limit(spec) if spec else None
+    return _limits[name]
+
+
+def client_ip(request: Request) -> str:
+    if settings.RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def check_rate_limit(scope: str, request: Request, user_id: Optional[int] = None) -> None:
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+    keys = [("ip", client_ip(request))]
+    if user_id is not None:
+        keys.append(("user", str(user_id)))
+
+    backend = get_backend()
+    taken = []
+    for kind, ident in keys:
+        limit = _limit_for(f"{scope}:{kind}")
+        if limit is None:
+            continue
+        key = f"{scope}:{kind}:{ident}"
+        wait = backend.take(key, *limit)
+        if wait:
+            # A request the user bucket rejects must not also drain the shared IP bucket
+            for earlier in taken:
+                backend.refund(*earlier)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, slow down",
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+        taken.append((key, *limit))
+
+
+def rate_limit(scope: str, per_user: bool = False):
+    """
+    Route dependency enforcing the `<scope>:ip` and (with `per_user`)
+    `<scope>:user` limits from settings.RATE_LIMITS, e.g.
+
+        @router.post("/login", dependencies=[Depends(rate_limit("login"))])
+    """
+    if per_user:
+        def dependency(request: Request, current_user: User = Depends(get_current_user)):
+            check_rate_limit(scope, request, current_user.id)
+    else:
+        def dependency(request: Request):
+            check_rate_limit(scope, request)
+    return dependency
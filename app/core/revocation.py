@@ -0,0 +1,124 @@
+import calendar
+import hashlib
+import math
+import threading
+import time
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import ReadSessionLocal, get_read_engine
+from app.models.user import TokenRevocation
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over integer keys (no false negatives)."""
+
+    def __init__(self, capacity: int = 10000, error_rate: float = 0.01):
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: int):
+        digest = hashlib.blake2b(key.to_bytes(8, "big", signed=True), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key: int) -> None:
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: int) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class RevocationList:
+    """
+    In-process view of the token_revocations table.
+
+    A Bloom filter answers the common case (user never revoked) with a few
+    bit tests; only its positives consult the exact user -> revoked_at map.
+    The table is re-read at most every `refresh_seconds`, and then only rows
+    past the last seen id, so authorization costs no query per request and
+    revocations reach every worker within the refresh interval.
+    """
+
+    def __init__(self, refresh_seconds: float = 5.0, capacity: int = 10000):
+        self.refresh_seconds = refresh_seconds
+        self._capacity = capacity
+        self._bloom = BloomFilter(capacity)
+        self._revoked_at: Dict[int, int] = {}
+        self._watermark = 0
+        self._next_refresh = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, user_id: int, revoked_at: int) -> None:
+        with self._lock:
+            self._add(user_id, revoked_at)
+
+    def _add(self, user_id: int, revoked_at: int) -> None:
+        if revoked_at > self._revoked_at.get(user_id, -1):
+            self._revoked_at[user_id] = revoked_at
+        if user_id not in self._bloom:
+            if self._bloom.count >= self._bloom.capacity:
+                # Keep the false-positive rate in check as the list grows
+                self._bloom = BloomFilter(self._bloom.capacity * 2)
+                for uid in self._revoked_at:
+                    self._bloom.add(uid)
+            else:
+                self._bloom.add(user_id)
+
+    def refresh(self, db: Session) -> None:
+        rows = (
+            db.query(TokenRevocation.id, TokenRevocation.user_id, TokenRevocation.revoked_at)
+            .filter(TokenRevocation.id > self._watermark)
+            .order_by(TokenRevocation.id)
+            .all()
+        )
+        with self._lock:
+            for row_id, user_id, revoked_at in rows:
+                self._add(user_id, calendar.timegm(revoked_at.utctimetuple()))
+                self._watermark = max(self._watermark, row_id)
+
+    def _maybe_refresh(self) -> None:
+        now = time.monotonic()
+        if now < self._next_refresh:
+            return
+        self._next_refresh = now + self.refresh_seconds
+        get_read_engine()
+        with ReadSessionLocal() as db:
+            self.refresh(db)
+
+    def is_revoked(self, user_id: int, issued_at: Optional[int]) -> bool:
+        self._maybe_refresh()
+        if user_id not in self._bloom:
+            return False
+        revoked_at = self._revoked_at.get(user_id)
+        return revoked_at is not None and (issued_at or 0) <= revoked_at
+
+
+_revocations: Optional[RevocationList] = None
+
+
+def get_revocation_list() -> RevocationList:
+    global _revocations
+    if _revocations is None:
+        _revocations = RevocationList(refresh_seconds=settings.REVOCATION_REFRESH_SECONDS)
+    return _revocations
+
+
+def revoke_user_tokens(db: Session, user_id: int, reason: str) -> TokenRevocation:
+    """
+    Invalidate every token issued to `user_id` so far (caller commits). This
+    process sees it immediately, other workers on their next refresh.
+    """
+    revocation = TokenRevocation(user_id=user_id, reason=reason)
+    db.add(revocation)
+    db.flush()
+    get_revocation_list().add(user_id, calendar.timegm(revocation.revoked_at.utctimetuple()))
+    return revocation
@@ -0,0 +1,48 @@
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateColumn, MetaData
+
+# create_all() only creates missing tables; it never alters an existing one.
+# Columns added to a model later must be nullable so they can be appended in
+# place on every backend; code reading them treats NULL on old rows as "not
+# recorded yet".
+
+
+def _add_column_sql(engine: Engine, table, column) -> str:
+    preparer = engine.dialect.identifier_preparer
+    spec = str(CreateColumn(column).compile(dialect=engine.dialect))
+    for fk in column.foreign_keys:
+        spec += (
+            f" REFERENCES {preparer.format_table(fk.column.table)}"
+            f" ({preparer.format_column(fk.column)})"
+        )
+    return f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {spec}"
+
+
+def ensure_columns(engine: Engine, metadata: MetaData) -> list:
+    """
+    Add model columns and indexes missing from tables that already exist.
+    Returns the "table.column" names that were added.
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    added = []
+    with engine.begin() as conn:
+        for table in metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            present = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in present:
+                    continue
+                if not column.nullable or column.primary_key:
+                    raise RuntimeError(
+                        f"Cannot add NOT NULL column {table.name}.{column.name} to an existing table"
+                    )
+                conn.exec_driver_sql(_add_column_sql(engine, table, column))
+                added.append(f"{table.name}.{column.name}")
+            indexes = {i["name"] for i in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in indexes:
+                    index.create(conn, checkfirst=True)
+    return added
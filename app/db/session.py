@@ -1,14 +1,217 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import math
+import os
+import threading
+import time
+from typing import Dict, Optional
+from fastapi import Request, Response
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import Session, sessionmaker
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./Eco-Waste.db"
+from app.core.config import settings
+from app.db.writer import WriterLock, install_single_writer
+
+# Bound to engines on first use (see get_engine), so importing this module
+# never touches the database.
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+_engine: Optional[Engine] = None
+_read_engine: Optional[Engine] = None
+_engine_pid: Optional[int] = None
+
+
+def sqlite_path(url: str) -> Optional[str]:
+    """Filesystem path of a file-backed SQLite URL, else None."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite" or parsed.database in (None, "", ":memory:"):
+        return None
+    return os.path.abspath(parsed.database)
+
+
+def _create_engine(url: str, read_only: bool = False) -> Engine:
+    if not url.startswith("sqlite"):
+        return create_engine(url, pool_pre_ping=True)
+
+    path = sqlite_path(url)
+    if read_only:
+        # Same file, opened read-only: under WAL these connections never
+        # wait for (or block) the writer.
+        url = f"sqlite:///file:{path}?mode=ro&uri=true"
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+
+    @event.listens_for(engine, "connect")
+    def _sqlite_pragmas(dbapi_conn, record):
+        cursor = dbapi_conn.cursor()
+        cursor.execute(f"PRAGMA busy_timeout = {settings.SQLITE_BUSY_TIMEOUT_MS}")
+        if read_only:
+            cursor.execute("PRAGMA query_only = 1")
+        else:
+            if settings.SQLITE_WAL:
+                # Readers no longer block on the writer (and vice versa).
+                cursor.execute("PRAGMA journal_mode = WAL")
+            cursor.execute(f"PRAGMA synchronous = {settings.SQLITE_SYNCHRONOUS}")
+        cursor.close()
+
+    if settings.DB_SINGLE_WRITER and path and not read_only:
+        install_single_writer(
+            engine, WriterLock(path + ".writelock", timeout=settings.SQLITE_BUSY_TIMEOUT_MS / 1000)
+        )
+    return engine
+
+
+def get_engine() -> Engine:
+    """
+    The engine of the current process.
+
+    Pooled connections must not cross a fork, so a worker forked from a
+    parent that already had an engine (e.g. gunicorn --preload) builds its
+    own on first use instead of inheriting the parent's.
+    """
+    global _engine, _read_engine, _engine_pid
+    if _engine is None or _engine_pid != os.getpid():
+        if _engine is not None:
+            _engine.dispose(close=False)  # leave the parent's connections alone
+        if _read_engine is not None:
+            _read_engine.dispose(close=False)
+            _read_engine = None
+        _engine = _create_engine(settings.DATABASE_URL)
+        _engine_pid = os.getpid()
+        SessionLocal.configure(bind=_engine)
+    return _engine
+
+
+def get_read_engine() -> Engine:
+    """
+    Engine for read-only handlers: DATABASE_READ_URL (e.g. a Postgres
+    replica) if set, a read-only pool on the same file for SQLite, else the
+    primary engine.
+    """
+    global _read_engine
+    engine = get_engine()
+    if _read_engine is None:
+        if settings.DATABASE_READ_URL:
+            _read_engine = _create_engine(settings.DATABASE_READ_URL, read_only=True)
+        elif sqlite_path(settings.DATABASE_URL):
+            _read_engine = _create_engine(settings.DATABASE_URL, read_only=True)
+        else:
+            _read_engine = engine
+        ReadSessionLocal.configure(bind=_read_engine)
+    return _read_engine
+
+
+def dispose_engine() -> None:
+    global _engine, _read_engine
+    if _engine_pid == os.getpid():
+        for engine in {_engine, _read_engine} - {None}:
+            engine.dispose()
+    _engine = _read_engine = None
+
+
+def _after_fork_in_child() -> None:
+    global _engine, _read_engine
+    for engine in {_engine, _read_engine} - {None}:
+        engine.dispose(close=False)
+    _engine = _read_engine = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+# ---------------- Read-your-writes stickiness ----------------
+# After a client writes, its reads go to the primary for a short while so it
+# never sees a replica that hasn't caught up with its own change yet. The
+# deadline is kept in this process (by Authorization header or client IP)
+# and sent back as a cookie, so the next read is routed the same way by
+# whichever worker takes it. Clients that drop the cookie (cross-site
+# requests without credentials) only stick on the worker that took the write.
+
+STICKY_COOKIE = "primary_until"
+
+_recent_writes: Dict[int, float] = {}
+_recent_writes_lock = threading.Lock()
+
+
+def _client_key(request: Request) -> int:
+    auth = request.headers.get("authorization")
+    if auth:
+        return hash(auth)
+    return hash(request.client.host if request.client else "")
+
+
+def mark_write(db: Session) -> None:
+    key = db.info.get("client_key")
+    if key is None or settings.READ_YOUR_WRITES_SECONDS <= 0:
+        return
+    now = time.monotonic()
+    with _recent_writes_lock:
+        _recent_writes[key] = now + settings.READ_YOUR_WRITES_SECONDS
+        if len(_recent_writes) > 10000:
+            for k in [k for k, until in _recent_writes.items() if until <= now]:
+                del _recent_writes[k]
+    response: Optional[Response] = db.info.get("response")
+    if response is not None:
+        # Wall-clock time: the worker reading it back may be another process
+        until = time.time() + settings.READ_YOUR_WRITES_SECONDS
+        response.set_cookie(
+            STICKY_COOKIE, f"{until:.3f}", max_age=math.ceil(settings.READ_YOUR_WRITES_SECONDS), httponly=True
+        )
+
+
+def wrote_recently(key: int, request: Optional[Request] = None) -> bool:
+    until = _recent_writes.get(key)
+    if until is not None and until > time.monotonic():
+        return True
+    if request is None:
+        return False
+    try:
+        cookie_until = float(request.cookies.get(STICKY_COOKIE, 0))
+    except ValueError:
+        return False
+    # Never honour a deadline further out than one write could have set
+    now = time.time()
+    return now < cookie_until <= now + settings.READ_YOUR_WRITES_SECONDS
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _flag_write(session, flush_context):
+    session.info["wrote"] = True
+
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def _flag_bulk_write(orm_execute_state):
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info["wrote"] = True
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _remember_write(session):
+    if session.info.pop("wrote", False):
+        mark_write(session)
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 # Dependency
-def get_db():
+def get_db(request: Request, response: Response):
+    get_engine()
     db = SessionLocal()
+    db.info["client_key"] = _client_key(request)
+    db.info["response"] = response
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_read_db(request: Request):
+    """
+    Session for handlers that only read. Uses the read engine unless the
+    same client wrote within READ_YOUR_WRITES_SECONDS.
+    """
+    get_read_engine()
+    key = _client_key(request)
+    db = SessionLocal() if wrote_recently(key, request) else ReadSessionLocal()
+    db.info["client_key"] = key
     try:
         yield db
     finally:
@@ -0,0 +1,131 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process lock applies
+    fcntl = None
+
+_READ_PREFIXES = ("SELECT", "PRAGMA", "WITH", "EXPLAIN")
+
+
+class WriterLock:
+    """
+    Lets one write transaction at a time into a SQLite database.
+
+    Within a process, writers queue on a thread lock; across worker processes
+    they queue on an exclusive flock() of a sidecar lock file. Waiting here
+    replaces SQLite's busy-retry loop, which is what surfaces as "database is
+    locked" once enough workers contend. Readers never take the lock (WAL
+    mode lets them run alongside the writer).
+
+    Not reentrant: a thread that asks for the lock while one of its own
+    connections holds it (a second session writing before the first one
+    committed) fails at once instead of waiting out the timeout on itself.
+    SQLite would refuse that second write transaction anyway.
+    """
+
+    def __init__(self, path: str, timeout: float = 30.0):
+        self.path = path
+        self.timeout = timeout
+        self._thread_lock = threading.Lock()
+        self._owner: Optional[int] = None
+        self._fd = None
+        self._fd_pid = None
+
+    def _file(self):
+        # File descriptors are per process; reopen after a fork.
+        if self._fd is None or self._fd_pid != os.getpid():
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            self._fd_pid = os.getpid()
+        return self._fd
+
+    def acquire(self) -> None:
+        deadline = time.monotonic() + self.timeout
+        if self._owner == threading.get_ident():
+            raise OperationalError(
+                "acquire writer lock", {},
+                RuntimeError("writer lock already held by this thread: commit the other session's write first"),
+            )
+        if not self._thread_lock.acquire(timeout=self.timeout):
+            raise OperationalError("acquire writer lock", {}, TimeoutError("writer lock timeout"))
+        if fcntl is None:
+            self._owner = threading.get_ident()
+            return
+        try:
+            fd = self._file()
+            while True:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    self._owner = threading.get_ident()
+                    return
+                except BlockingIOError:
+                    if time.monotonic() >= deadline:
+                        raise OperationalError("acquire writer lock", {}, TimeoutError("writer lock timeout"))
+                    time.sleep(0.001)
+        except BaseException:
+            self._thread_lock.release()
+            raise
+
+    def release(self) -> None:
+        self._owner = None
+        if fcntl is not None:
+            fcntl.flock(self._file(), fcntl.LOCK_UN)
+        self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def install_single_writer(engine: Engine, lock: WriterLock) -> None:
+    """
+    Make every write transaction on `engine` hold `lock` from its first
+    write statement until it commits or rolls back.
+    """
+    def _release(info):
+        if info.pop("holds_writer_lock", False):
+            lock.release()
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _acquire_on_write(conn, cursor, statement, parameters, context, executemany):
+        if conn.info.get("holds_writer_lock"):
+            return
+        if statement.lstrip()[:7].upper().startswith(_READ_PREFIXES):
+            return
+        lock.acquire()
+        conn.info["holds_writer_lock"] = True
+
+    # These fire just before COMMIT/ROLLBACK is sent. Releasing then leaves a
+    # sub-millisecond overlap with the next writer, which SQLite's busy
+    # timeout absorbs, and avoids holding the lock across pool checkin.
+    @event.listens_for(engine, "commit")
+    def _on_commit(conn):
+        _release(conn.info)
+
+    @event.listens_for(engine, "rollback")
+    def _on_rollback(conn):
+        _release(conn.info)
+
+    # Safety net for connections returned without an explicit end of transaction.
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_conn, record):
+        _release(record.info)
+
+
+@contextmanager
+def file_lock(path: str):
+    """Exclusive cross-process lock, e.g. to run startup DDL in one worker at a time."""
+    lock = WriterLock(path, timeout=300.0)
+    with lock:
+        yield
@@ -1,31 +1,84 @@
+import os
+from contextlib import asynccontextmanager, nullcontext
+
 from fastapi import FastAPI
-from app.db.session import engine
-from app.db.base import Base
 from fastapi.middleware.cors import CORSMiddleware
-from app.models import *
-from app.routers import auth, products, waste, citizens, admin, collectors, payments
 from fastapi.staticfiles import StaticFiles
 
+from app.core.compression import CompressionMiddleware
+from app.core.profiling import ProfilingMiddleware
+from app.db.session import get_engine, dispose_engine, sqlite_path
+from app.db.writer import file_lock
+from app.db.group_commit import stop_group_committer
+
+IMAGES_DIR = "images"
+
+
+def boot() -> None:
+    """
+    Everything that touches the filesystem or the database at startup.
+
+    Runs from the lifespan handler, never at import, so importing the app
+    (tests, CLI tools, each pre-forked worker) stays cheap.
+    """
+    from app.db.base import Base
+    import app.models  # noqa: F401 - register every table on Base.metadata
+    from app.models.base_location import Location  # noqa: F401
+    from app.db.migrations import ensure_columns
+    from app.services.events import ensure_event_triggers
+    from app.services.search import ensure_search_indexes
+
+    os.makedirs(IMAGES_DIR, exist_ok=True)
+    engine = get_engine()
+    # Workers boot concurrently; let one at a time run the DDL checks.
+    path = sqlite_path(str(engine.url))
+    with file_lock(path + ".bootlock") if path else nullcontext():
+        Base.metadata.create_all(bind=engine)
+        ensure_columns(engine, Base.metadata)
+        ensure_search_indexes(engine)
+        ensure_event_triggers(engine)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from app.worker import start_embedded  # imports every job handler
+
+    boot()
+    worker = start_embedded()
+    yield
+    if worker is not None:
+        worker.join(timeout=30)
+    stop_group_committer()
+    dispose_engine()
+
+
+def create_app() -> FastAPI:
+    from app.routers import auth, products, waste, citizens, admin, collectors, payments
 
-Base.metadata.create_all(bind=engine)
+    app = FastAPI(title="Citizen Waste Flow API", lifespan=lifespan)
 
-app = FastAPI(title="Citizen Waste Flow API")
+    routers = (auth.router, products.router, waste.router, citizens.router,
+               admin.router, collectors.router, payments.router)
+    for router in routers:
+        app.include_router(router)
+    # Looked up by /admin/profiling (app/core/profiling.py: find_route)
+    app.state.routers = routers
 
-app.include_router(auth.router)
-app.include_router(products.router)
-app.include_router(waste.router)
-app.include_router(citizens.router)
-app.include_router(admin.router)
-app.include_router(collectors.router)
-app.include_router(payments.router)
+    app.add_middleware(CompressionMiddleware)
+    # Wraps compression, so profiled timings include it
+    app.add_middleware(ProfilingMiddleware)
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],   # Allow POST, GET, OPTIONS, etc.
+        allow_headers=["*"],
+        expose_headers=["X-Sync-Token"],  # delta sync cursor (app/services/sync.py)
+    )
 
+    # The directory is created by boot(); don't stat it at import time.
+    app.mount("/images", StaticFiles(directory=IMAGES_DIR, check_dir=False), name="images")
+    return app
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],   # Allow POST, GET, OPTIONS, etc.
-    allow_headers=["*"],
-)
 
-app.mount("/images", StaticFiles(directory="images"), name="images")
\ No newline at end of file
+app = create_app()
@@ -1,7 +1,14 @@
-from .user import User
-from .complaint import Complaint
-from .order import Order
+from .user import User, TokenRevocation
+from .complaint import Complaint, ComplaintSignature, ComplaintLshBucket
+from .order import Order, OrderItem
+from .base_location import Location, LocationTrigram
 from .waste import WasteCollection
 from .product import Product
 from .payment import Payment
+from .analytics import DailyRollup, RollupWatermark
+from .heatmap import HeatmapCell, HeatmapTile
+from .archive import collections_archive, order_items_archive, orders_archive, payments_archive
+from .forecast import CollectionForecast
+from .job import Job
+from .event import Event
 # any other models
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, Date, DateTime, Float
+from app.db.base import Base
+
+
+class DailyRollup(Base):
+    """
+    Per-day, per-status aggregate of one metric ("collections", "completions",
+    "orders", "payments", "complaints"), maintained by app/services/analytics.py.
+    `total` is the summed amount (revenue, payment amount, or seconds to
+    complete), 0 where the metric has none.
+    """
+    __tablename__ = "daily_rollups"
+
+    metric = Column(String, primary_key=True)
+    day = Column(Date, primary_key=True)
+    status = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    total = Column(Float, nullable=False, default=0.0)
+
+
+class RollupWatermark(Base):
+    """Source rows updated before `value` are already reflected in daily_rollups."""
+    __tablename__ = "rollup_watermarks"
+
+    metric = Column(String, primary_key=True)
+    value = Column(DateTime, nullable=False)
@@ -0,0 +1,44 @@
+from sqlalchemy import Column, Index, Table
+from app.db.base import Base
+from .order import Order, OrderItem
+from .payment import Payment
+from .waste import WasteCollection
+
+
+def _archive_of(model, *indexed) -> Table:
+    """
+    Cold copy of `model`'s table: same columns (new ones included, see
+    app/db/migrations.py), no foreign keys so rows outlive their parents,
+    and only the indexes the history endpoints need. A tuple in `indexed`
+    is a composite index.
+    """
+    source = model.__table__
+    name = f"{source.name}_archive"
+    composite = [cols for cols in indexed if isinstance(cols, tuple)]
+    return Table(
+        name,
+        Base.metadata,
+        *(
+            Column(c.name, c.type, primary_key=c.primary_key, autoincrement=False,
+                   nullable=c.nullable, index=c.name in indexed)
+            for c in source.columns
+        ),
+        *(Index(f"ix_{name}_{'_'.join(cols)}", *cols) for cols in composite),
+    )
+
+
+collections_archive = _archive_of(
+    WasteCollection, "user_id", "collector_id", "created_at", "location_id",
+    ("user_id", "updated_at"), ("collector_id", "updated_at"),
+)
+orders_archive = _archive_of(Order, "user_id", "created_at", ("user_id", "updated_at"))
+payments_archive = _archive_of(Payment, "user_id", "order_id", "created_at", "reference")
+order_items_archive = _archive_of(OrderItem, "order_id")
+
+# hot table -> archive table
+ARCHIVES = {
+    WasteCollection.__table__: collections_archive,
+    Order.__table__: orders_archive,
+    Payment.__table__: payments_archive,
+    OrderItem.__table__: order_items_archive,
+}
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, ForeignKey, Index, Integer, String
 from app.db.base import Base
 
 class Location(Base):
@@ -7,3 +7,16 @@ class Location(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
     address = Column(String, nullable=False)
+
+
+class LocationTrigram(Base):
+    """
+    One trigram of a location's normalized name or address (`field`): the
+    inverted index app/services/locations.py matches free text against.
+    """
+    __tablename__ = "location_trigrams"
+    __table_args__ = (Index("ix_location_trigrams_trigram", "trigram"),)
+
+    location_id = Column(Integer, ForeignKey("locations.id", ondelete="CASCADE"), primary_key=True)
+    field = Column(String, primary_key=True)
+    trigram = Column(String, primary_key=True)
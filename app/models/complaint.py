@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Enum
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Enum, LargeBinary, Index
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 import enum
@@ -16,6 +16,33 @@ class Complaint(Base):
     user_id = Column(Integer, ForeignKey("users.id"))
     description = Column(String, nullable=False)
     status = Column(Enum(ComplaintStatus), default=ComplaintStatus.open)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    deleted_at = Column(DateTime, nullable=True)  # tombstone: withdrawn by the citizen
 
     user = relationship("User", back_populates="complaints")
+
+    __table_args__ = (
+        Index("ix_complaints_user_updated", "user_id", "updated_at"),  # delta sync
+    )
+
+
+class ComplaintSignature(Base):
+    """MinHash signature and near-duplicate cluster of a complaint."""
+    __tablename__ = "complaint_signatures"
+
+    complaint_id = Column(Integer, ForeignKey("complaints.id", ondelete="CASCADE"), primary_key=True)
+    cluster_id = Column(Integer, index=True, nullable=False)
+    signature = Column(LargeBinary, nullable=False)
+
+    complaint = relationship("Complaint")
+
+
+class ComplaintLshBucket(Base):
+    """One LSH band hash of a complaint signature; equal buckets are candidate duplicates."""
+    __tablename__ = "complaint_lsh_buckets"
+    __table_args__ = (Index("ix_complaint_lsh_band_bucket", "band", "bucket"),)
+
+    complaint_id = Column(Integer, ForeignKey("complaints.id", ondelete="CASCADE"), primary_key=True)
+    band = Column(Integer, primary_key=True)
+    bucket = Column(String, nullable=False)
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from app.db.base import Base
+from datetime import datetime
+
+
+class Event(Base):
+    """
+    One state transition of a collection, order, payment or complaint.
+
+    Append-only and written by database triggers (app/services/events.py)
+    in the transaction that changed the row, so every write path is
+    covered. `seq` only grows and is never reused; consumers page through
+    GET /admin/events?after=<last seq seen>.
+    """
+    __tablename__ = "events"
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    seq = Column(Integer, primary_key=True)
+    entity = Column(String, nullable=False)        # "collection", "order", "payment", "complaint"
+    entity_id = Column(Integer, nullable=False)
+    user_id = Column(Integer, nullable=True)       # owner of the row (citizen)
+    old_status = Column(String, nullable=True)     # None when the row was created
+    new_status = Column(String, nullable=True)     # "withdrawn" when the citizen withdrew the row
+    occurred_at = Column(DateTime, nullable=False, default=datetime.utcnow)
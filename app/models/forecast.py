@@ -0,0 +1,19 @@
+from sqlalchemy import Column, String, Date, DateTime, Float
+from sqlalchemy.types import JSON
+from app.db.base import Base
+from datetime import datetime
+
+
+class CollectionForecast(Base):
+    """
+    Expected collection requests for one location and day, written by the
+    nightly batch in app/services/forecast.py. `hourly` holds 24 expected
+    counts (the day's total spread by the location's hour-of-day profile).
+    """
+    __tablename__ = "collection_forecasts"
+
+    location = Column(String, primary_key=True)    # normalized: trimmed, lower-case
+    day = Column(Date, primary_key=True, index=True)   # all-location totals group by day
+    expected = Column(Float, nullable=False)
+    hourly = Column(JSON, nullable=False)
+    generated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Date, DateTime, Integer, String, Text
+from app.db.base import Base
+
+
+class HeatmapCell(Base):
+    """
+    Collection requests created in one hour at one location (location_id 0:
+    not linked to a location yet), maintained by app/services/heatmap.py.
+    """
+    __tablename__ = "heatmap_cells"
+
+    hour = Column(DateTime, primary_key=True)
+    location_id = Column(Integer, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class HeatmapTile(Base):
+    """A rendered heatmap tile: the JSON body served as is, and its ETag."""
+    __tablename__ = "heatmap_tiles"
+
+    zoom = Column(String, primary_key=True)
+    start = Column(Date, primary_key=True)
+    etag = Column(String, nullable=False)
+    body = Column(Text, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
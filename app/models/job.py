@@ -0,0 +1,43 @@
+from sqlalchemy import Column, Integer, String, DateTime, Enum, Text, Index
+from sqlalchemy.types import JSON
+from app.db.base import Base
+import enum
+from datetime import datetime
+
+
+class JobStatus(enum.Enum):
+    queued = "queued"      # waiting for run_at (retries wait here too)
+    running = "running"    # leased by a worker until lease_expires_at
+    done = "done"
+    failed = "failed"      # gave up after max_attempts
+
+
+class Job(Base):
+    """
+    One unit of background work for app/worker.py (see app/core/jobs.py).
+
+    Workers claim ready rows by setting `lease` with a conditional UPDATE,
+    so a job runs on one worker at a time; a lease that expires (worker
+    died) makes the job claimable again.
+    """
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False, index=True)
+    payload = Column(JSON, nullable=False, default=dict)
+    priority = Column(Integer, nullable=False, default=0)   # higher runs first
+    status = Column(Enum(JobStatus), nullable=False, default=JobStatus.queued)
+    run_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    dedupe_key = Column(String, nullable=True, index=True)
+    lease = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True, index=True)
+
+    __table_args__ = (
+        Index("ix_jobs_ready", "status", "priority", "run_at"),
+    )
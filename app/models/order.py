@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, Float, Enum
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Float, Enum, Index
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 import enum
@@ -18,7 +18,28 @@ class Order(Base):
     quantity = Column(Integer, default=1)
     total_price = Column(Float, nullable=False)
     status = Column(Enum(OrderStatus), default=OrderStatus.pending)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     user = relationship("User", back_populates="orders")
     product = relationship("Product", back_populates="orders")
+    # Cart orders (product_id NULL) list their lines here; quantity is the unit total
+    items = relationship("OrderItem", back_populates="order", order_by="OrderItem.id")
+
+    __table_args__ = (
+        Index("ix_orders_user_updated", "user_id", "updated_at"),  # delta sync
+    )
+
+
+class OrderItem(Base):
+    """One line of a cart order, priced at checkout."""
+    __tablename__ = "order_items"
+
+    id = Column(Integer, primary_key=True, index=True)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False, index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    unit_price = Column(Float, nullable=False)
+
+    order = relationship("Order", back_populates="items")
+    product = relationship("Product")
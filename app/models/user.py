@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, Enum, Boolean
+from sqlalchemy import Column, Integer, String, Enum, Boolean, DateTime
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 import enum
+from datetime import datetime
 
 class UserRole(enum.Enum):
     citizen = "citizen"
@@ -35,3 +36,16 @@ class User(Base):
         foreign_keys="[WasteCollection.collector_id]",
         back_populates=None  # no back_populates needed here
     )
+
+
+class TokenRevocation(Base):
+    """
+    Access tokens of `user_id` issued at or before `revoked_at` are no longer
+    valid. No foreign key: the row must outlive a deleted user.
+    """
+    __tablename__ = "token_revocations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, nullable=False, index=True)
+    revoked_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    reason = Column(String, nullable=True)
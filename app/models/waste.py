@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Enum
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Enum, Index
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 import enum
@@ -16,9 +16,20 @@ class WasteCollection(Base):
     user_id = Column(Integer, ForeignKey("users.id"))
     collector_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     location = Column(String, nullable=False)
+    # Canonical area the free-text location resolved to (app/services/locations.py)
+    location_id = Column(Integer, ForeignKey("locations.id"), nullable=True, index=True)
     status = Column(Enum(CollectionStatus), default=CollectionStatus.requested)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    completed_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    deleted_at = Column(DateTime, nullable=True)  # tombstone: withdrawn by the citizen
 
     # Relationships
     user = relationship("User", foreign_keys=[user_id], back_populates="collections")
     collector = relationship("User", foreign_keys=[collector_id])
+
+    __table_args__ = (
+        # Delta sync (?updated_since=) of one citizen's / collector's rows
+        Index("ix_waste_collections_user_updated", "user_id", "updated_at"),
+        Index("ix_waste_collections_collector_updated", "collector_id", "updated_at"),
+    )
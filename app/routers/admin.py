@@ -1,18 +1,36 @@
-from datetime import date
-from fastapi import APIRouter, Depends, HTTPException, Query, Body, UploadFile, File, Form
+from datetime import date, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query, Body, UploadFile, File, Form, Request
+from fastapi.responses import PlainTextResponse, Response
 from sqlalchemy.orm import Session
-from typing import List, Optional
-import os, shutil
+from typing import List, Optional, Set
+import os, re, shutil
 
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
+from app.core.circuit import guard_stats
 from app.core.deps import get_current_admin
-from app.models.base_location import Location
+from app.core.jobs import enqueue, queue_stats, retry
+from app.worker import embedded_stats
+from app.core.fieldsets import Fieldset, sparse, sparse_fields
+from app.core.profiling import find_route, profiler
+from app.core.revocation import revoke_user_tokens
+from app.core.security import get_password_hash
+from app.models.base_location import Location, LocationTrigram
 from app.models.order import Order
 from app.models.user import User, UserRole
 from app.models.product import Product, Category
 from app.models.complaint import Complaint, ComplaintStatus
+from app.models.job import Job, JobStatus
 from app.models.waste import CollectionStatus, WasteCollection
-from passlib.context import CryptContext
+from app.services.analytics import GRANULARITIES, analytics, refresh_rollups, refresh_rollups_if_stale
+from app.services.archive import archive_old_rows
+from app.services.forecast import get_forecast, normalize_location, run_forecasts
+from app.services.heatmap import ZOOMS as HEATMAP_ZOOMS, coverage as heatmap_coverage, read_tile, tile_start
+from app.services.locations import backfill_location_ids, collections_by_location, index_location, unlink_location
+from app.services.bulk import bulk_insert, iter_upload_rows
+from app.services.dispatch import dispatch
+from app.services.events import TRACKED, events_after
+from app.services.dedup import list_clusters, resolve_cluster
+from app.services.search import search_complaints
 
 from app.schemas.collector import CollectorResponse
 from app.schemas.location import LocationCreate, LocationResponse
@@ -24,21 +42,29 @@ from app.schemas.product import (
     CategoryCreate,
     CategoryResponse
 )
-from app.schemas.complaint import ComplaintResponse
+from app.schemas.complaint import ComplaintResponse, ComplaintCluster
+from app.schemas.analytics import AnalyticsResponse
+from app.schemas.bulk import BulkResult
+from app.schemas.event import EventPage
+from app.schemas.forecast import ForecastResponse
 from app.schemas.user import UserResponse
 from app.schemas.waste import WasteCollectionResponse
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-# Ensure upload directory exists
 UPLOAD_DIR = "images"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return get_password_hash(password)
+
+
+def save_image(image: UploadFile) -> str:
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    image_path = os.path.join(UPLOAD_DIR, image.filename)
+    with open(image_path, "wb") as buffer:
+        shutil.copyfileobj(image.file, buffer)
+    return image.filename
 
 
 # ----------------- Collectors -----------------
@@ -74,8 +100,12 @@ def create_collector(
 
 
 @router.get("/collectors", response_model=List[CollectorResponse])
-def list_collectors(db: Session = Depends(get_db), current_user: User = Depends(get_current_admin)):
-    return db.query(User).filter(User.role == UserRole.collector).all()
+def list_collectors(
+    fieldset: Optional[Fieldset] = Depends(sparse_fields(CollectorResponse)),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_admin),
+):
+    return sparse(db.query(User).filter(User.role == UserRole.collector), User, fieldset)
 
 
 @router.delete("/collectors/{collector_id}", response_model=dict)
@@ -83,11 +113,23 @@ def delete_collector(collector_id: int, db: Session = Depends(get_db), current_u
     collector = db.query(User).filter(User.id == collector_id, User.role == UserRole.collector).first()
     if not collector:
         raise HTTPException(404, "Collector not found")
+    revoke_user_tokens(db, collector.id, "deleted")
     db.delete(collector)
     db.commit()
     return {"msg": f"Collector {collector.username} deleted"}
 
 
+@router.put("/users/{user_id}/deactivate", response_model=dict)
+def deactivate_user(user_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_admin)):
+    user = db.query(User).get(user_id)
+    if not user:
+        raise HTTPException(404, "User not found")
+    user.is_active = False
+    revoke_user_tokens(db, user.id, "deactivated")
+    db.commit()
+    return {"msg": f"User {user.username} deactivated"}
+
+
 # ----------------- Categories -----------------
 @router.post("/categories", response_model=CategoryResponse)
 def create_category(cat: CategoryCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_admin)):
@@ -99,7 +141,7 @@ def create_category(cat: CategoryCreate, db: Session = Depends(get_db), current_
 
 
 @router.get("/categories", response_model=List[CategoryResponse])
-def list_categories(db: Session = Depends(get_db), current_user: User = Depends(get_current_admin)):
+def list_categories(db: Session = Depends(get_read_db), current_user: User = Depends(get_current_admin)):
     return db.query(Category).all()
 
 
@@ -139,12 +181,7 @@ async def create_product(
     current_user: User = Depends(get_current_admin)
 ):
     # Handle image upload
-    image_filename = None
-    if image:
-        image_filename = image.filename
-        image_path = os.path.join(UPLOAD_DIR, image_filename)
-        with open(image_path, "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
+    image_filename = save_image(image) if image else None
 
     features_list = features.split(",") if features else []
 
@@ -164,9 +201,45 @@ async def create_product(
     return new_prod
 
 
+@router.post("/products/import", response_model=BulkResult)
+def import_products(
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin)
+):
+    """
+    Import products from a CSV file (header row with ProductCreate fields,
+    `features` comma-separated), a JSON Lines file (.jsonl, one product
+    object per line) or a JSON array of product objects. The file is read
+    as a stream and committed in chunks: unreadable rows are reported in
+    `errors`, and 400 is only returned when nothing could be read.
+    """
+    category_ids = {cid for (cid,) in db.query(Category.id)}
+
+    def build(raw):
+        if not isinstance(raw, dict):
+            raise ValueError("Row must be an object")
+        data = {k: v for k, v in raw.items() if k and v not in ("", None)}
+        if isinstance(data.get("features"), str):
+            data["features"] = [f.strip() for f in data["features"].split(",") if f.strip()]
+        prod = ProductCreate.model_validate(data)
+        if prod.category_id not in category_ids:
+            raise ValueError(f"Unknown category_id {prod.category_id}")
+        return prod.model_dump()
+
+    try:
+        return bulk_insert(db, Product, iter_upload_rows(file), build)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(400, f"Unreadable import file: {e}")
+
+
 @router.get("/products", response_model=List[ProductResponse])
-def list_products(db: Session = Depends(get_db), current_user: User = Depends(get_current_admin)):
-    return db.query(Product).all()
+def list_products(
+    fieldset: Optional[Fieldset] = Depends(sparse_fields(ProductResponse)),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_admin),
+):
+    return sparse(db.query(Product), Product, fieldset)
 
 
 @router.put("/products/{product_id}", response_model=ProductResponse)
@@ -196,11 +269,7 @@ async def update_product(
     if features: prod.features = features.split(",")
 
     if image:
-        image_filename = image.filename
-        image_path = os.path.join(UPLOAD_DIR, image_filename)
-        with open(image_path, "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
-        prod.image = image_filename
+        prod.image = save_image(image)
 
     db.commit()
     db.refresh(prod)
@@ -219,8 +288,45 @@ def delete_product(product_id: int, db: Session = Depends(get_db), current_user:
 
 # ----------------- Complaints -----------------
 @router.get("/complaints", response_model=List[ComplaintResponse])
-def list_complaints(db: Session = Depends(get_db), current_user: User = Depends(get_current_admin)):
-    return db.query(Complaint).all()
+def list_complaints(
+    fieldset: Optional[Fieldset] = Depends(sparse_fields(ComplaintResponse)),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_admin),
+):
+    return sparse(db.query(Complaint).filter(Complaint.deleted_at.is_(None)), Complaint, fieldset)
+
+
+@router.get("/complaints/search", response_model=List[ComplaintResponse])
+def search_complaints_route(
+    q: str = Query(..., min_length=1),
+    status: Optional[ComplaintStatus] = None,
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_admin)
+):
+    return search_complaints(db, q, status=status, limit=limit, offset=offset)
+
+
+@router.get("/complaints/clusters", response_model=List[ComplaintCluster])
+def list_complaint_clusters(
+    min_size: int = Query(2, ge=1),
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_admin)
+):
+    """Groups of open, near-identical complaints, largest first."""
+    return list_clusters(db, min_size=min_size, limit=limit, offset=offset)
+
+
+@router.put("/complaints/clusters/{cluster_id}/resolve", response_model=dict)
+def resolve_complaint_cluster(cluster_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_admin)):
+    resolved = resolve_cluster(db, cluster_id)
+    if not resolved:
+        raise HTTPException(404, "No open complaints in this cluster")
+    db.commit()
+    return {"msg": f"{resolved} complaints resolved", "resolved": resolved}
 
 
 @router.put("/complaints/{complaint_id}", response_model=ComplaintResponse)
@@ -236,7 +342,7 @@ def resolve_complaint(complaint_id: int, db: Session = Depends(get_db), current_
 
 # ----------------- Orders -----------------
 @router.get("/orders")
-def list_all_orders(db: Session = Depends(get_db), current_admin=Depends(get_current_admin)):
+def list_all_orders(db: Session = Depends(get_read_db), current_admin=Depends(get_current_admin)):
     # Optional: check if user is admin
     if not getattr(current_admin, "is_admin", True):  # fallback to True if missing
         return {"error": "Not authorized"}
@@ -250,7 +356,7 @@ def list_all_orders(db: Session = Depends(get_db), current_admin=Depends(get_cur
 
         response.append({
             "id": o.id,
-            "service": product.name if product else "Unknown Product",
+            "service": product.name if product else (f"Cart ({len(o.items)} items)" if o.items else "Unknown Product"),
             "customer": getattr(user, "username", "Unknown User"),
             "customerEmail": getattr(user, "email", None),
             "quantity": o.quantity,
@@ -264,11 +370,13 @@ def list_all_orders(db: Session = Depends(get_db), current_admin=Depends(get_cur
 
 # ----------------- Stats -----------------
 @router.get("/stats", response_model=dict)
-def get_admin_stats(db: Session = Depends(get_db), current_user: User = Depends(get_current_admin)):
+def get_admin_stats(db: Session = Depends(get_read_db), current_user: User = Depends(get_current_admin)):
     total_users = db.query(User).count()
     active_collectors = db.query(User).filter(User.role == UserRole.collector).count()
     today_orders = db.query(WasteCollection).filter(WasteCollection.created_at >= date.today()).count()
-    pending_complaints = db.query(Complaint).filter(Complaint.status != ComplaintStatus.resolved).count()
+    pending_complaints = db.query(Complaint).filter(
+        Complaint.status != ComplaintStatus.resolved, Complaint.deleted_at.is_(None)
+    ).count()
     monthly_revenue = 0
     completion_rate = 0
 
@@ -282,9 +390,289 @@ def get_admin_stats(db: Session = Depends(get_db), current_user: User = Depends(
     }
 
 
+# ----------------- Background jobs -----------------
+def _in_background(db: Session, kind: str, payload: Optional[dict] = None) -> dict:
+    """Hand a batch operation to the worker; a second request while one is queued reuses it."""
+    job = enqueue(db, kind, payload, dedupe_key=kind)
+    db.commit()
+    return {"job_id": job.id, "status": job.status.value}
+
+
+@router.get("/jobs/stats", response_model=dict)
+def job_queue_stats(
+    window_minutes: int = Query(60, ge=1, le=7 * 24 * 60),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_admin),
+):
+    """
+    Queue depth by kind and wait/run latency percentiles of recently finished
+    jobs, plus the embedded worker of the process answering (null when
+    JOB_EMBEDDED_WORKERS is 0 and dedicated workers run the queue).
+    """
+    return {**queue_stats(db, window_minutes), "embedded_worker": embedded_stats()}
+
+
+@router.get("/circuits", response_model=dict)
+def circuit_stats(current_user: User = Depends(get_current_admin)):
+    """Breaker state, recent failure rate and bulkhead occupancy per external dependency (this worker)."""
+    return guard_stats()
+
+
+@router.get("/jobs", response_model=List[dict])
+def list_jobs(
+    status: JobStatus = JobStatus.failed,
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_admin),
+):
+    rows = db.query(Job).filter(Job.status == status).order_by(Job.id.desc()).limit(limit)
+    return [
+        {
+            "id": j.id, "kind": j.kind, "payload": j.payload, "priority": j.priority,
+            "status": j.status.value, "attempts": j.attempts, "run_at": j.run_at,
+            "created_at": j.created_at, "finished_at": j.finished_at, "last_error": j.last_error,
+        }
+        for j in rows
+    ]
+
+
+@router.post("/jobs/{job_id}/retry", response_model=dict)
+def retry_job(job_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_admin)):
+    if retry(db, job_id) is None:
+        raise HTTPException(404, "No failed job with this id")
+    return {"message": "Job queued"}
+
+
+# ----------------- Change feed -----------------
+@router.get("/events", response_model=EventPage)
+def list_events(
+    after: int = Query(0, ge=0),
+    limit: int = Query(500, ge=1, le=5000),
+    entity: Optional[str] = Query(None, pattern="^(" + "|".join(TRACKED.values()) + ")$"),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_admin),
+):
+    """
+    Status changes of collections, orders, payments and complaints after
+    sequence number `after`, oldest first. Poll with the returned
+    `next_after` to receive only what changed since the previous call.
+    """
+    events = events_after(db, after, limit, entity)
+    return {"events": events, "next_after": events[-1].seq if events else after}
+
+
+# ----------------- Analytics -----------------
+@router.get("/analytics", response_model=AnalyticsResponse)
+def get_analytics(
+    start: Optional[date] = Query(None, alias="from"),
+    end: Optional[date] = Query(None, alias="to"),
+    granularity: str = Query("day", pattern="^(" + "|".join(GRANULARITIES) + ")$"),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_admin),
+):
+    """Trends from the daily rollup tables; never scans the source tables."""
+    end = end or date.today()
+    start = start or end - timedelta(days=30)
+    if start > end:
+        raise HTTPException(400, "'from' must not be after 'to'")
+    refresh_rollups_if_stale()
+    return {
+        "start": start,
+        "end": end,
+        "granularity": granularity,
+        "buckets": analytics(db, start, end, granularity),
+    }
+
+
+@router.post("/analytics/refresh", response_model=dict)
+def refresh_analytics(
+    background: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin),
+):
+    """Fold changes into the rollups now; returns days recomputed per metric (-1 = full rebuild)."""
+    if background:
+        return _in_background(db, "analytics.refresh")
+    return refresh_rollups(db)
+
+
+# ----------------- Heatmap -----------------
+@router.get("/heatmap", response_model=dict)
+def heatmap_index(db: Session = Depends(get_read_db), current_user: User = Depends(get_current_admin)):
+    """What a heatmap client needs before fetching tiles: zoom levels, covered days and location names."""
+    refresh_rollups_if_stale()
+    first, last = heatmap_coverage(db)
+    return {
+        "zooms": {
+            z.name: {"bucket_hours": z.bucket_days * 24 or 1, "tile_days": z.span_days}
+            for z in HEATMAP_ZOOMS.values()
+        },
+        "first_day": first,
+        "last_day": last,
+        "locations": {0: "Unmatched", **{loc.id: loc.name for loc in db.query(Location).all()}},
+    }
+
+
+def _if_none_match(request: Request) -> Set[str]:
+    """Entity tags of If-None-Match, compared weakly (RFC 9110 13.1.2): W/ dropped, "*" kept."""
+    header = request.headers.get("if-none-match", "")
+    return {tag.removeprefix("W/") for tag in re.findall(r'\*|(?:W/)?"[^"]*"', header)}
+
+
+@router.get("/heatmap/{zoom}/{start}")
+def heatmap_tile(
+    zoom: str,
+    start: date,
+    request: Request,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_admin),
+):
+    """
+    One precomputed tile: requests per location and time bucket over the
+    tile containing `start`. Clients revalidate with If-None-Match and get
+    304 while the tile is unchanged.
+    """
+    if zoom not in HEATMAP_ZOOMS:
+        raise HTTPException(404, f"Unknown zoom; available: {', '.join(HEATMAP_ZOOMS)}")
+    refresh_rollups_if_stale()
+    level = HEATMAP_ZOOMS[zoom]
+    etag, body = read_tile(db, level, tile_start(level, start), _if_none_match(request))
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if body is None:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+# ----------------- Archival -----------------
+@router.post("/archive", response_model=dict)
+def run_archival(
+    older_than_days: Optional[int] = Query(None, ge=0),
+    background: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin),
+):
+    """Move cold collections/orders to the archive tables now; returns rows moved."""
+    if background:
+        return _in_background(db, "archive.run", {"older_than_days": older_than_days})
+    return archive_old_rows(db, older_than_days)
+
+
+# ----------------- Dispatch -----------------
+@router.get("/dispatch/plan", response_model=dict)
+def preview_dispatch(db: Session = Depends(get_read_db), current_user: User = Depends(get_current_admin)):
+    """Dry run: the assignment of open requests to collectors that POST /admin/dispatch would make."""
+    return dispatch(db, dry_run=True)
+
+
+@router.post("/dispatch", response_model=dict)
+def run_dispatch(
+    background: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin),
+):
+    """Assign every open request to a collector now (normally periodic via scripts/dispatch.py)."""
+    if background:
+        return _in_background(db, "dispatch.run")
+    return dispatch(db)
+
+
+# ----------------- Forecasts -----------------
+@router.get("/forecast", response_model=ForecastResponse)
+def get_demand_forecast(
+    location: Optional[str] = Query(None, min_length=1),
+    days: int = Query(7, ge=1, le=90),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_admin),
+):
+    """Expected collection requests per day (and hour) from the last forecast run."""
+    return {
+        "location": normalize_location(location) if location else None,
+        "days": get_forecast(db, location, days),
+    }
+
+
+@router.post("/forecast/run", response_model=dict)
+def run_demand_forecast(
+    background: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin),
+):
+    """Refit and store forecasts for every location now (normally nightly via scripts/run_forecasts.py)."""
+    if background:
+        return _in_background(db, "forecast.run")
+    return run_forecasts(db)
+
+
+# ----------------- Profiling -----------------
+def _profile_or_404(request: Request, method: str, path: str):
+    """The profile of the route serving `path`, given as declared or as a concrete URL like start_profiling."""
+    route = find_route(request.app.state.routers, method.upper(), path)
+    profile = profiler.profiles.get((method.upper(), route.path if route else path))
+    if not profile:
+        raise HTTPException(404, "Route is not being profiled")
+    return profile
+
+
+@router.post("/profiling", response_model=dict)
+def start_profiling(
+    request: Request,
+    path: str = Query(..., description="Route path as declared, e.g. /citizens/orders/{order_id}/cancel, or a URL it serves, e.g. /citizens/orders/42/cancel"),
+    method: str = Query("GET"),
+    rate: float = Query(0.1, gt=0, le=1, description="Fraction of matching requests to profile"),
+    max_requests: int = Query(100, ge=1, le=10000),
+    memory: bool = Query(True, description="Also diff tracemalloc snapshots per request"),
+    current_user: User = Depends(get_current_admin),
+):
+    """Start (or restart) sampling a route in this worker process; a concrete URL path finds its route too."""
+    route = find_route(request.app.state.routers, method.upper(), path)
+    if route is None:
+        raise HTTPException(404, "No such route")
+    return profiler.enable(route, method.upper(), rate, max_requests, memory).summary()
+
+
+@router.get("/profiling", response_model=List[dict])
+def list_profiling(current_user: User = Depends(get_current_admin)):
+    return [profile.summary() for profile in profiler.profiles.values()]
+
+
+@router.get("/profiling/flamegraph", response_class=PlainTextResponse)
+def profiling_flamegraph(
+    request: Request,
+    path: str,
+    method: str = "GET",
+    current_user: User = Depends(get_current_admin),
+):
+    """Folded stacks ("a;b;c count" per line) for flamegraph.pl or speedscope."""
+    return _profile_or_404(request, method, path).folded()
+
+
+@router.get("/profiling/allocations", response_model=List[dict])
+def profiling_allocations(
+    request: Request,
+    path: str,
+    method: str = "GET",
+    limit: int = Query(20, ge=1, le=200),
+    current_user: User = Depends(get_current_admin),
+):
+    """Source lines that allocated the most memory across profiled requests."""
+    return _profile_or_404(request, method, path).top_allocations(limit)
+
+
+@router.delete("/profiling", response_model=dict)
+def stop_profiling(
+    request: Request,
+    path: str,
+    method: str = "GET",
+    current_user: User = Depends(get_current_admin),
+):
+    profile = _profile_or_404(request, method, path)
+    profiler.disable(*profile.key)
+    return profile.summary()
+
+
 # ----------------- Top Collectors -----------------
 @router.get("/top-collectors", response_model=List[dict])
-def top_collectors(db: Session = Depends(get_db), current_user: User = Depends(get_current_admin)):
+def top_collectors(db: Session = Depends(get_read_db), current_user: User = Depends(get_current_admin)):
     collectors = db.query(User).filter(User.role == UserRole.collector).all()
     results = []
     for c in collectors:
@@ -306,7 +694,7 @@ def top_collectors(db: Session = Depends(get_db), current_user: User = Depends(g
 
 # ----------------- Users -----------------
 @router.get("/users", response_model=List[UserResponse])
-def list_all_users(db: Session = Depends(get_db)):
+def list_all_users(db: Session = Depends(get_read_db)):
     users = db.query(User).all()
     response = []
     for u in users:
@@ -334,13 +722,17 @@ def create_location(
 ):
     new_loc = Location(name=loc.name, address=loc.address)
     db.add(new_loc)
+    db.flush()
+    index_location(db, new_loc)
+    # Collections that matched no location so far may match this one
+    enqueue(db, "locations.backfill", dedupe_key="locations.backfill")
     db.commit()
     db.refresh(new_loc)
     return new_loc
 
 @router.get("/locations", response_model=List[LocationResponse])
 def list_locations(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_admin)
 ):
     return db.query(Location).all()
@@ -357,6 +749,11 @@ def update_location(
         raise HTTPException(status_code=404, detail="Location not found")
     location.name = loc.name
     location.address = loc.address
+    # The backfill only links NULL rows: detach this location's collections so
+    # those that still match are relinked and the others fall to a better match
+    unlink_location(db, location.id)
+    index_location(db, location)
+    enqueue(db, "locations.backfill", dedupe_key="locations.backfill")
     db.commit()
     db.refresh(location)
     return location
@@ -371,6 +768,36 @@ def delete_location(
     location = db.query(Location).get(loc_id)
     if not location:
         raise HTTPException(status_code=404, detail="Location not found")
+    unlink_location(db, location.id)
+    db.query(LocationTrigram).filter(LocationTrigram.location_id == location.id).delete()
     db.delete(location)
     db.commit()
     return {"detail": "Location deleted successfully"}
+
+
+@router.post("/locations/backfill", response_model=dict)
+def backfill_locations(
+    background: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin),
+):
+    """Link collections without a location_id to the location their text matches; returns rows scanned/matched."""
+    if background:
+        return _in_background(db, "locations.backfill")
+    return backfill_location_ids(db)
+
+
+@router.get("/locations/summary", response_model=List[dict])
+def location_summary(
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_admin),
+):
+    """Collection counts by status for every location (rows not linked yet are not counted)."""
+    locations = db.query(Location).order_by(Location.name).all()
+    counts = {}
+    for location_id, status, n in collections_by_location(db, [loc.id for loc in locations]):
+        counts.setdefault(location_id, {})[status.value] = n
+    return [
+        {"id": loc.id, "name": loc.name, "collections": counts.get(loc.id, {})}
+        for loc in locations
+    ]
@@ -6,6 +6,7 @@ from datetime import timedelta
 from app.schemas.user import UserCreate, UserResponse
 from app.models.user import User
 from app.db.session import get_db
+from app.core.rate_limit import rate_limit
 from app.core.security import get_password_hash, verify_password, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
@@ -22,11 +23,11 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
     db.refresh(new_user)
     return new_user
 
-@router.post("/login")
+@router.post("/login", dependencies=[Depends(rate_limit("login"))])
 def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     user = db.query(User).filter(User.email == form_data.username).first()
     if not user or not verify_password(form_data.password, user.hashed_password):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    token = create_access_token(data={"sub": str(user.id), "role": user.role.value}, expires_delta=access_token_expires)
+    token = create_access_token(data={"sub": str(user.id), "role": user.role.value, "active": user.is_active is not False}, expires_delta=access_token_expires)
     return {"access_token": token, "token_type": "bearer"}
@@ -1,51 +1,129 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Response
+from sqlalchemy import update
 from sqlalchemy.orm import Session
-from typing import List
-from app.db.session import get_db
+from sqlalchemy.orm.attributes import set_committed_value
+from typing import Any, List, Optional
+from app.db.session import get_db, get_read_db
+from app.db.group_commit import commit_write
 from app.core.deps import get_current_user
+from app.core.fieldsets import Fieldset, sparse, sparse_fields
+from app.core.rate_limit import rate_limit
 from app.models.user import User
 from app.models.waste import CollectionStatus, WasteCollection
-from app.models.complaint import Complaint
+from app.models.complaint import Complaint, ComplaintStatus
 from app.schemas.waste import WasteCollectionCreate, WasteCollectionResponse
 from app.schemas.complaint import ComplaintCreate, ComplaintResponse
+from app.schemas.bulk import BulkResult
 from app.schemas.user import UserResponse
 from app.core.security import get_password_hash
-from app.schemas.order import OrderCreate, OrderResponse
-from app.models.order import Order
+from app.schemas.order import CartCheckout, OrderCreate, OrderResponse
+from app.models.order import Order, OrderItem
 from app.models.product import Product
+from app.services.inventory import cancel_order, reserve_cart, reserve_stock
+from app.services.archive import attach_items, attach_products, history
+from app.services.bulk import bulk_insert
+from app.services.dedup import assign_cluster, assign_clusters
+from app.services.locations import resolve_location
+from app.services.sync import SyncToken, changes, respond, updated_since, with_tombstones
 
 router = APIRouter(prefix="/citizens", tags=["Citizens"])
 
 # ---------------- Waste Collections ----------------
-@router.post("/collections", response_model=WasteCollectionResponse)
+@router.post("/collections", response_model=WasteCollectionResponse, dependencies=[Depends(rate_limit("collections", per_user=True))])
 def request_collection(
     data: WasteCollectionCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """Citizen requests a new waste collection"""
-    req = WasteCollection(
-        user_id=current_user.id,
-        location=data.location,
-        status=CollectionStatus.requested,
-    )
-    db.add(req)
-    db.commit()
-    db.refresh(req)
-    return req
+    # Resolved here rather than in `work`, which may run inside a group commit
+    location_id = resolve_location(db, data.location)
+
+    def work(session: Session):
+        req = WasteCollection(
+            user_id=current_user.id,
+            location=data.location,
+            location_id=location_id,
+            status=CollectionStatus.requested,
+        )
+        session.add(req)
+        return req
+
+    return commit_write(db, work)
+
+
+@router.post("/collections/bulk", response_model=BulkResult, dependencies=[Depends(rate_limit("collections", per_user=True))])
+def request_collections_bulk(
+    rows: List[Any] = Body(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Request many collections at once; invalid rows are reported, not fatal"""
+    def build(raw):
+        data = WasteCollectionCreate.model_validate(raw)
+        return {
+            "user_id": current_user.id,
+            "location": data.location,
+            "location_id": resolve_location(db, data.location),
+            "status": CollectionStatus.requested,
+        }
+
+    return bulk_insert(db, WasteCollection, rows, build)
 
 
 @router.get("/collections", response_model=List[WasteCollectionResponse])
 def list_collections(
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    fieldset: Optional[Fieldset] = Depends(sparse_fields(WasteCollectionResponse)),
+    since: Optional[SyncToken] = Depends(updated_since),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Citizen views their own collection requests, newest first (archived ones included).
+    With ?updated_since=, only requests changed since then (withdrawn ones
+    as tombstones with deleted_at), oldest change first.
+    """
+    if since is not None:
+        fieldset = with_tombstones(fieldset)
+        columns = fieldset.columns(WasteCollection) if fieldset else None
+        rows, token = changes(db, WasteCollection, lambda t: t.c.user_id == current_user.id, since, limit, columns)
+    else:
+        token = SyncToken.now()
+        columns = fieldset.columns(WasteCollection) if fieldset else None
+        rows = history(
+            db, WasteCollection, lambda t: (t.c.user_id == current_user.id) & t.c.deleted_at.is_(None),
+            limit, offset, columns,
+        )
+    return respond(fieldset.render(rows) if fieldset else rows, response, token)
+
+
+@router.delete("/collections/{collection_id}", response_model=dict)
+def withdraw_collection(
+    collection_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    """Citizen views their own collection requests"""
-    return (
-        db.query(WasteCollection)
-        .filter(WasteCollection.user_id == current_user.id)
-        .all()
-    )
+    """Withdraw a request no collector has taken yet; it stays as a tombstone for delta sync"""
+    withdrawn = db.execute(
+        update(WasteCollection)
+        .where(
+            WasteCollection.id == collection_id,
+            WasteCollection.user_id == current_user.id,
+            WasteCollection.status == CollectionStatus.requested,
+            WasteCollection.collector_id.is_(None),
+            WasteCollection.deleted_at.is_(None),
+        )
+        .values(deleted_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not withdrawn:
+        raise HTTPException(404, "No open request with this id")
+    db.commit()
+    return {"message": "Request withdrawn"}
 
 # ---------------- Orders ----------------
 @router.post("/orders", response_model=OrderResponse)
@@ -54,49 +132,195 @@ def create_order(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    product = db.query(Product).get(order.product_id)
-    if not product:
-        raise HTTPException(404, "Product not found")
-    total = product.price * order.quantity
-    db_order = Order(
-        product_id=order.product_id,
-        user_id=current_user.id,
-        quantity=order.quantity,
-        total_price=total,
-    )
-    db.add(db_order)
-    db.commit()
-    db.refresh(db_order)
-    return db_order
+    if order.quantity < 1:
+        raise HTTPException(400, "Quantity must be at least 1")
+
+    def work(session: Session):
+        product = session.query(Product).get(order.product_id)
+        if not product:
+            raise HTTPException(404, "Product not found")
+        if not reserve_stock(session, product.id, order.quantity):
+            raise HTTPException(409, "Insufficient stock")
+        session.refresh(product, ["stock"])
+        product.category  # load it for the response while attached
+        db_order = Order(
+            product_id=order.product_id,
+            user_id=current_user.id,
+            quantity=order.quantity,
+            total_price=product.price * order.quantity,
+        )
+        session.add(db_order)
+        # Not `db_order.product = product`: the backref would load every order of the product
+        set_committed_value(db_order, "product", product)
+        set_committed_value(db_order, "items", [])
+        return db_order
+
+    return commit_write(db, work)
+
+
+@router.post("/orders/checkout", response_model=OrderResponse)
+def checkout_cart(
+    cart: CartCheckout,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Order several products at once: one order (paid with one payment), one
+    item per product, stock reserved for all of them or none.
+    """
+    quantities = {}
+    for line in cart.items:
+        if line.quantity < 1:
+            raise HTTPException(400, "Quantity must be at least 1")
+        quantities[line.product_id] = quantities.get(line.product_id, 0) + line.quantity
+    if not quantities:
+        raise HTTPException(400, "Cart is empty")
+
+    def work(session: Session):
+        products, reserved = reserve_cart(session, quantities)
+        missing = quantities.keys() - products.keys()
+        if missing:
+            raise HTTPException(404, f"Product(s) not found: {', '.join(map(str, sorted(missing)))}")
+        if not reserved:
+            # Raising rolls back the lines that were reserved
+            raise HTTPException(409, "Insufficient stock")
+        items = [
+            OrderItem(product_id=product_id, quantity=quantity, unit_price=products[product_id].price)
+            for product_id, quantity in quantities.items()
+        ]
+        db_order = Order(
+            user_id=current_user.id,
+            quantity=sum(quantities.values()),
+            total_price=sum(item.unit_price * item.quantity for item in items),
+            items=items,
+        )
+        session.add(db_order)
+        for item in items:
+            set_committed_value(item, "product", products[item.product_id])
+        return db_order
+
+    return commit_write(db, work)
 
 
 @router.get("/orders", response_model=List[OrderResponse])
 def list_orders(
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    fieldset: Optional[Fieldset] = Depends(sparse_fields(OrderResponse)),
+    since: Optional[SyncToken] = Depends(updated_since),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Newest first; with ?updated_since=, only orders changed since then, oldest change first."""
+    columns = fieldset.columns(Order) if fieldset else None
+    if since is not None:
+        orders, token = changes(db, Order, lambda t: t.c.user_id == current_user.id, since, limit, columns)
+    else:
+        token = SyncToken.now()
+        orders = history(db, Order, lambda t: t.c.user_id == current_user.id, limit, offset, columns)
+    if fieldset is None:
+        return respond(attach_items(db, attach_products(db, orders)), response, token)
+    if "product" in fieldset.names:
+        attach_products(db, orders)
+    if "items" in fieldset.names:
+        attach_items(db, orders)
+    return respond(fieldset.render(orders), response, token)
+
+
+@router.put("/orders/{order_id}/cancel", response_model=OrderResponse)
+def cancel_own_order(
+    order_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    return db.query(Order).filter(Order.user_id == current_user.id).join(Order.product).all()
+    """Citizen cancels a pending order; its stock reservation is released"""
+    order = db.query(Order).get(order_id)
+    if not order or order.user_id != current_user.id:
+        raise HTTPException(404, "Order not found")
+    if not cancel_order(db, order):
+        raise HTTPException(400, "Only pending orders can be cancelled")
+    db.commit()
+    db.refresh(order)
+    return order
 
 # ---------------- Complaints ----------------
-@router.post("/complaints", response_model=ComplaintResponse)
+@router.post("/complaints", response_model=ComplaintResponse, dependencies=[Depends(rate_limit("complaints", per_user=True))])
 def create_complaint(
     data: ComplaintCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    complaint = Complaint(user_id=current_user.id, description=data.description)
-    db.add(complaint)
-    db.commit()
-    db.refresh(complaint)
-    return complaint
+    def work(session: Session):
+        complaint = Complaint(user_id=current_user.id, description=data.description)
+        session.add(complaint)
+        session.flush()
+        assign_cluster(session, complaint)
+        return complaint
+
+    return commit_write(db, work)
+
+
+@router.post("/complaints/bulk", response_model=BulkResult, dependencies=[Depends(rate_limit("complaints", per_user=True))])
+def create_complaints_bulk(
+    rows: List[Any] = Body(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    def build(raw):
+        data = ComplaintCreate.model_validate(raw)
+        return {"user_id": current_user.id, "description": data.description}
+
+    inserted: List[int] = []
+    result = bulk_insert(db, Complaint, rows, build, inserted_ids=inserted)
+    assign_clusters(db, inserted)  # only this import's rows, not other users' backlog
+    return result
 
 
 @router.get("/complaints", response_model=List[ComplaintResponse])
 def list_complaints(
+    response: Response,
+    limit: int = Query(1000, ge=1, le=1000, description="Page size of ?updated_since= responses"),
+    fieldset: Optional[Fieldset] = Depends(sparse_fields(ComplaintResponse)),
+    since: Optional[SyncToken] = Depends(updated_since),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Citizen's complaints; with ?updated_since=, only those changed since then
+    (withdrawn ones as tombstones with deleted_at), oldest change first.
+    """
+    if since is not None:
+        fieldset = with_tombstones(fieldset)
+        columns = fieldset.columns(Complaint) if fieldset else None
+        rows, token = changes(db, Complaint, lambda t: t.c.user_id == current_user.id, since, limit, columns)
+        return respond(fieldset.render(rows) if fieldset else rows, response, token)
+    query = db.query(Complaint).filter(Complaint.user_id == current_user.id, Complaint.deleted_at.is_(None))
+    return respond(sparse(query, Complaint, fieldset), response, SyncToken.now())
+
+
+@router.delete("/complaints/{complaint_id}", response_model=dict)
+def withdraw_complaint(
+    complaint_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    return db.query(Complaint).filter(Complaint.user_id == current_user.id).all()
+    """Withdraw an open complaint; it stays as a tombstone for delta sync"""
+    withdrawn = db.execute(
+        update(Complaint)
+        .where(
+            Complaint.id == complaint_id,
+            Complaint.user_id == current_user.id,
+            Complaint.status == ComplaintStatus.open,
+            Complaint.deleted_at.is_(None),
+        )
+        .values(deleted_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not withdrawn:
+        raise HTTPException(404, "No open complaint with this id")
+    db.commit()
+    return {"message": "Complaint withdrawn"}
 
 # ---------------- Profile ----------------
 @router.get("/profile", response_model=UserResponse)
@@ -1,24 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import update
 from sqlalchemy.orm import Session
-from typing import List
-from app.db.session import get_db
+from typing import List, Optional
+from app.db.session import get_db, get_read_db
 from app.core.deps import get_current_collector
+from app.core.fieldsets import Fieldset, sparse, sparse_fields
 from app.models.user import User
 from app.models.waste import WasteCollection, CollectionStatus
 from app.schemas.waste import WasteCollectionResponse
+from app.services.archive import history
+from app.services.sync import SyncToken, changes, respond, updated_since
 
 router = APIRouter(prefix="/collectors", tags=["Collectors"])
 
 # View all collection requests
 @router.get("/requests", response_model=List[WasteCollectionResponse])
 def list_requests(
-    db: Session = Depends(get_db),
+    fieldset: Optional[Fieldset] = Depends(sparse_fields(WasteCollectionResponse)),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_collector),
 ):
     """
     Collectors see all collection requests, regardless of status or assignment.
     """
-    return db.query(WasteCollection).all()
+    return sparse(db.query(WasteCollection).filter(WasteCollection.deleted_at.is_(None)), WasteCollection, fieldset)
 
 # Accept a request
 @router.put("/requests/{req_id}/accept", response_model=WasteCollectionResponse)
@@ -27,14 +33,24 @@ def accept_request(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_collector),
 ):
+    # One conditional UPDATE: a citizen withdrawing the request concurrently
+    # either lands first (nothing is accepted) or finds it taken
+    accepted = db.execute(
+        update(WasteCollection)
+        .where(
+            WasteCollection.id == req_id,
+            WasteCollection.deleted_at.is_(None),
+            WasteCollection.status != CollectionStatus.completed,
+        )
+        .values(collector_id=current_user.id, status=CollectionStatus.in_progress)
+        .execution_options(synchronize_session=False)
+    ).rowcount
     req = db.query(WasteCollection).filter(WasteCollection.id == req_id).first()
-    if not req:
-        raise HTTPException(404, "Request not found")
-    if req.status == CollectionStatus.completed:
+    if not accepted:
+        db.rollback()
+        if not req or req.deleted_at is not None:
+            raise HTTPException(404, "Request not found")
         raise HTTPException(400, "Cannot accept a completed request")
-
-    req.collector_id = current_user.id
-    req.status = CollectionStatus.in_progress
     db.commit()
     db.refresh(req)
     return req
@@ -55,6 +71,7 @@ def complete_request(
         raise HTTPException(400, "Request is not in progress")
 
     req.status = CollectionStatus.completed
+    req.completed_at = datetime.utcnow()
     db.commit()
     db.refresh(req)
     return req
@@ -62,7 +79,22 @@ def complete_request(
 # View collector's history
 @router.get("/history", response_model=List[WasteCollectionResponse])
 def collection_history(
-    db: Session = Depends(get_db),
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    fieldset: Optional[Fieldset] = Depends(sparse_fields(WasteCollectionResponse)),
+    since: Optional[SyncToken] = Depends(updated_since),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_collector),
 ):
-    return db.query(WasteCollection).filter(WasteCollection.collector_id == current_user.id).all()
+    """
+    Newest first, archived collections included. With ?updated_since=, only
+    collections changed since then, oldest change first.
+    """
+    columns = fieldset.columns(WasteCollection) if fieldset else None
+    if since is not None:
+        rows, token = changes(db, WasteCollection, lambda t: t.c.collector_id == current_user.id, since, limit, columns)
+    else:
+        token = SyncToken.now()
+        rows = history(db, WasteCollection, lambda t: t.c.collector_id == current_user.id, limit, offset, columns)
+    return respond(fieldset.render(rows) if fieldset else rows, response, token)
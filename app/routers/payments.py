@@ -1,9 +1,11 @@
 # app/routers/payments.py
+from functools import lru_cache
+from typing import Tuple
 from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
-import requests
+from app.core.circuit import GUARDS, Bulkhead, CircuitBreaker, Unavailable, guarded
 from app.core.config import settings
-from app.models.order import Order, OrderStatus
+from app.models.order import Order
 from app.models.payment import Payment, PaymentStatus
 from app.models.user import User
 from app.schemas.payment import (
@@ -13,11 +15,66 @@ from app.schemas.payment import (
 )
 from app.db.session import get_db
 from app.core.deps import get_current_user
+from app.core.jobs import enqueue
+from app.core.rate_limit import rate_limit
 
 router = APIRouter(prefix="/payments", tags=["Payments"])
 
+
+class MonetbilError(Exception):
+    """Monetbil answered with a server error: counts against the breaker."""
+
+
+@lru_cache
+def monetbil_guard() -> Tuple[CircuitBreaker, Bulkhead]:
+    guard = (
+        CircuitBreaker(
+            "Monetbil",
+            window_seconds=settings.MONETBIL_BREAKER_WINDOW_SECONDS,
+            min_calls=settings.MONETBIL_BREAKER_MIN_CALLS,
+            failure_rate=settings.MONETBIL_BREAKER_FAILURE_RATE,
+            open_seconds=settings.MONETBIL_BREAKER_OPEN_SECONDS,
+            probes=settings.MONETBIL_BREAKER_PROBES,
+            slow_call_seconds=settings.MONETBIL_SLOW_CALL_SECONDS,
+        ),
+        Bulkhead("Monetbil", settings.MONETBIL_CONCURRENCY, settings.MONETBIL_QUEUE_SECONDS),
+    )
+    GUARDS["monetbil"] = guard
+    return guard
+
+
+def post_to_monetbil(payload: dict) -> dict:
+    if not (settings.MONETBIL_SERVICE_KEY and settings.MONETBIL_SECRET_KEY):
+        raise HTTPException(503, "Payments are not configured")
+
+    import requests  # only payment calls pay for importing it
+
+    full_url = f"{settings.MONETBIL_API_URL}/{settings.MONETBIL_SERVICE_KEY}"
+    try:
+        # A degraded Monetbil may hold at most MONETBIL_CONCURRENCY request
+        # threads; everything past that, or while the breaker is open, fails fast
+        with guarded(*monetbil_guard()):
+            resp = requests.post(
+                full_url,
+                json=payload,
+                auth=(settings.MONETBIL_SERVICE_KEY, settings.MONETBIL_SECRET_KEY),
+                timeout=settings.MONETBIL_TIMEOUT_SECONDS
+            )
+            if resp.status_code >= 500:
+                raise MonetbilError(f"Monetbil answered {resp.status_code}")
+        return resp.json()
+    except Unavailable as e:
+        raise HTTPException(
+            503,
+            f"Payments are temporarily unavailable ({e}), please retry shortly",
+            headers={"Retry-After": str(max(1, round(e.retry_after)))},
+        )
+    except Exception as e:
+        raise HTTPException(500, f"Payment request failed: {e}")
+
+
 # -------------------- Full Monetbil Payment --------------------
-@router.post("/monetbil", response_model=MonetbilPaymentResponse)
+@router.post("/monetbil", response_model=MonetbilPaymentResponse, dependencies=[Depends(rate_limit("payments", per_user=True))])
 def make_payment(
     request: MonetbilPaymentCreate,
     db: Session = Depends(get_db),
@@ -46,20 +103,7 @@ def make_payment(
         "logo": "https://yourwebsite.com/logo.png"
     }
 
-    full_url = f"{settings.MONETBIL_API_URL}/{settings.MONETBIL_SERVICE_KEY}"
-
-    try:
-        resp = requests.post(
-            full_url,
-            json=payload,
-            auth=(settings.MONETBIL_SERVICE_KEY, settings.MONETBIL_SECRET_KEY),
-            timeout=30
-        )
-        print("Monetbil status code:", resp.status_code)
-        print("Monetbil response text:", resp.text)
-        response = resp.json()
-    except Exception as e:
-        raise HTTPException(500, f"Payment request failed: {e}")
+    response = post_to_monetbil(payload)
 
     if not response.get("success"):
         raise HTTPException(400, f"Monetbil rejected payment: {response.get('message')}")
@@ -91,7 +135,7 @@ def make_payment(
 
 
 # -------------------- Quick Monetbil Payment --------------------
-@router.post("/monetbil/quick", response_model=MonetbilPaymentResponse)
+@router.post("/monetbil/quick", response_model=MonetbilPaymentResponse, dependencies=[Depends(rate_limit("payments", per_user=True))])
 def make_quick_payment(
     request: MonetbilQuickPaymentRequest,
     db: Session = Depends(get_db),
@@ -120,20 +164,7 @@ def make_quick_payment(
         "logo": "https://yourwebsite.com/logo.png"
     }
 
-    full_url = f"{settings.MONETBIL_API_URL}/{settings.MONETBIL_SERVICE_KEY}"
-
-    try:
-        resp = requests.post(
-            full_url,
-            json=payload,
-            auth=(settings.MONETBIL_SERVICE_KEY, settings.MONETBIL_SECRET_KEY),
-            timeout=30
-        )
-        print("Monetbil status:", resp.status_code)
-        print("Monetbil response:", resp.text)
-        response = resp.json()
-    except Exception as e:
-        raise HTTPException(500, f"Payment request failed: {e}")
+    response = post_to_monetbil(payload)
 
     if not response.get("success"):
         raise HTTPException(400, f"Monetbil rejected payment: {response.get('message')}")
@@ -177,18 +208,17 @@ async def monetbil_webhook(request: Request, db: Session = Depends(get_db)):
 
     payment_ref = data.get("payment_ref")
     status = data.get("status")  # "success" or "failed"
-
-    payment = db.query(Payment).filter(Payment.reference == payment_ref).first()
-    if not payment:
+    if not payment_ref:
         return {"message": "Payment not found"}
 
-    if status == "success":
-        payment.status = PaymentStatus.success
-        order = db.query(Order).get(payment.order_id)
-        if order:
-            order.status = OrderStatus.delivered
-    elif status == "failed":
-        payment.status = PaymentStatus.failed
-
+    # Acknowledge now; the worker applies it (and retries while the payment
+    # row is not visible yet). Monetbil re-sends are deduplicated while queued.
+    enqueue(
+        db,
+        "payments.webhook",
+        {"payment_ref": payment_ref, "status": status},
+        priority=10,
+        dedupe_key=f"monetbil:{payment_ref}:{status}",
+    )
     db.commit()
-    return {"message": "Webhook processed"}
+    return {"message": "Webhook received"}
@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends, Form, File, UploadFile
+from fastapi import APIRouter, Depends, Form, File, UploadFile, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.schemas.product import ProductResponse, CategoryCreate, CategoryResponse
 from app.models.product import Product, Category
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
+from app.core.fieldsets import Fieldset, sparse, sparse_fields
+from app.services.search import search_products
 import shutil
 import os
 import uuid
@@ -11,7 +13,6 @@ import uuid
 router = APIRouter(prefix="/products", tags=["Products"])
 
 UPLOAD_DIR = "uploads/products"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 
 @router.post("/categories", response_model=CategoryResponse)
@@ -24,7 +25,7 @@ def create_category(category: CategoryCreate, db: Session = Depends(get_db)):
 
 
 @router.get("/categories", response_model=List[CategoryResponse])
-def list_categories(db: Session = Depends(get_db)):
+def list_categories(db: Session = Depends(get_read_db)):
     return db.query(Category).all()
 
 
@@ -43,6 +44,7 @@ def create_product(
     if image:
         ext = image.filename.split(".")[-1]
         filename = f"{uuid.uuid4()}.{ext}"
+        os.makedirs(UPLOAD_DIR, exist_ok=True)
         file_path = os.path.join(UPLOAD_DIR, filename)
         with open(file_path, "wb") as buffer:
             shutil.copyfileobj(image.file, buffer)
@@ -64,5 +66,30 @@ def create_product(
 
 
 @router.get("/", response_model=List[ProductResponse])
-def list_products(db: Session = Depends(get_db)):
-    return db.query(Product).all()
+def list_products(
+    fieldset: Optional[Fieldset] = Depends(sparse_fields(ProductResponse)),
+    db: Session = Depends(get_read_db),
+):
+    return sparse(db.query(Product), Product, fieldset)
+
+
+@router.get("/search", response_model=List[ProductResponse])
+def search(
+    q: str = Query(..., min_length=1, description="Words to look for; prefixes match"),
+    category_id: Optional[int] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    in_stock: bool = False,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_read_db)
+):
+    return search_products(
+        db, q,
+        category_id=category_id,
+        min_price=min_price,
+        max_price=max_price,
+        in_stock=in_stock,
+        limit=limit,
+        offset=offset,
+    )
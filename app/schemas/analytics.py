@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+from datetime import date
+from typing import Dict, List, Optional
+
+class AnalyticsBucket(BaseModel):
+    period: date                            # first day of the day/week/month/year
+    collections: Dict[str, int]             # requests created, by current status
+    completed: int                          # collections completed in the period
+    mean_completion_hours: Optional[float]  # request -> completion, for those
+    orders: Dict[str, int]
+    revenue: float                          # successful payments
+    payments: Dict[str, int]
+    complaints: Dict[str, int]
+
+class AnalyticsResponse(BaseModel):
+    start: date
+    end: date
+    granularity: str
+    buckets: List[AnalyticsBucket]
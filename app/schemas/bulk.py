@@ -0,0 +1,11 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+class BulkRowError(BaseModel):
+    row: int        # 0-based position in the submitted batch / file
+    error: str
+
+class BulkResult(BaseModel):
+    inserted: int = 0
+    failed: int = 0
+    errors: List[BulkRowError] = Field(default_factory=list)
@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from typing import List, Optional
 from enum import Enum
 from datetime import datetime
 
@@ -17,5 +18,15 @@ class ComplaintResponse(ComplaintBase):
     id: int
     status: ComplaintStatus
     created_at: datetime
+    updated_at: Optional[datetime] = None
+    deleted_at: Optional[datetime] = None   # set on tombstones in ?updated_since= responses
     class Config:
         from_attributes = True
+
+class ComplaintCluster(BaseModel):
+    cluster_id: int
+    count: int
+    first_reported: datetime
+    last_reported: datetime
+    sample: str                 # description of the earliest open complaint
+    complaint_ids: List[int]
@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List, Optional
+
+class EventResponse(BaseModel):
+    seq: int
+    entity: str
+    entity_id: int
+    user_id: Optional[int]
+    old_status: Optional[str]
+    new_status: Optional[str]
+    occurred_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class EventPage(BaseModel):
+    events: List[EventResponse]
+    next_after: int     # pass as ?after= to fetch the following page
@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+from datetime import date
+from typing import List, Optional
+
+class ForecastDay(BaseModel):
+    day: date
+    expected: float         # collection requests expected that day
+    hourly: List[float]     # expected split by hour of day (24 values, UTC)
+
+class ForecastResponse(BaseModel):
+    location: Optional[str]  # normalized; None = all locations combined
+    days: List[ForecastDay]
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel
 from enum import Enum
 from datetime import datetime
@@ -16,12 +16,29 @@ class OrderBase(BaseModel):
 class OrderCreate(OrderBase):
     pass
 
+class CartItem(OrderBase):
+    pass
+
+class CartCheckout(BaseModel):
+    items: List[CartItem]
+
+class OrderItemResponse(BaseModel):
+    product_id: int
+    quantity: int
+    unit_price: float
+    product: Optional[ProductResponse] = None
+    class Config:
+        from_attributes = True
+
 class OrderResponse(OrderBase):
     id: int
+    product_id: Optional[int] = None  # None for cart orders, see `items`
     total_price: float
     status: OrderStatus
     created_at: datetime
+    updated_at: Optional[datetime] = None
     product: Optional[ProductResponse]
+    items: List[OrderItemResponse] = []
     class Config:
         from_attributes = True
 
@@ -19,5 +19,9 @@ class WasteCollectionResponse(WasteCollectionBase):
     status: CollectionStatus
     created_at: datetime
     collector_id: Optional[int]
+    location_id: Optional[int] = None
+    completed_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    deleted_at: Optional[datetime] = None   # set on tombstones in ?updated_since= responses
     class Config:
         from_attributes = True
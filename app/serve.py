@@ -0,0 +1,37 @@
+"""
+Multi-process server entry point.
+
+    python -m app.serve --workers 4 --port 8000
+
+Each worker is a separate process with its own engine (created on first use
+after the process starts). With SQLite, set DB_SINGLE_WRITER=true so writes
+from all workers queue on one lock instead of failing with "database is
+locked"; reads run in parallel under WAL.
+
+Each worker also runs JOB_EMBEDDED_WORKERS background job threads (see
+app/worker.py); with JOB_EMBEDDED_WORKERS=0, run `python -m app.worker`
+alongside or queued jobs such as payment webhooks are never applied.
+"""
+import argparse
+import os
+
+import uvicorn
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the API with several worker processes")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--single-writer", action="store_true",
+                        help="serialize SQLite writes across workers (sets DB_SINGLE_WRITER)")
+    args = parser.parse_args()
+
+    if args.single_writer:
+        os.environ["DB_SINGLE_WRITER"] = "true"  # inherited by the workers
+
+    uvicorn.run("app.main:app", host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
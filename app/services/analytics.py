@@ -0,0 +1,237 @@
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import Table, delete, distinct, func, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal, get_engine
+from app.models.analytics import DailyRollup, RollupWatermark
+from app.models.archive import ARCHIVES
+from app.models.complaint import Complaint
+from app.models.order import Order
+from app.models.payment import Payment
+from app.models.waste import WasteCollection
+
+# Rows committed by transactions that were still open when a refresh started
+# can carry an updated_at slightly before its watermark; re-scanning this
+# much history each time catches them (recomputing a day is idempotent).
+OVERLAP = timedelta(minutes=5)
+
+# Changed days at most this far apart are recomputed in one range scan
+MAX_GAP_DAYS = 7
+
+GRANULARITIES = ("day", "week", "month", "year")
+
+
+@dataclass
+class _Metric:
+    name: str
+    model: type
+    day_column: str
+    # (session, table) -> expression summed into DailyRollup.total
+    total: Callable[[Session, Table], object] = lambda db, t: 0.0
+
+    @property
+    def tables(self) -> List[Table]:
+        """The hot table plus its archive: archived rows still count."""
+        hot = self.model.__table__
+        return [hot, ARCHIVES[hot]] if hot in ARCHIVES else [hot]
+
+
+def _seconds_to_complete(db: Session, t: Table):
+    start, end = t.c.created_at, t.c.completed_at
+    if db.get_bind().dialect.name == "sqlite":
+        return (func.julianday(end) - func.julianday(start)) * 86400.0
+    return func.extract("epoch", end - start)
+
+
+METRICS = [
+    _Metric("collections", WasteCollection, "created_at"),
+    _Metric("completions", WasteCollection, "completed_at", _seconds_to_complete),
+    _Metric("orders", Order, "created_at", lambda db, t: t.c.total_price),
+    _Metric("payments", Payment, "created_at", lambda db, t: t.c.amount),
+    _Metric("complaints", Complaint, "created_at"),
+]
+
+
+def _as_date(value) -> date:
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+
+def _status(value) -> str:
+    return getattr(value, "value", value)
+
+
+def _recompute(db: Session, metric: _Metric, first: Optional[date] = None, last: Optional[date] = None) -> None:
+    """Rebuild the rollup rows of `metric` for days first..last, or all days if not given."""
+    wipe = delete(DailyRollup).where(DailyRollup.metric == metric.name)
+    if first is not None:
+        wipe = wipe.where(DailyRollup.day >= first, DailyRollup.day <= last)
+    sums: Dict[tuple, list] = defaultdict(lambda: [0, 0.0])
+    for table in metric.tables:
+        col = table.c[metric.day_column]
+        day = func.date(col)
+        query = (
+            select(day, table.c.status, func.count(), func.coalesce(func.sum(metric.total(db, table)), 0.0))
+            .where(col.isnot(None))
+            .group_by(day, table.c.status)
+        )
+        if "deleted_at" in table.c:
+            # Requests withdrawn by the citizen never happened for the trends
+            query = query.where(table.c.deleted_at.is_(None))
+        if first is not None:
+            # Range predicate rather than date(col) = ?, so the index is used
+            lo = datetime.combine(first, datetime.min.time())
+            hi = datetime.combine(last, datetime.min.time()) + timedelta(days=1)
+            query = query.where(col >= lo, col < hi)
+        for d, status, count, total in db.execute(query):
+            acc = sums[(_as_date(d), _status(status))]
+            acc[0] += count
+            acc[1] += float(total)
+    db.execute(wipe)
+    if sums:
+        db.execute(insert(DailyRollup), [
+            {"metric": metric.name, "day": d, "status": s, "count": n, "total": t}
+            for (d, s), (n, t) in sums.items()
+        ])
+
+
+def _day_ranges(days: List[date]):
+    """Merge days into (first, last) spans; close days share one grouped scan."""
+    spans = []
+    for day in sorted(days):
+        if spans and (day - spans[-1][1]).days <= MAX_GAP_DAYS:
+            spans[-1][1] = day
+        else:
+            spans.append([day, day])
+    return spans
+
+
+def refresh_metric(db: Session, metric: _Metric) -> int:
+    """
+    Bring one metric's rollups up to date and return the number of days
+    touched by source changes (-1 for a full rebuild). Only days that own a
+    source row updated since the watermark are recomputed.
+    """
+    started = datetime.utcnow()
+    mark = db.get(RollupWatermark, metric.name)
+    if mark is None:
+        _recompute(db, metric)
+        db.add(RollupWatermark(metric=metric.name, value=started))
+        db.commit()
+        return -1
+
+    col = getattr(metric.model, metric.day_column)
+    days = [
+        _as_date(d)
+        for (d,) in db.query(distinct(func.date(col)))
+        .filter(metric.model.updated_at >= mark.value - OVERLAP, col.isnot(None))
+        .all()
+    ]
+    for first, last in _day_ranges(days):
+        _recompute(db, metric, first, last)
+    mark.value = started
+    db.commit()
+    return len(days)
+
+
+def refresh_rollups(db: Session) -> Dict[str, int]:
+    from app.services.heatmap import refresh_heatmap  # builds on this module
+
+    result = {}
+    refreshers = [(metric.name, lambda metric=metric: refresh_metric(db, metric)) for metric in METRICS]
+    refreshers.append(("heatmap", lambda: refresh_heatmap(db)))
+    for name, refresh in refreshers:
+        try:
+            result[name] = refresh()
+        except IntegrityError:
+            # Another worker refreshed the same days concurrently
+            db.rollback()
+            result[name] = 0
+    return result
+
+
+_last_refresh = 0.0
+_refresh_lock = threading.Lock()
+
+
+def _refresh_in_background() -> None:
+    global _last_refresh
+    try:
+        get_engine()
+        with SessionLocal() as db:
+            refresh_rollups(db)
+        _last_refresh = time.monotonic()
+    finally:
+        _refresh_lock.release()
+
+
+def refresh_rollups_if_stale() -> None:
+    """
+    Start an incremental refresh on the primary if this process hasn't run
+    one for ANALYTICS_REFRESH_SECONDS. Runs in a background thread so the
+    request reading the rollups never waits for it.
+    """
+    if time.monotonic() - _last_refresh < settings.ANALYTICS_REFRESH_SECONDS:
+        return
+    if not _refresh_lock.acquire(blocking=False):
+        return  # already refreshing
+    threading.Thread(target=_refresh_in_background, name="rollup-refresh", daemon=True).start()
+
+
+def _period(day: date, granularity: str) -> date:
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    if granularity == "year":
+        return day.replace(month=1, day=1)
+    return day
+
+
+def _empty_bucket(period: date) -> dict:
+    return {
+        "period": period,
+        "collections": {},
+        "completed": 0,
+        "mean_completion_hours": None,
+        "orders": {},
+        "revenue": 0.0,
+        "payments": {},
+        "complaints": {},
+    }
+
+
+def analytics(db: Session, start: date, end: date, granularity: str = "day") -> List[dict]:
+    """Trend buckets between `start` and `end` (inclusive), read from the rollups only."""
+    rows = (
+        db.query(DailyRollup.metric, DailyRollup.day, DailyRollup.status, DailyRollup.count, DailyRollup.total)
+        .filter(DailyRollup.day >= start, DailyRollup.day <= end)
+        .all()
+    )
+    buckets: Dict[date, dict] = {}
+    completion_seconds: Dict[date, float] = defaultdict(float)
+    for metric, day, status, count, total in rows:
+        period = _period(_as_date(day), granularity)
+        bucket = buckets.get(period)
+        if bucket is None:
+            bucket = buckets[period] = _empty_bucket(period)
+        if metric == "completions":
+            bucket["completed"] += count
+            completion_seconds[period] += total
+        else:
+            by_status = bucket[metric]
+            by_status[status] = by_status.get(status, 0) + count
+            if metric == "payments" and status == "success":
+                bucket["revenue"] += total
+
+    for period, bucket in buckets.items():
+        if bucket["completed"]:
+            bucket["mean_completion_hours"] = completion_seconds[period] / bucket["completed"] / 3600
+    return [buckets[p] for p in sorted(buckets)]
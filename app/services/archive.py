@@ -0,0 +1,165 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import Table, and_, delete, func, insert, literal, or_, select, union_all
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.core.config import settings
+from app.models.archive import ARCHIVES
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.payment import Payment
+from app.models.product import Product
+from app.models.waste import CollectionStatus, WasteCollection
+
+# ---------------- Moving cold rows ----------------
+
+
+def _move(db: Session, source: Table, ids: List[int]) -> None:
+    archive = ARCHIVES[source]
+    columns = [c.name for c in source.columns]
+    db.execute(
+        insert(archive).from_select(
+            columns, select(*(source.c[name] for name in columns)).where(source.c.id.in_(ids))
+        )
+    )
+    db.execute(delete(source).where(source.c.id.in_(ids)))
+
+
+def _archive_batches(db: Session, source: Table, condition, batch_size: int, children: Sequence = ()) -> int:
+    moved = 0
+    while True:
+        ids = db.execute(
+            select(source.c.id).where(condition).order_by(source.c.id).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            return moved
+        for child, parent_id in children:
+            # Rows referencing the batch (payments, cart items) travel with it
+            child_ids = db.execute(select(child.c.id).where(parent_id.in_(ids))).scalars().all()
+            if child_ids:
+                _move(db, child, child_ids)
+        _move(db, source, ids)
+        # One short transaction per batch keeps writers (and the WAL) moving
+        db.commit()
+        moved += len(ids)
+
+
+def archive_old_rows(
+    db: Session,
+    older_than_days: Optional[int] = None,
+    batch_size: Optional[int] = None,
+) -> Dict[str, int]:
+    """
+    Move completed or withdrawn collections and delivered/cancelled orders
+    (with their payments and items) untouched for `older_than_days` into the
+    *_archive tables.
+    """
+    days = settings.ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    cutoff = datetime.utcnow() - timedelta(days=days)
+
+    collections = _archive_batches(
+        db,
+        WasteCollection.__table__,
+        and_(
+            or_(WasteCollection.status == CollectionStatus.completed, WasteCollection.deleted_at.isnot(None)),
+            func.coalesce(WasteCollection.updated_at, WasteCollection.created_at) < cutoff,
+        ),
+        batch_size,
+    )
+    orders = _archive_batches(
+        db,
+        Order.__table__,
+        and_(
+            Order.status.in_([OrderStatus.delivered, OrderStatus.cancelled]),
+            func.coalesce(Order.updated_at, Order.created_at) < cutoff,
+        ),
+        batch_size,
+        children=[
+            (Payment.__table__, Payment.order_id),
+            (OrderItem.__table__, OrderItem.order_id),
+        ],
+    )
+    return {"collections": collections, "orders": orders}
+
+
+# ---------------- Reading hot + cold ----------------
+
+
+def history(db: Session, model, condition, limit: int, offset: int, columns: Optional[List[str]] = None) -> list:
+    """
+    One page of `model` rows matching `condition`, newest first, drawn from
+    the hot table and its archive as if they were one table.
+
+    `condition(table)` builds the filter for either table; `columns`
+    (e.g. Fieldset.columns) limits what is loaded. Returns model instances;
+    archived rows come back as transient (unsaved) objects.
+    """
+    hot = model.__table__
+    cold = ARCHIVES[hot]
+    page = union_all(
+        select(hot.c.id, hot.c.created_at, literal(False).label("archived")).where(condition(hot)),
+        select(cold.c.id, cold.c.created_at, literal(True).label("archived")).where(condition(cold)),
+    ).subquery()
+    keys = db.execute(
+        select(page.c.id, page.c.archived)
+        .order_by(page.c.created_at.desc(), page.c.id.desc())
+        .limit(limit)
+        .offset(offset)
+    ).all()
+    return hydrate(db, model, keys, columns)
+
+
+def hydrate(db: Session, model, keys: list, columns: Optional[List[str]] = None) -> list:
+    """
+    Load `model` rows for (id, archived) pairs, in the order given; archived
+    rows come back as transient (unsaved) objects.
+    """
+    hot = model.__table__
+    hot_ids = [id_ for id_, archived in keys if not archived]
+    cold_ids = [id_ for id_, archived in keys if archived]
+    found = {}
+    if hot_ids:
+        query = db.query(model).filter(model.id.in_(hot_ids))
+        if columns:
+            query = query.options(load_only(*(getattr(model, name) for name in columns)))
+        found.update(((False, obj.id), obj) for obj in query)
+    if cold_ids:
+        cold = ARCHIVES[hot]
+        selected = [cold.c[name] for name in columns] if columns else [cold]
+        for row in db.execute(select(*selected).where(cold.c.id.in_(cold_ids))).mappings():
+            found[(True, row["id"])] = model(**row)
+    return [found[(bool(archived), id_)] for id_, archived in keys if (bool(archived), id_) in found]
+
+
+def attach_products(db: Session, orders: list) -> list:
+    """
+    Load the products of `orders` (or order items) in one query (archived
+    orders have no session to lazy-load from).
+    """
+    ids = {o.product_id for o in orders if o.product_id is not None}
+    products = {p.id: p for p in db.query(Product).filter(Product.id.in_(ids))} if ids else {}
+    for order in orders:
+        set_committed_value(order, "product", products.get(order.product_id))
+    return orders
+
+
+def attach_items(db: Session, orders: list) -> list:
+    """Load the cart items of `orders`, hot and archived, in one query, with their products."""
+    hot = OrderItem.__table__
+    cold = ARCHIVES[hot]
+    ids = [o.id for o in orders]
+    by_order = defaultdict(list)
+    if ids:
+        rows = db.execute(
+            union_all(select(hot).where(hot.c.order_id.in_(ids)), select(cold).where(cold.c.order_id.in_(ids)))
+        ).mappings()
+        items = [OrderItem(**row) for row in rows]
+        attach_products(db, items)
+        for item in sorted(items, key=lambda i: i.id):
+            by_order[item.order_id].append(item)
+    for order in orders:
+        set_committed_value(order, "items", by_order.get(order.id, []))
+    return orders
@@ -0,0 +1,185 @@
+import csv
+import io
+import json
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.schemas.bulk import BulkResult, BulkRowError
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def describe_error(exc: Exception) -> str:
+    if isinstance(exc, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(p) for p in err['loc']) or 'row'}: {err['msg']}"
+            for err in exc.errors()
+        )
+    return str(exc)
+
+
+def bulk_insert(
+    db: Session,
+    model,
+    rows: Iterable[Any],
+    build: Callable[[Any], dict],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    inserted_ids: Optional[List[int]] = None,
+) -> BulkResult:
+    """
+    Validate `rows` one at a time and insert them in chunks.
+
+    `build` turns a raw row into the column dict for `model`, raising on
+    invalid input; such rows, and exceptions yielded by `rows` in place of
+    a row, are reported and skipped without aborting the import. Valid rows are written with a single executemany INSERT per chunk,
+    each chunk in its own transaction, so memory stays bounded by
+    `chunk_size` whatever the size of the upload. If `inserted_ids` is
+    given, the primary keys of the inserted rows are appended to it.
+    """
+    result = BulkResult()
+    chunk: List[Tuple[int, dict]] = []
+
+    for index, raw in enumerate(rows):
+        try:
+            if isinstance(raw, Exception):
+                raise raw  # a row the file reader could not parse
+            chunk.append((index, build(raw)))
+        except (ValidationError, ValueError, TypeError, KeyError) as exc:
+            result.errors.append(BulkRowError(row=index, error=describe_error(exc)))
+            continue
+        if len(chunk) >= chunk_size:
+            _flush_chunk(db, model, chunk, result, inserted_ids)
+            chunk = []
+
+    if chunk:
+        _flush_chunk(db, model, chunk, result, inserted_ids)
+
+    result.failed = len(result.errors)
+    result.errors.sort(key=lambda e: e.row)
+    return result
+
+
+def _flush_chunk(
+    db: Session, model, chunk: List[Tuple[int, dict]], result: BulkResult, inserted_ids: Optional[List[int]]
+) -> None:
+    stmt = insert(model) if inserted_ids is None else insert(model).returning(model.id)
+
+    def write(rows: List[dict]) -> None:
+        ids = db.execute(stmt, rows).scalars().all() if inserted_ids is not None else []
+        db.commit()
+        result.inserted += len(rows)
+        if inserted_ids is not None:
+            inserted_ids.extend(ids)
+
+    try:
+        write([values for _, values in chunk])
+        return
+    except SQLAlchemyError:
+        db.rollback()
+
+    # The database rejected the batch (e.g. a unique constraint); replay it
+    # row by row so only the offending rows are reported.
+    for index, values in chunk:
+        try:
+            write([values])
+        except SQLAlchemyError as exc:
+            db.rollback()
+            result.errors.append(BulkRowError(row=index, error=str(getattr(exc, "orig", None) or exc)))
+
+
+MAX_JSON_ROW_CHARS = 1 << 20
+_READ_CHARS = 1 << 16
+
+
+def _json_lines(text) -> Iterator[Any]:
+    for line in text:
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError as exc:
+                yield ValueError(f"Malformed JSON line: {exc}")
+
+
+def _json_array(text) -> Iterator[Any]:
+    """Decode the elements of a top-level JSON array one at a time, reading the file in blocks."""
+    decoder = json.JSONDecoder()
+    buf, pos, eof = "", 0, False
+
+    def more() -> bool:
+        nonlocal buf, pos, eof
+        block = "" if eof else text.read(_READ_CHARS)
+        eof = not block
+        buf, pos = buf[pos:] + block, 0
+        return not eof
+
+    def skip_blanks() -> bool:
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos].isspace():
+                pos += 1
+            if pos < len(buf) or not more():
+                return pos < len(buf)
+
+    if not skip_blanks() or buf[pos] != "[":
+        raise ValueError("JSON import must be an array of objects")
+    pos += 1
+    expect_value = True
+    while skip_blanks():
+        if buf[pos] == "]":
+            return
+        if not expect_value:
+            if buf[pos] != ",":
+                raise ValueError(f"Expected ',' or ']' in JSON array, got {buf[pos]!r}")
+            pos += 1
+            expect_value = True
+            continue
+        while True:
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+                # A number cut at the block edge ("1." of "1.5") also decodes
+                if eof or (end < len(buf) and not (isinstance(value, (int, float)) and buf[end] in "0123456789.eE+-")):
+                    break
+            except ValueError:
+                if eof or len(buf) - pos > MAX_JSON_ROW_CHARS:
+                    raise
+            more()
+        pos = end
+        expect_value = False
+        yield value
+    raise ValueError("JSON array is not closed")
+
+
+def iter_upload_rows(upload) -> Iterator[Any]:
+    """
+    Stream rows out of an uploaded CSV file, JSON Lines file or JSON array,
+    holding one block of the file at a time.
+
+    A malformed JSON line is yielded as the ValueError describing it, for
+    bulk_insert to report. An error the reader cannot skip past (broken CSV
+    quoting, invalid JSON array syntax, bad encoding) is raised if no row
+    was read yet; otherwise it ends the stream as a final error row, because
+    earlier chunks are already committed.
+    """
+    name = (upload.filename or "").lower()
+    text = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+    if name.endswith((".jsonl", ".ndjson")) or upload.content_type in ("application/jsonl", "application/x-ndjson"):
+        rows = _json_lines(text)
+    elif name.endswith(".json") or upload.content_type == "application/json":
+        rows = _json_array(text)
+    else:
+        rows = csv.DictReader(text)
+    started = False
+    try:
+        for row in rows:
+            started = True
+            yield row
+    except (ValueError, csv.Error) as exc:
+        if not started:
+            raise ValueError(str(exc)) from exc
+        yield ValueError(f"Import stopped, the rest of the file was not read: {exc}")
+    finally:
+        text.detach()
@@ -0,0 +1,222 @@
+import hashlib
+import re
+import struct
+import unicodedata
+from typing import Dict, List, Optional, Sequence, Set
+
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import Session
+
+from app.models.complaint import Complaint, ComplaintLshBucket, ComplaintSignature, ComplaintStatus
+
+# 64 hash functions split into 16 bands of 4 rows: two complaints whose
+# shingle sets have Jaccard similarity s share at least one band with
+# probability 1 - (1 - s^4)^16, i.e. ~98% at s=0.6 and ~6% at s=0.2.
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 4
+SIMILARITY_THRESHOLD = 0.5
+
+_MERSENNE = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+# Fixed permutation coefficients so signatures are stable across processes.
+_PERMS = [
+    (
+        int.from_bytes(hashlib.blake2b(f"a{i}".encode(), digest_size=8).digest(), "big") % (_MERSENNE - 1) + 1,
+        int.from_bytes(hashlib.blake2b(f"b{i}".encode(), digest_size=8).digest(), "big") % _MERSENNE,
+    )
+    for i in range(NUM_PERM)
+]
+_PACK = struct.Struct(f"<{NUM_PERM}I")
+_PACK_BAND = struct.Struct(f"<{ROWS}I")
+
+
+def normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    return " ".join(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+def shingles(text: str) -> Set[int]:
+    norm = normalize(text)
+    if len(norm) <= SHINGLE_SIZE:
+        grams = {norm}
+    else:
+        grams = {norm[i:i + SHINGLE_SIZE] for i in range(len(norm) - SHINGLE_SIZE + 1)}
+    return {
+        int.from_bytes(hashlib.blake2b(g.encode(), digest_size=4).digest(), "big")
+        for g in grams
+    }
+
+
+def minhash(text: str) -> List[int]:
+    hashes = shingles(text)
+    return [
+        min(((a * h + b) % _MERSENNE) & _MAX_HASH for h in hashes)
+        for a, b in _PERMS
+    ]
+
+
+def similarity(sig_a: List[int], sig_b: List[int]) -> float:
+    """Estimated Jaccard similarity of the underlying shingle sets."""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / NUM_PERM
+
+
+def band_buckets(signature: List[int]) -> List[str]:
+    return [
+        hashlib.blake2b(_PACK_BAND.pack(*signature[b * ROWS:(b + 1) * ROWS]), digest_size=8).hexdigest()
+        for b in range(BANDS)
+    ]
+
+
+def assign_cluster(db: Session, complaint: Complaint) -> int:
+    """
+    Compute the complaint's signature and attach it to a near-duplicate cluster.
+
+    Only complaints sharing an LSH bucket are compared, so the cost depends on
+    the number of look-alikes rather than on the size of the table. Resolved
+    complaints are ignored: a new report about a fixed problem starts a new
+    cluster. The complaint must be flushed (have an id); caller commits.
+    """
+    signature = minhash(complaint.description)
+    buckets = band_buckets(signature)
+
+    candidate_ids = {
+        cid for (cid,) in db.query(ComplaintLshBucket.complaint_id)
+        .filter(tuple_(ComplaintLshBucket.band, ComplaintLshBucket.bucket).in_(list(enumerate(buckets))))
+        .filter(ComplaintLshBucket.complaint_id != complaint.id)
+        .distinct()
+    }
+
+    best: Optional[ComplaintSignature] = None
+    best_score = SIMILARITY_THRESHOLD
+    if candidate_ids:
+        candidates = (
+            db.query(ComplaintSignature)
+            .join(Complaint, Complaint.id == ComplaintSignature.complaint_id)
+            .filter(
+                ComplaintSignature.complaint_id.in_(candidate_ids),
+                Complaint.status != ComplaintStatus.resolved,
+                Complaint.deleted_at.is_(None),
+            )
+        )
+        for cand in candidates:
+            score = similarity(signature, list(_PACK.unpack(cand.signature)))
+            if score >= best_score:
+                best, best_score = cand, score
+
+    cluster_id = best.cluster_id if best else complaint.id
+    db.add(ComplaintSignature(
+        complaint_id=complaint.id,
+        cluster_id=cluster_id,
+        signature=_PACK.pack(*signature),
+    ))
+    db.add_all(
+        ComplaintLshBucket(complaint_id=complaint.id, band=band, bucket=bucket)
+        for band, bucket in enumerate(buckets)
+    )
+    db.flush()
+    return cluster_id
+
+
+def assign_missing_clusters(db: Session, batch_size: int = 500) -> int:
+    """
+    Cluster complaints that have no signature yet (bulk imports, rows that
+    predate the detector), oldest first so clusters grow in arrival order.
+    Commits after every batch; returns the number of complaints processed.
+    """
+    done = 0
+    while True:
+        batch = (
+            db.query(Complaint)
+            .outerjoin(ComplaintSignature, ComplaintSignature.complaint_id == Complaint.id)
+            .filter(ComplaintSignature.complaint_id.is_(None))
+            .order_by(Complaint.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not batch:
+            return done
+        for complaint in batch:
+            assign_cluster(db, complaint)
+        db.commit()
+        done += len(batch)
+
+
+def assign_clusters(db: Session, complaint_ids: Sequence[int], batch_size: int = 500) -> int:
+    """
+    Cluster the given complaints (the rows of one bulk import), in id
+    order. Commits after every batch; returns the number processed.
+    """
+    ids = sorted(complaint_ids)
+    for start in range(0, len(ids), batch_size):
+        batch = (
+            db.query(Complaint)
+            .filter(Complaint.id.in_(ids[start:start + batch_size]))
+            .order_by(Complaint.id)
+            .all()
+        )
+        for complaint in batch:
+            assign_cluster(db, complaint)
+        db.commit()
+    return len(ids)
+
+
+def list_clusters(db: Session, min_size: int = 2, limit: int = 50, offset: int = 0) -> List[dict]:
+    """Open near-duplicate clusters, largest first."""
+    open_filter = (Complaint.status != ComplaintStatus.resolved) & Complaint.deleted_at.is_(None)
+    size = func.count(ComplaintSignature.complaint_id).label("size")
+    groups = (
+        db.query(
+            ComplaintSignature.cluster_id,
+            size,
+            func.min(Complaint.created_at),
+            func.max(Complaint.created_at),
+        )
+        .join(Complaint, Complaint.id == ComplaintSignature.complaint_id)
+        .filter(open_filter)
+        .group_by(ComplaintSignature.cluster_id)
+        .having(size >= min_size)
+        .order_by(size.desc(), ComplaintSignature.cluster_id)
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
+    if not groups:
+        return []
+
+    members: Dict[int, List[Complaint]] = {g[0]: [] for g in groups}
+    rows = (
+        db.query(ComplaintSignature.cluster_id, Complaint)
+        .join(Complaint, Complaint.id == ComplaintSignature.complaint_id)
+        .filter(ComplaintSignature.cluster_id.in_(members), open_filter)
+        .order_by(Complaint.id)
+    )
+    for cluster_id, complaint in rows:
+        members[cluster_id].append(complaint)
+
+    return [
+        {
+            "cluster_id": cluster_id,
+            "count": count,
+            "first_reported": first,
+            "last_reported": last,
+            "sample": members[cluster_id][0].description,
+            "complaint_ids": [c.id for c in members[cluster_id]],
+        }
+        for cluster_id, count, first, last in groups
+    ]
+
+
+def resolve_cluster(db: Session, cluster_id: int) -> int:
+    """Mark every open complaint of a cluster resolved (caller commits)."""
+    member_ids = (
+        db.query(ComplaintSignature.complaint_id)
+        .filter(ComplaintSignature.cluster_id == cluster_id)
+        .scalar_subquery()
+    )
+    return (
+        db.query(Complaint)
+        .filter(Complaint.id.in_(member_ids), Complaint.status != ComplaintStatus.resolved)
+        .update({Complaint.status: ComplaintStatus.resolved}, synchronize_session=False)
+    )
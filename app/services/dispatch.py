@@ -0,0 +1,226 @@
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import case, func, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.user import User, UserRole
+from app.models.waste import CollectionStatus, WasteCollection
+from app.services.forecast import normalize_location
+
+try:
+    from scipy.optimize import linear_sum_assignment as _scipy_assignment
+except ImportError:  # scipy is optional; the NumPy solver below is exact too, just slower
+    _scipy_assignment = None
+
+# Extra columns per collector beyond its fair share, so a collector who
+# knows an area can take one more request there instead of a stranger.
+SLACK_SLOTS = 1
+
+
+def hungarian(cost: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Minimum-cost assignment of every row to a distinct column (rows <= columns),
+    returned like scipy's linear_sum_assignment. Shortest augmenting paths
+    with potentials; each step is a vector operation over all columns.
+    """
+    if _scipy_assignment is not None:
+        return _scipy_assignment(cost)
+    n, m = cost.shape
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    match = np.zeros(m + 1, dtype=np.int64)  # match[j] = 1-based row holding column j, 0 = free
+    way = np.zeros(m + 1, dtype=np.int64)
+    # Row reduction, then give each row a free column at its minimum where
+    # one exists; only the rows left over need augmenting paths.
+    u[1:] = cost.min(axis=1)
+    unmatched = []
+    for i in range(1, n + 1):
+        tight = np.flatnonzero((cost[i - 1] <= u[i]) & (match[1:] == 0))
+        if len(tight):
+            match[tight[0] + 1] = i
+        else:
+            unmatched.append(i)
+    for i in unmatched:
+        match[0] = i
+        j0 = 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = match[j0]
+            reduced = cost[i0 - 1] - u[i0] - v[1:]
+            free = ~used[1:]
+            better = free & (reduced < minv[1:])
+            minv[1:][better] = reduced[better]
+            way[1:][better] = j0
+            candidates = np.where(free, minv[1:], np.inf)
+            delta = candidates.min()
+            # Among equally cheap columns prefer an unassigned one: it ends the path now
+            ties = candidates == delta
+            open_ties = np.flatnonzero(ties & (match[1:] == 0))
+            j1 = int(open_ties[0] if len(open_ties) else np.flatnonzero(ties)[0]) + 1
+            done = np.flatnonzero(used)
+            u[match[done]] += delta
+            v[done] -= delta
+            minv[1:][free] -= delta
+            j0 = j1
+            if match[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            match[j0] = match[j1]
+            j0 = j1
+    cols = np.flatnonzero(match[1:])
+    rows = match[1:][cols] - 1
+    order = np.argsort(rows)
+    return rows[order], cols[order]
+
+
+def _slots(load: np.ndarray, n: int) -> np.ndarray:
+    """New requests each collector may take in a chunk of `n`: fill the least loaded first."""
+    level = load.min()
+    while np.maximum(0, level - load).sum() < n:
+        level += 1
+    return np.maximum(0, level - load).astype(np.int64) + SLACK_SLOTS
+
+
+def solve(distance: np.ndarray, load: np.ndarray, chunk_size: int, load_weight: float) -> np.ndarray:
+    """
+    Collector index for every request (row of `distance`, values 0..1).
+
+    The k-th new request a collector takes costs `load_weight * (load + k)`
+    on top of its distance, so the optimum balances work while keeping
+    collectors in their areas. Requests are solved `chunk_size` at a time
+    against a few slots per collector, with loads carried between chunks.
+    """
+    load = load.astype(float).copy()
+    result = np.empty(len(distance), dtype=np.int64)
+    for start in range(0, len(distance), chunk_size):
+        block = distance[start:start + chunk_size]
+        slots = _slots(load, len(block))
+        owner = np.repeat(np.arange(len(load)), slots)
+        rank = np.arange(len(owner)) - np.repeat(np.cumsum(slots) - slots, slots)
+        cost = block[:, owner] + load_weight * (load[owner] + rank)
+        rows, cols = hungarian(cost)
+        result[start + rows] = owner[cols]
+        np.add.at(load, owner[cols], 1)
+    return result
+
+
+@dataclass
+class Plan:
+    assignments: List[dict] = field(default_factory=list)
+    collectors: Dict[int, dict] = field(default_factory=dict)
+    seconds: float = 0.0
+
+    def summary(self, applied: Optional[int] = None) -> dict:
+        result = {
+            "requests": len(self.assignments),
+            "collectors": len(self.collectors),
+            "mean_distance": round(sum(a["distance"] for a in self.assignments) / max(len(self.assignments), 1), 3),
+            "seconds": round(self.seconds, 3),
+            "load": list(self.collectors.values()),
+            "assignments": self.assignments,
+        }
+        if applied is not None:
+            result["applied"] = applied
+        return result
+
+
+def plan_dispatch(db: Session, chunk_size: Optional[int] = None) -> Plan:
+    """
+    Balanced assignment of every `requested` collection to an active collector.
+
+    There are no coordinates, so "distance" is learned from history: a
+    collector who handled most of the recent requests at a location is at
+    distance 0 from it, one who never worked there at distance 1.
+    """
+    started = time.perf_counter()
+    chunk_size = chunk_size or settings.DISPATCH_CHUNK_SIZE
+    collectors = [
+        id_ for (id_,) in db.query(User.id).filter(
+            User.role == UserRole.collector, User.is_active.isnot(False)
+        ).order_by(User.id)
+    ]
+    requests = db.query(WasteCollection.id, WasteCollection.location).filter(
+        WasteCollection.status == CollectionStatus.requested, WasteCollection.deleted_at.is_(None)
+    ).order_by(WasteCollection.created_at, WasteCollection.id).all()
+    plan = Plan()
+    if not collectors or not requests:
+        plan.seconds = time.perf_counter() - started
+        return plan
+
+    column = {id_: i for i, id_ in enumerate(collectors)}
+    load = np.zeros(len(collectors))
+    for collector_id, n in db.query(WasteCollection.collector_id, func.count()).filter(
+        WasteCollection.status == CollectionStatus.in_progress,
+        WasteCollection.collector_id.in_(collectors),
+    ).group_by(WasteCollection.collector_id):
+        load[column[collector_id]] = n
+
+    locations: Dict[str, int] = {}
+    request_loc = np.array([locations.setdefault(normalize_location(loc), len(locations)) for _, loc in requests])
+    worked = np.zeros((len(locations), len(collectors)))
+    since = datetime.utcnow() - timedelta(days=settings.DISPATCH_AREA_DAYS)
+    for collector_id, location, n in db.query(
+        WasteCollection.collector_id, func.lower(func.trim(WasteCollection.location)), func.count()
+    ).filter(
+        WasteCollection.collector_id.in_(collectors), WasteCollection.created_at >= since
+    ).group_by(WasteCollection.collector_id, func.lower(func.trim(WasteCollection.location))):
+        row = locations.get(normalize_location(location))
+        if row is not None:
+            worked[row, column[collector_id]] += n
+    top = worked.max(axis=1, keepdims=True)
+    affinity = np.divide(worked, top, out=np.zeros_like(worked), where=top > 0)
+    distance = 1 - affinity[request_loc]
+
+    chosen = solve(distance, load, chunk_size, settings.DISPATCH_LOAD_WEIGHT)
+    for (request_id, location), c, d in zip(requests, chosen, distance[np.arange(len(requests)), chosen]):
+        plan.assignments.append({
+            "request_id": request_id, "collector_id": collectors[c], "location": location, "distance": round(float(d), 3),
+        })
+    added = np.bincount(chosen, minlength=len(collectors))
+    plan.collectors = {
+        id_: {"collector_id": id_, "in_progress": int(load[i]), "assigned": int(added[i])}
+        for i, id_ in enumerate(collectors)
+    }
+    plan.seconds = time.perf_counter() - started
+    return plan
+
+
+def apply_plan(db: Session, plan: Plan, batch_size: int = 500) -> int:
+    """
+    Write `plan` in one transaction; requests accepted by hand since it was
+    computed keep their collector. Returns the number of requests assigned.
+    """
+    assigned = 0
+    now = datetime.utcnow()
+    for start in range(0, len(plan.assignments), batch_size):
+        batch = plan.assignments[start:start + batch_size]
+        mapping = {a["request_id"]: a["collector_id"] for a in batch}
+        assigned += db.execute(
+            update(WasteCollection)
+            .where(
+                WasteCollection.id.in_(mapping),
+                WasteCollection.status == CollectionStatus.requested,
+                WasteCollection.deleted_at.is_(None),
+            )
+            .values(
+                collector_id=case(mapping, value=WasteCollection.id),
+                status=CollectionStatus.in_progress,
+                updated_at=now,
+            )
+            .execution_options(synchronize_session=False)
+        ).rowcount
+    db.commit()
+    return assigned
+
+
+def dispatch(db: Session, dry_run: bool = False) -> dict:
+    plan = plan_dispatch(db)
+    return plan.summary(None if dry_run else apply_plan(db, plan))
@@ -0,0 +1,128 @@
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.models.event import Event
+
+# Source table -> entity name recorded in events.entity
+TRACKED = {
+    "waste_collections": "collection",
+    "orders": "order",
+    "payments": "payment",
+    "complaints": "complaint",
+}
+
+# Tables whose rows citizens withdraw by setting deleted_at; that is
+# recorded as a transition from the row's status to WITHDRAWN.
+WITHDRAWABLE = {"waste_collections", "complaints"}
+WITHDRAWN = "withdrawn"
+
+_COLUMNS = "entity, entity_id, user_id, old_status, new_status, occurred_at"
+
+
+def _sqlite_ddl(source: str, entity: str) -> List[str]:
+    now = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+    # Triggers see every write path (ORM, bulk inserts, conditional UPDATEs,
+    # raw SQL) and write inside the same transaction as the change.
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS events_{source}_ai AFTER INSERT ON {source} BEGIN
+            INSERT INTO events({_COLUMNS})
+            VALUES ('{entity}', new.id, new.user_id, NULL, new.status, {now});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS events_{source}_au AFTER UPDATE OF status ON {source}
+        WHEN old.status IS NOT new.status BEGIN
+            INSERT INTO events({_COLUMNS})
+            VALUES ('{entity}', new.id, new.user_id, old.status, new.status, {now});
+        END
+        """,
+    ] + ([
+        f"""
+        CREATE TRIGGER IF NOT EXISTS events_{source}_aw AFTER UPDATE OF deleted_at ON {source}
+        WHEN old.deleted_at IS NULL AND new.deleted_at IS NOT NULL BEGIN
+            INSERT INTO events({_COLUMNS})
+            VALUES ('{entity}', new.id, new.user_id, new.status, '{WITHDRAWN}', {now});
+        END
+        """,
+    ] if source in WITHDRAWABLE else [])
+
+
+# SQLite commits one writer at a time, so sequence order is commit order.
+# On Postgres concurrent transactions could commit sequence values out of
+# order and a consumer past seq N would never see a later-committing N - 1;
+# a transaction-scoped advisory lock serializes event writers instead.
+_PG_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION record_event() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND OLD.status IS NOT DISTINCT FROM NEW.status THEN
+        RETURN NULL;
+    END IF;
+    PERFORM pg_advisory_xact_lock(hashtext('events'));
+    INSERT INTO events({_COLUMNS})
+    VALUES (
+        TG_ARGV[0], NEW.id, NEW.user_id,
+        CASE WHEN TG_OP = 'UPDATE' THEN OLD.status::text END,
+        NEW.status::text, now() AT TIME ZONE 'utc'
+    );
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+
+_PG_WITHDRAWAL_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION record_withdrawal() RETURNS trigger AS $$
+BEGIN
+    IF OLD.deleted_at IS NOT NULL OR NEW.deleted_at IS NULL THEN
+        RETURN NULL;
+    END IF;
+    PERFORM pg_advisory_xact_lock(hashtext('events'));
+    INSERT INTO events({_COLUMNS})
+    VALUES (
+        TG_ARGV[0], NEW.id, NEW.user_id, NEW.status::text, '{WITHDRAWN}', now() AT TIME ZONE 'utc'
+    );
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+
+def _pg_ddl(source: str, entity: str) -> List[str]:
+    return [
+        f"""
+        CREATE OR REPLACE TRIGGER events_{source} AFTER INSERT OR UPDATE OF status ON {source}
+        FOR EACH ROW EXECUTE FUNCTION record_event('{entity}')
+        """,
+    ] + ([
+        f"""
+        CREATE OR REPLACE TRIGGER events_{source}_withdrawn AFTER UPDATE OF deleted_at ON {source}
+        FOR EACH ROW EXECUTE FUNCTION record_withdrawal('{entity}')
+        """,
+    ] if source in WITHDRAWABLE else [])
+
+
+def ensure_event_triggers(engine: Engine) -> None:
+    """Install the triggers that append to `events` if missing."""
+    with engine.begin() as conn:
+        if engine.dialect.name == "sqlite":
+            for source, entity in TRACKED.items():
+                for ddl in _sqlite_ddl(source, entity):
+                    conn.execute(text(ddl))
+        elif engine.dialect.name == "postgresql":
+            conn.execute(text(_PG_FUNCTION))
+            conn.execute(text(_PG_WITHDRAWAL_FUNCTION))
+            for source, entity in TRACKED.items():
+                for ddl in _pg_ddl(source, entity):
+                    conn.execute(text(ddl))
+
+
+def events_after(db: Session, after: int, limit: int, entity: Optional[str] = None) -> List[Event]:
+    """Events with seq > `after`, oldest first: an index range scan on the primary key."""
+    query = db.query(Event).filter(Event.seq > after)
+    if entity is not None:
+        query = query.filter(Event.entity == entity)
+    return query.order_by(Event.seq).limit(limit).all()
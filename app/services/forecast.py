@@ -0,0 +1,187 @@
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from itertools import product
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.archive import ARCHIVES
+from app.models.forecast import CollectionForecast
+from app.models.waste import WasteCollection
+
+SEASON = 7  # weekday seasonality on daily counts
+
+# Smoothing parameters tried for every location; each keeps the combination
+# with the lowest one-step-ahead squared error over its history.
+ALPHAS = (0.1, 0.3, 0.6)
+BETAS = (0.0, 0.05)
+GAMMAS = (0.05, 0.2, 0.4)
+
+
+def normalize_location(location: str) -> str:
+    return " ".join(location.split()).lower()
+
+
+@dataclass
+class Series:
+    locations: List[str]
+    start: date
+    daily: np.ndarray     # (locations, days) request counts
+    hourly: np.ndarray    # (locations, 24) request counts by hour of day
+
+
+def load_series(db: Session, history_days: int, today: Optional[date] = None) -> Series:
+    """Per-location daily and hour-of-day counts over the last `history_days` (archive included)."""
+    today = today or datetime.utcnow().date()
+    start = today - timedelta(days=history_days)
+    since = datetime.combine(start, datetime.min.time())
+    until = datetime.combine(today, datetime.min.time())
+
+    index: Dict[str, int] = {}
+    rows_l, rows_d, rows_h, counts = [], [], [], []
+    hot = WasteCollection.__table__
+    for table in (hot, ARCHIVES[hot]):
+        key = func.lower(func.trim(table.c.location))
+        day = func.date(table.c.created_at)
+        hour = func.strftime("%H", table.c.created_at) if db.get_bind().dialect.name == "sqlite" \
+            else func.extract("hour", table.c.created_at)
+        query = (
+            select(key, day, hour, func.count())
+            .where(table.c.created_at >= since, table.c.created_at < until)
+            .group_by(key, day, hour)
+        )
+        for location, d, h, n in db.execute(query):
+            # trim/lower in SQL groups most variants; collapse inner whitespace here
+            location = normalize_location(location)
+            rows_l.append(index.setdefault(location, len(index)))
+            rows_d.append((date.fromisoformat(str(d)[:10]) - start).days)
+            rows_h.append(int(h))
+            counts.append(n)
+
+    daily = np.zeros((len(index), history_days))
+    hourly = np.zeros((len(index), 24))
+    if counts:
+        loc, d, h, n = (np.asarray(a) for a in (rows_l, rows_d, rows_h, counts))
+        np.add.at(daily, (loc, d), n)
+        np.add.at(hourly, (loc, h), n)
+    return Series(list(index), start, daily, hourly)
+
+
+def holt_winters(y: np.ndarray, alpha, beta, gamma, season: int = SEASON) -> Tuple[np.ndarray, ...]:
+    """
+    Additive Holt-Winters over every row of `y` at once (one Python loop
+    over time, vector ops across locations). `alpha`/`beta`/`gamma` are
+    scalars or per-row arrays. Returns the final level, trend and seasonal
+    state plus the sum of squared one-step-ahead errors per row.
+    """
+    n, t = y.shape
+    first = y[:, :season]
+    level = first.mean(axis=1)
+    if t >= 2 * season:
+        trend = (y[:, season:2 * season].mean(axis=1) - level) / season
+    else:
+        trend = np.zeros(n)
+    seasonal = first - level[:, None]
+    sse = np.zeros(n)
+    for i in range(season, t):
+        s = seasonal[:, i % season]
+        error = y[:, i] - (level + trend + s)
+        sse += error * error
+        prev_level = level
+        level = alpha * (y[:, i] - s) + (1 - alpha) * (level + trend)
+        trend = beta * (level - prev_level) + (1 - beta) * trend
+        seasonal[:, i % season] = gamma * (y[:, i] - level) + (1 - gamma) * s
+    return level, trend, seasonal, sse
+
+
+def fit_forecast(y: np.ndarray, horizon: int, season: int = SEASON) -> np.ndarray:
+    """(locations, horizon) non-negative daily forecasts, parameters picked per location."""
+    n, t = y.shape
+    best_sse = np.full(n, np.inf)
+    best = np.zeros((n, horizon))
+    steps = np.arange(1, horizon + 1)
+    for alpha, beta, gamma in product(ALPHAS, BETAS, GAMMAS):
+        level, trend, seasonal, sse = holt_winters(y, alpha, beta, gamma, season)
+        # seasonal[:, k] belongs to day k (mod season); day t + h - 1 follows the last observation
+        idx = (t + steps - 1) % season
+        forecast = level[:, None] + trend[:, None] * steps + seasonal[:, idx]
+        better = sse < best_sse
+        best_sse = np.where(better, sse, best_sse)
+        best[better] = forecast[better]
+    return np.clip(best, 0, None)
+
+
+def run_forecasts(db: Session, history_days: Optional[int] = None, horizon: Optional[int] = None) -> dict:
+    """Nightly batch: refit every location and replace the stored forecasts."""
+    history_days = max(history_days or settings.FORECAST_HISTORY_DAYS, 2 * SEASON)
+    horizon = horizon or settings.FORECAST_HORIZON_DAYS
+    started = time.perf_counter()
+    today = datetime.utcnow().date()
+    series = load_series(db, history_days, today)
+    loaded = time.perf_counter()
+
+    forecast = fit_forecast(series.daily, horizon) if series.locations else np.zeros((0, horizon))
+    totals = series.hourly.sum(axis=1, keepdims=True)
+    profile = np.divide(series.hourly, totals, out=np.full_like(series.hourly, 1 / 24), where=totals > 0)
+    fitted = time.perf_counter()
+
+    generated = datetime.utcnow()
+    rows = [
+        {
+            "location": location,
+            "day": today + timedelta(days=h),
+            "expected": round(float(forecast[i, h]), 3),
+            "hourly": np.round(forecast[i, h] * profile[i], 3).tolist(),
+            "generated_at": generated,
+        }
+        for i, location in enumerate(series.locations)
+        for h in range(horizon)
+    ]
+    db.execute(delete(CollectionForecast))
+    for chunk in range(0, len(rows), 5000):
+        db.execute(insert(CollectionForecast), rows[chunk:chunk + 5000])
+    db.commit()
+    return {
+        "locations": len(series.locations),
+        "days": horizon,
+        "load_seconds": round(loaded - started, 3),
+        "fit_seconds": round(fitted - loaded, 3),
+        "store_seconds": round(time.perf_counter() - fitted, 3),
+    }
+
+
+def get_forecast(db: Session, location: Optional[str], days: int) -> List[dict]:
+    """Stored forecast for one location, or summed over all locations when `location` is None."""
+    query = db.query(CollectionForecast).order_by(CollectionForecast.day)
+    if location is not None:
+        rows = query.filter(CollectionForecast.location == normalize_location(location)).limit(days).all()
+        return [{"day": r.day, "expected": r.expected, "hourly": r.hourly} for r in rows]
+
+    # Daily totals in SQL; only the hourly arrays of those days are read and
+    # summed here (one row per location and day), streamed in batches.
+    expected = dict(
+        db.execute(
+            select(CollectionForecast.day, func.sum(CollectionForecast.expected))
+            .group_by(CollectionForecast.day)
+            .order_by(CollectionForecast.day)
+            .limit(days)
+        ).all()
+    )
+    if not expected:
+        return []
+    hourly: Dict[date, np.ndarray] = {}
+    rows = db.execute(
+        select(CollectionForecast.day, CollectionForecast.hourly)
+        .where(CollectionForecast.day <= max(expected))
+        .execution_options(yield_per=1000)
+    )
+    for day, h in rows:
+        hourly[day] = hourly.get(day, 0) + np.asarray(h)
+    return [
+        {"day": day, "expected": round(float(total), 3), "hourly": np.round(hourly[day], 3).tolist()}
+        for day, total in sorted(expected.items())
+    ]
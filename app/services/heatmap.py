@@ -0,0 +1,232 @@
+"""
+Demand heatmap: collection requests per location and time bucket.
+
+Counts live in heatmap_cells (location x hour), kept current incrementally
+alongside the analytics rollups: only days owning a collection changed
+since the last refresh are recounted. Every tile overlapping those days is
+re-rendered into heatmap_tiles at each zoom level, so serving (and panning)
+is a primary-key read of a ready JSON body, revalidated with its ETag.
+"""
+import hashlib
+import json
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Collection, Dict, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.models.analytics import RollupWatermark
+from app.models.archive import collections_archive
+from app.models.heatmap import HeatmapCell, HeatmapTile
+from app.models.waste import WasteCollection
+from app.services.analytics import OVERLAP, _as_date, _day_ranges
+
+WATERMARK = "heatmap"
+EPOCH = date(1970, 1, 5)  # a Monday: week buckets and tiles start on Mondays
+
+
+@dataclass(frozen=True)
+class Zoom:
+    name: str
+    bucket_days: int     # 0: hourly buckets
+    span_days: int       # days covered by one tile
+
+    @property
+    def buckets(self) -> int:
+        return self.span_days * 24 if self.bucket_days == 0 else self.span_days // self.bucket_days
+
+
+ZOOMS: Dict[str, Zoom] = {
+    z.name: z for z in (Zoom("hour", 0, 1), Zoom("day", 1, 28), Zoom("week", 7, 182))
+}
+
+
+def tile_start(zoom: Zoom, day: date) -> date:
+    """Start of the tile of `zoom` containing `day`."""
+    return EPOCH + timedelta(days=(day - EPOCH).days // zoom.span_days * zoom.span_days)
+
+
+def _at_midnight(day: date) -> datetime:
+    return datetime.combine(day, datetime.min.time())
+
+
+def _truncate_hour(db: Session, column):
+    if db.get_bind().dialect.name == "sqlite":
+        return func.strftime("%Y-%m-%d %H:00:00", column)
+    return func.date_trunc("hour", column)
+
+
+def _as_datetime(value) -> datetime:
+    return value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+
+
+# ---------------- Cells ----------------
+
+
+def _recount(db: Session, first: Optional[date] = None, last: Optional[date] = None) -> None:
+    """Rebuild the cells of days first..last (all days if not given) from hot and archived collections."""
+    wipe = delete(HeatmapCell)
+    counts: Dict[Tuple[datetime, int], int] = {}
+    for table in (WasteCollection.__table__, collections_archive):
+        hour = _truncate_hour(db, table.c.created_at)
+        query = (
+            select(hour, func.coalesce(table.c.location_id, 0), func.count())
+            .where(table.c.created_at.isnot(None), table.c.deleted_at.is_(None))
+            .group_by(hour, func.coalesce(table.c.location_id, 0))
+        )
+        if first is not None:
+            lo, hi = _at_midnight(first), _at_midnight(last) + timedelta(days=1)
+            query = query.where(table.c.created_at >= lo, table.c.created_at < hi)
+            wipe = delete(HeatmapCell).where(HeatmapCell.hour >= lo, HeatmapCell.hour < hi)
+        for h, location_id, n in db.execute(query):
+            key = (_as_datetime(h), location_id)
+            counts[key] = counts.get(key, 0) + n
+    db.execute(wipe)
+    if counts:
+        db.execute(insert(HeatmapCell), [
+            {"hour": h, "location_id": location_id, "count": n} for (h, location_id), n in counts.items()
+        ])
+
+
+# ---------------- Tiles ----------------
+
+
+def _etag(body: str) -> str:
+    return '"' + hashlib.sha1(body.encode()).hexdigest()[:20] + '"'
+
+
+def _body(zoom: Zoom, start: date, cells: list) -> str:
+    return json.dumps(
+        {
+            "zoom": zoom.name,
+            "start": start.isoformat(),
+            "end": (start + timedelta(days=zoom.span_days)).isoformat(),
+            "bucket_hours": zoom.bucket_days * 24 or 1,
+            "buckets": zoom.buckets,
+            "max": max((n for _, _, n in cells), default=0),
+            "cells": cells,    # [location_id, bucket index, count], sparse
+        },
+        separators=(",", ":"),
+    )
+
+
+def render_tile(db: Session, zoom: Zoom, start: date) -> Optional[str]:
+    """JSON body of one tile from the cells, or None if it has no requests."""
+    lo, hi = _at_midnight(start), _at_midnight(start + timedelta(days=zoom.span_days))
+    in_tile = (HeatmapCell.hour >= lo, HeatmapCell.hour < hi)
+    sums: Dict[Tuple[int, int], int] = {}
+    if zoom.bucket_days == 0:
+        rows = db.execute(select(HeatmapCell.hour, HeatmapCell.location_id, HeatmapCell.count).where(*in_tile))
+        for h, location_id, n in rows:
+            sums[(location_id, int((_as_datetime(h) - lo).total_seconds()) // 3600)] = n
+    else:
+        day = func.date(HeatmapCell.hour)
+        rows = db.execute(
+            select(day, HeatmapCell.location_id, func.sum(HeatmapCell.count))
+            .where(*in_tile)
+            .group_by(day, HeatmapCell.location_id)
+        )
+        for d, location_id, n in rows:
+            key = (location_id, (_as_date(d) - start).days // zoom.bucket_days)
+            sums[key] = sums.get(key, 0) + int(n)
+    if not sums:
+        return None
+    return _body(zoom, start, [[location_id, i, n] for (location_id, i), n in sorted(sums.items())])
+
+
+def _store_tiles(db: Session, first: date, last: date) -> int:
+    """Re-render every tile overlapping days first..last; returns tiles written."""
+    written = 0
+    now = datetime.utcnow()
+    for zoom in ZOOMS.values():
+        start = tile_start(zoom, first)
+        while start <= last:
+            body = render_tile(db, zoom, start)
+            db.execute(delete(HeatmapTile).where(HeatmapTile.zoom == zoom.name, HeatmapTile.start == start))
+            if body is not None:
+                db.add(HeatmapTile(zoom=zoom.name, start=start, etag=_etag(body), body=body, updated_at=now))
+                written += 1
+            start += timedelta(days=zoom.span_days)
+    db.flush()
+    return written
+
+
+# ---------------- Refresh ----------------
+
+
+def refresh_heatmap(db: Session) -> int:
+    """
+    Fold collection changes into the cells and tiles; returns days recounted
+    (-1 for a full rebuild, done on first run and after invalidate_heatmap).
+    """
+    started = datetime.utcnow()
+    mark = db.get(RollupWatermark, WATERMARK)
+    if mark is None:
+        _recount(db)
+        db.execute(delete(HeatmapTile))
+        first, last = db.execute(select(func.min(HeatmapCell.hour), func.max(HeatmapCell.hour))).one()
+        if first is not None:
+            _store_tiles(db, _as_datetime(first).date(), _as_datetime(last).date())
+        db.add(RollupWatermark(metric=WATERMARK, value=started))
+        db.commit()
+        return -1
+
+    day = func.date(WasteCollection.created_at)
+    days = [
+        _as_date(d)
+        for (d,) in db.execute(
+            select(day).distinct().where(WasteCollection.updated_at >= mark.value - OVERLAP)
+        )
+    ]
+    for first, last in _day_ranges(days):
+        _recount(db, first, last)
+        _store_tiles(db, first, last)
+    mark.value = started
+    db.commit()
+    return len(days)
+
+
+def invalidate_heatmap(db: Session) -> None:
+    """
+    Force a full rebuild on the next refresh, for changes that leave
+    updated_at alone (location backfills). Caller commits.
+    """
+    db.execute(delete(RollupWatermark).where(RollupWatermark.metric == WATERMARK))
+
+
+# ---------------- Reading ----------------
+
+
+def read_tile(
+    db: Session, zoom: Zoom, start: date, known_etags: Collection[str] = ()
+) -> Tuple[str, Optional[str]]:
+    """
+    (ETag, body) of a tile; the body is None when one of the client's
+    `known_etags` (or "*") is still current, so a revalidation reads only
+    the ETag column.
+    """
+    def known(etag: str) -> bool:
+        return etag in known_etags or "*" in known_etags
+
+    etag = db.execute(
+        select(HeatmapTile.etag).where(HeatmapTile.zoom == zoom.name, HeatmapTile.start == start)
+    ).scalar()
+    if etag is None:
+        body = _body(zoom, start, [])
+        etag = _etag(body)
+        return etag, None if known(etag) else body
+    if known(etag):
+        return etag, None
+    tile = db.execute(
+        select(HeatmapTile.etag, HeatmapTile.body).where(HeatmapTile.zoom == zoom.name, HeatmapTile.start == start)
+    ).one_or_none()
+    if tile is None:  # removed by a refresh in between
+        return read_tile(db, zoom, start, known_etags)
+    return tile.etag, tile.body
+
+
+def coverage(db: Session) -> Tuple[Optional[date], Optional[date]]:
+    """First and last day with requests in the cells."""
+    first, last = db.execute(select(func.min(HeatmapCell.hour), func.max(HeatmapCell.hour))).one()
+    return (_as_datetime(first).date(), _as_datetime(last).date()) if first is not None else (None, None)
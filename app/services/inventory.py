@@ -0,0 +1,82 @@
+from typing import Dict, Tuple
+
+from sqlalchemy import case, update
+from sqlalchemy.orm import Session
+
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.product import Product
+
+
+def reserve_stock(db: Session, product_id: int, quantity: int) -> bool:
+    """
+    Atomically take `quantity` units of a product out of stock.
+
+    The check and the decrement are a single conditional UPDATE, so two buyers
+    racing for the last unit can never both succeed and no application-level
+    lock is held. Runs inside the caller's transaction: the reservation is
+    only durable once the caller commits alongside its Order insert.
+    """
+    result = db.execute(
+        update(Product)
+        .where(Product.id == product_id, Product.stock >= quantity)
+        .values(stock=Product.stock - quantity)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def reserve_cart(db: Session, quantities: Dict[int, int]) -> Tuple[Dict[int, Product], bool]:
+    """
+    Load the products of a cart and reserve every line, all or nothing.
+
+    One IN query fetches the products (prices come from the database, never
+    the client) and one conditional UPDATE takes stock for all of them: it
+    matches only lines with enough stock, so fewer matched rows than lines
+    means at least one is short and the caller must roll back. Returns the
+    products found, by id, and whether the reservation succeeded.
+    """
+    products = {p.id: p for p in db.query(Product).filter(Product.id.in_(quantities))}
+    if len(products) != len(quantities):
+        return products, False
+    wanted = case(quantities, value=Product.id)
+    result = db.execute(
+        update(Product)
+        .where(Product.id.in_(quantities), Product.stock >= wanted)
+        .values(stock=Product.stock - wanted)
+        .execution_options(synchronize_session=False)
+    )
+    return products, result.rowcount == len(quantities)
+
+
+def release_stock(db: Session, product_id: int, quantity: int) -> None:
+    """Put previously reserved units back into stock (caller commits)."""
+    db.execute(
+        update(Product)
+        .where(Product.id == product_id)
+        .values(stock=Product.stock + quantity)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def cancel_order(db: Session, order: Order) -> bool:
+    """
+    Move a pending order to `cancelled` and release its reservation.
+
+    The status transition is itself a conditional UPDATE so concurrent
+    cancellations (citizen cancel + failed-payment webhook) release the
+    stock exactly once. Returns False if the order was no longer pending.
+    """
+    result = db.execute(
+        update(Order)
+        .where(Order.id == order.id, Order.status == OrderStatus.pending)
+        .values(status=OrderStatus.cancelled)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        return False
+    if order.product_id is not None:
+        release_stock(db, order.product_id, order.quantity)
+    else:
+        for item in db.query(OrderItem).filter(OrderItem.order_id == order.id).all():
+            release_stock(db, item.product_id, item.quantity)
+    return True
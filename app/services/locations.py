@@ -0,0 +1,227 @@
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import bindparam, delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.archive import collections_archive
+from app.models.base_location import Location, LocationTrigram
+from app.models.waste import WasteCollection
+from app.services.dedup import normalize
+from app.services.heatmap import invalidate_heatmap
+
+FIELDS = ("name", "address")
+
+
+def trigrams(text: str) -> Set[str]:
+    """Trigrams of the normalized text, padded so short words and word starts count."""
+    norm = normalize(text)
+    if not norm:
+        return set()
+    padded = f"  {norm} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# ---------------- Index maintenance ----------------
+
+
+def index_location(db: Session, location: Location) -> None:
+    """(Re)write the trigrams of one location (caller commits)."""
+    db.execute(delete(LocationTrigram).where(LocationTrigram.location_id == location.id))
+    rows = [
+        {"location_id": location.id, "field": field, "trigram": gram}
+        for field in FIELDS
+        for gram in trigrams(getattr(location, field) or "")
+    ]
+    if rows:
+        db.execute(insert(LocationTrigram), rows)
+    clear_cache()
+
+
+def index_missing_locations(db: Session) -> int:
+    """Index locations created before the trigram index existed."""
+    indexed = select(LocationTrigram.location_id).distinct()
+    missing = db.query(Location).filter(Location.id.not_in(indexed)).all()
+    for location in missing:
+        index_location(db, location)
+    db.commit()
+    return len(missing)
+
+
+# ---------------- Matching ----------------
+
+
+class _Snapshot:
+    """In-memory copy of location_trigrams: posting lists and trigram counts per field."""
+
+    def __init__(self, rows):
+        self.postings: Dict[str, List[Tuple[int, str]]] = defaultdict(list)
+        self.sizes: Dict[Tuple[int, str], int] = defaultdict(int)
+        for location_id, field, gram in rows:
+            self.postings[gram].append((location_id, field))
+            self.sizes[(location_id, field)] += 1
+        self.expires = time.monotonic() + settings.LOCATION_CACHE_SECONDS
+
+
+class _Cache:
+    """
+    The trigram index snapshot plus an LRU of normalized text -> location id
+    (or None). Both are dropped when this process changes a location and
+    expire after LOCATION_CACHE_SECONDS, when another process may have.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot: Optional[_Snapshot] = None
+        self._entries: "OrderedDict[str, Tuple[float, Optional[int]]]" = OrderedDict()
+
+    def snapshot(self, db: Session) -> _Snapshot:
+        with self._lock:
+            current = self._snapshot
+        if current is None or current.expires < time.monotonic():
+            current = _Snapshot(db.execute(
+                select(LocationTrigram.location_id, LocationTrigram.field, LocationTrigram.trigram)
+            ).all())
+            with self._lock:
+                self._snapshot = current
+        return current
+
+    def get(self, key: str):
+        with self._lock:
+            hit = self._entries.get(key)
+            if hit is None or hit[0] < time.monotonic():
+                return False, None
+            self._entries.move_to_end(key)
+            return True, hit[1]
+
+    def put(self, key: str, value: Optional[int]) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + settings.LOCATION_CACHE_SECONDS, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > settings.LOCATION_CACHE_SIZE:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._snapshot = None
+            self._entries.clear()
+
+
+_cache = _Cache()
+
+
+def clear_cache() -> None:
+    """Forget the index snapshot and resolved texts (this process only)."""
+    _cache.clear()
+
+
+def match_location(db: Session, text: str) -> Optional[int]:
+    """
+    Id of the location whose name or address best matches `text`, if any
+    scores LOCATION_MATCH_THRESHOLD or more.
+
+    The score of a field is the share of its trigrams found in `text`, so
+    "Rue 12, Bonamoussadi" matches a location named "Bonamoussadi"; ties go
+    to the field sharing more trigrams (the more specific place). Only
+    locations sharing a trigram with `text` are scored: the posting lists
+    of its trigrams in the (cached) index.
+    """
+    index = _cache.snapshot(db)
+    shared: Dict[Tuple[int, str], int] = defaultdict(int)
+    for gram in trigrams(text):
+        for key in index.postings.get(gram, ()):
+            shared[key] += 1
+    if not shared:
+        return None
+    score, _, location_id = max((n / index.sizes[key], n, key[0]) for key, n in shared.items())
+    return location_id if score >= settings.LOCATION_MATCH_THRESHOLD else None
+
+
+def resolve_location(db: Session, text: str) -> Optional[int]:
+    """match_location, cached per normalized text: most requests repeat a few hundred places."""
+    key = normalize(text)
+    hit, location_id = _cache.get(key)
+    if not hit:
+        location_id = match_location(db, text)
+        _cache.put(key, location_id)
+    return location_id
+
+
+# ---------------- Backfill ----------------
+
+
+def _backfill_table(db: Session, table, batch_size: int) -> Dict[str, int]:
+    matched = scanned = 0
+    after = 0
+    while True:
+        rows = db.execute(
+            select(table.c.id, table.c.location)
+            .where(table.c.location_id.is_(None), table.c.id > after)
+            .order_by(table.c.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return {"scanned": scanned, "matched": matched}
+        after = rows[-1].id
+        scanned += len(rows)
+        resolved = [
+            {"row_id": row.id, "location_id": location_id}
+            for row in rows
+            if (location_id := resolve_location(db, row.location)) is not None
+        ]
+        if resolved:
+            # One primary-key UPDATE executed for many parameter sets
+            db.connection().execute(
+                update(table)
+                .where(table.c.id == bindparam("row_id"))
+                # Keep updated_at: delta sync would otherwise resend every backfilled row
+                .values(location_id=bindparam("location_id"), updated_at=table.c.updated_at),
+                resolved,
+            )
+            matched += len(resolved)
+        db.commit()
+
+
+def backfill_location_ids(db: Session, batch_size: Optional[int] = None) -> Dict[str, Dict[str, int]]:
+    """
+    Resolve location_id for collections (hot and archived) that have none,
+    in id order and one short transaction per batch. Rows that match no
+    location stay NULL and are retried on the next run, e.g. after an admin
+    adds the missing location.
+    """
+    batch_size = batch_size or settings.LOCATION_BACKFILL_BATCH_SIZE
+    index_missing_locations(db)
+    result = {
+        "collections": _backfill_table(db, WasteCollection.__table__, batch_size),
+        "archived": _backfill_table(db, collections_archive, batch_size),
+    }
+    if any(counts["matched"] for counts in result.values()):
+        # Heatmap cells are per location and the backfill kept updated_at
+        invalidate_heatmap(db)
+        db.commit()
+    return result
+
+
+def unlink_location(db: Session, location_id: int) -> None:
+    """Detach collections from a location being deleted or renamed (caller commits)."""
+    for table in (WasteCollection.__table__, collections_archive):
+        db.execute(
+            update(table)
+            .where(table.c.location_id == location_id)
+            .values(location_id=None, updated_at=table.c.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+    invalidate_heatmap(db)
+    clear_cache()
+
+
+def collections_by_location(db: Session, location_ids: Iterable[int]) -> List[tuple]:
+    """(location_id, status, count) over hot collections: a GROUP BY on the indexed foreign key."""
+    return db.execute(
+        select(WasteCollection.location_id, WasteCollection.status, func.count())
+        .where(WasteCollection.location_id.in_(list(location_ids)), WasteCollection.deleted_at.is_(None))
+        .group_by(WasteCollection.location_id, WasteCollection.status)
+    ).all()
@@ -0,0 +1,187 @@
+import re
+from typing import List, Optional
+
+from sqlalchemy import column, func, literal_column, table, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.models.complaint import Complaint, ComplaintStatus
+from app.models.product import Product
+
+# Column weights used for ranking: a hit in the name counts more than one in
+# the description, which counts more than one in the feature list.
+NAME_WEIGHT, DESCRIPTION_WEIGHT, FEATURES_WEIGHT = 10.0, 2.0, 1.0
+
+products_fts = table("products_fts", column("rowid"))
+complaints_fts = table("complaints_fts", column("rowid"))
+
+# FTS table -> (source table, {fts column: expression over the source row})
+_SQLITE_INDEXES = {
+    "products_fts": ("products", {
+        "name": "{row}name",
+        "description": "coalesce({row}description, '')",
+        "features": "coalesce({row}features, '')",
+    }),
+    "complaints_fts": ("complaints", {
+        "description": "{row}description",
+    }),
+}
+
+
+def _sqlite_fts_ddl(fts: str, source: str, columns: dict) -> List[str]:
+    names = ", ".join(columns)
+
+    def values(row: str) -> str:
+        return ", ".join(expr.format(row=row) for expr in columns.values())
+
+    # Triggers keep the index in sync for every write path (admin forms,
+    # bulk import, raw SQL) inside the writer's own transaction.
+    return [
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({names}, tokenize = 'unicode61 remove_diacritics 2')",
+        f"""
+        CREATE TRIGGER {fts}_ai AFTER INSERT ON {source} BEGIN
+            INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {values("new.")});
+        END
+        """,
+        f"""
+        CREATE TRIGGER {fts}_ad AFTER DELETE ON {source} BEGIN
+            DELETE FROM {fts} WHERE rowid = old.id;
+        END
+        """,
+        f"""
+        CREATE TRIGGER {fts}_au AFTER UPDATE OF {names} ON {source} BEGIN
+            DELETE FROM {fts} WHERE rowid = old.id;
+            INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {values("new.")});
+        END
+        """,
+        f"INSERT INTO {fts}(rowid, {names}) SELECT id, {values('')} FROM {source}",
+    ]
+
+
+# Postgres keeps expression GIN indexes up to date by itself.
+_PG_PRODUCT_DOCUMENT = (
+    "setweight(to_tsvector('simple', coalesce(products.name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(products.description, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(products.features::text, '')), 'C')"
+)
+_PG_COMPLAINT_DOCUMENT = "to_tsvector('simple', complaints.description)"
+_PG_DDL = [
+    f"CREATE INDEX IF NOT EXISTS ix_products_search ON products USING GIN (({_PG_PRODUCT_DOCUMENT}))",
+    f"CREATE INDEX IF NOT EXISTS ix_complaints_search ON complaints USING GIN (({_PG_COMPLAINT_DOCUMENT}))",
+]
+
+
+def ensure_search_indexes(engine: Engine) -> None:
+    """Create the full-text indexes (and backfill them) if missing."""
+    with engine.begin() as conn:
+        if engine.dialect.name == "sqlite":
+            for fts, (source, columns) in _SQLITE_INDEXES.items():
+                exists = conn.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                    {"name": fts},
+                ).first()
+                if not exists:
+                    for ddl in _sqlite_fts_ddl(fts, source, columns):
+                        conn.execute(text(ddl))
+        elif engine.dialect.name == "postgresql":
+            for ddl in _PG_DDL:
+                conn.execute(text(ddl))
+
+
+def _terms(query: str) -> List[str]:
+    return re.findall(r"\w+", query.lower())
+
+
+def _fts_match(terms: List[str]) -> str:
+    return " ".join(f'"{t}"*' for t in terms)
+
+
+def _pg_tsquery(terms: List[str]):
+    return func.to_tsquery("simple", " & ".join(f"{t}:*" for t in terms))
+
+
+def search_products(
+    db: Session,
+    query: str,
+    category_id: Optional[int] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    in_stock: bool = False,
+    limit: int = 20,
+    offset: int = 0,
+) -> List[Product]:
+    """
+    Ranked full-text search over name, description and features.
+
+    Every term must match, and each term is matched as a prefix, so "compo"
+    finds "composter". Results are ordered by relevance.
+    """
+    terms = _terms(query)
+    if not terms:
+        return []
+
+    q = db.query(Product)
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        q = (
+            q.join(products_fts, products_fts.c.rowid == Product.id)
+            .filter(text("products_fts MATCH :match"))
+            .params(match=_fts_match(terms))
+            .order_by(text(
+                f"bm25(products_fts, {NAME_WEIGHT}, {DESCRIPTION_WEIGHT}, {FEATURES_WEIGHT})"
+            ))
+        )
+    elif dialect == "postgresql":
+        document = literal_column(_PG_PRODUCT_DOCUMENT)
+        tsquery = _pg_tsquery(terms)
+        q = q.filter(document.op("@@")(tsquery)).order_by(func.ts_rank(document, tsquery).desc())
+    else:
+        for t in terms:
+            pattern = f"%{t}%"
+            q = q.filter(Product.name.ilike(pattern) | Product.description.ilike(pattern))
+
+    if category_id is not None:
+        q = q.filter(Product.category_id == category_id)
+    if min_price is not None:
+        q = q.filter(Product.price >= min_price)
+    if max_price is not None:
+        q = q.filter(Product.price <= max_price)
+    if in_stock:
+        q = q.filter(Product.stock > 0)
+
+    return q.order_by(Product.id).offset(offset).limit(limit).all()
+
+
+def search_complaints(
+    db: Session,
+    query: str,
+    status: Optional[ComplaintStatus] = None,
+    limit: int = 50,
+    offset: int = 0,
+) -> List[Complaint]:
+    """Ranked full-text search over complaint descriptions (prefix matching)."""
+    terms = _terms(query)
+    if not terms:
+        return []
+
+    q = db.query(Complaint).filter(Complaint.deleted_at.is_(None))
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        q = (
+            q.join(complaints_fts, complaints_fts.c.rowid == Complaint.id)
+            .filter(text("complaints_fts MATCH :match"))
+            .params(match=_fts_match(terms))
+            .order_by(text("bm25(complaints_fts)"))
+        )
+    elif dialect == "postgresql":
+        document = literal_column(_PG_COMPLAINT_DOCUMENT)
+        tsquery = _pg_tsquery(terms)
+        q = q.filter(document.op("@@")(tsquery)).order_by(func.ts_rank(document, tsquery).desc())
+    else:
+        for t in terms:
+            q = q.filter(Complaint.description.ilike(f"%{t}%"))
+
+    if status is not None:
+        q = q.filter(Complaint.status == status)
+
+    return q.order_by(Complaint.id.desc()).offset(offset).limit(limit).all()
@@ -0,0 +1,78 @@
+"""
+Handlers for background jobs (app/core/jobs.py), run by app/worker.py.
+
+Enqueue them by kind from any router, e.g. `enqueue(db, "archive.run")`,
+then commit.
+"""
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.jobs import job
+from app.models.archive import payments_archive
+from app.models.order import Order, OrderStatus
+from app.models.payment import Payment, PaymentStatus
+from app.services.analytics import refresh_rollups
+from app.services.archive import archive_old_rows
+from app.services.dedup import assign_missing_clusters
+from app.services.dispatch import dispatch
+from app.services.forecast import run_forecasts
+from app.services.inventory import cancel_order
+from app.services.locations import backfill_location_ids
+
+
+@job("payments.webhook")
+def apply_monetbil_notification(db: Session, payment_ref: str, status: str) -> None:
+    payment = db.query(Payment).filter(Payment.reference == payment_ref).first()
+    if not payment:
+        archived = select(payments_archive.c.id).where(payments_archive.c.reference == payment_ref)
+        if db.execute(archived).first():
+            return  # settled and archived long ago: a late redelivery, nothing left to apply
+        # The notification can overtake the commit of the payment row; retry later
+        raise LookupError(f"Payment {payment_ref!r} not found")
+    if payment.status != PaymentStatus.pending:
+        return  # already applied (notifications are delivered at least once)
+
+    if status == "success":
+        payment.status = PaymentStatus.success
+        order = db.query(Order).get(payment.order_id)
+        if order:
+            order.status = OrderStatus.delivered
+    elif status == "failed":
+        payment.status = PaymentStatus.failed
+        order = db.query(Order).get(payment.order_id)
+        if order:
+            # Give the reserved units back so other citizens can buy them
+            cancel_order(db, order)
+    db.commit()
+
+
+@job("analytics.refresh")
+def refresh_analytics(db: Session) -> None:
+    refresh_rollups(db)
+
+
+@job("archive.run")
+def run_archival(db: Session, older_than_days: Optional[int] = None) -> None:
+    archive_old_rows(db, older_than_days)
+
+
+@job("forecast.run")
+def run_forecast(db: Session) -> None:
+    run_forecasts(db)
+
+
+@job("dispatch.run")
+def run_dispatch(db: Session) -> None:
+    dispatch(db)
+
+
+@job("complaints.cluster")
+def cluster_complaints(db: Session) -> None:
+    assign_missing_clusters(db)
+
+
+@job("locations.backfill")
+def link_locations(db: Session) -> None:
+    backfill_location_ids(db)
@@ -0,0 +1,152 @@
+"""
+Background job worker: claims jobs from the `jobs` table and runs them.
+
+Every API process runs one with JOB_EMBEDDED_WORKERS threads (started by
+the lifespan handler), which is enough for payment webhooks and the
+periodic jobs. For heavier loads set JOB_EMBEDDED_WORKERS=0 and run
+dedicated workers instead (any number, on any host sharing the database):
+
+    python -m app.worker --workers 4 --pool thread
+    python -m app.worker --workers 4 --pool process   # CPU-bound handlers
+
+Jobs are only ever applied by a worker: with JOB_EMBEDDED_WORKERS=0 and no
+`python -m app.worker` running, payments stay pending and failed payments
+never release their stock. Stops claiming on SIGINT/SIGTERM and exits once
+running jobs finish.
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from app.core import jobs
+from app.core.config import settings
+from app.db.session import SessionLocal, get_engine
+
+import app.services.tasks  # noqa: F401 - registers the handlers
+
+log = logging.getLogger(__name__)
+
+
+def run_job(job_id: int, lease: str) -> bool:
+    """Executes in a pool thread or child process, with its own session."""
+    get_engine()  # binds SessionLocal (a fresh engine after fork)
+    with SessionLocal() as db:
+        return jobs.execute(db, job_id, lease)
+
+
+class Worker:
+    def __init__(self, workers: int, pool: str):
+        self.workers = workers
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        if pool == "process":
+            self.pool = ProcessPoolExecutor(workers)
+        else:
+            self.pool = ThreadPoolExecutor(workers, thread_name_prefix="job")
+        self.running: Dict[Future, Tuple[int, str]] = {}
+        self.stopping = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.errors = 0
+        self.last_error: Optional[str] = None
+
+    def stop(self, *_) -> None:
+        self.stopping.set()
+
+    def start(self) -> None:
+        """Run the claim loop in a daemon thread (the embedded worker)."""
+        self.thread = threading.Thread(target=self.run, name="job-worker", daemon=True)
+        self.thread.start()
+
+    def join(self, timeout: float) -> None:
+        """Stop claiming and wait up to `timeout` for running jobs; unfinished ones rerun once their lease expires."""
+        self.stop()
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def run(self) -> None:
+        get_engine()
+        heartbeat = prune = 0.0
+        while not self.stopping.is_set():
+            claimed = []
+            try:
+                self.running = {f: lease for f, lease in self.running.items() if not f.done()}
+                free = self.workers - len(self.running)
+                if free > 0:
+                    with SessionLocal() as db:
+                        claimed = jobs.claim(db, self.name, free)
+                    for job_id, lease in claimed:
+                        self.running[self.pool.submit(run_job, job_id, lease)] = (job_id, lease)
+
+                now = time.monotonic()
+                if now - heartbeat > settings.JOB_LEASE_SECONDS / 3:
+                    with SessionLocal() as db:
+                        jobs.extend_leases(db, list(self.running.values()))
+                    heartbeat = now
+                if now - prune > 3600:
+                    with SessionLocal() as db:
+                        jobs.prune(db)
+                    prune = now
+            except Exception as exc:
+                # e.g. "database is locked" or a writer-lock timeout: the loop
+                # must outlive it, or queued payments are never applied
+                self.errors += 1
+                self.last_error = f"{type(exc).__name__}: {exc}"
+                log.exception("job worker %s: claim loop failed, retrying", self.name)
+                claimed = []
+
+            if not claimed:
+                self.stopping.wait(settings.JOB_POLL_SECONDS)
+        self.pool.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "alive": self.thread is not None and self.thread.is_alive(),
+            "slots": self.workers,
+            "running": len(self.running),
+            "loop_errors": self.errors,
+            "last_error": self.last_error,
+        }
+
+
+_embedded: Optional[Worker] = None
+
+
+def start_embedded() -> Optional[Worker]:
+    """Job threads inside an API process, unless JOB_EMBEDDED_WORKERS is 0."""
+    global _embedded
+    if settings.JOB_EMBEDDED_WORKERS <= 0:
+        return None
+    _embedded = Worker(settings.JOB_EMBEDDED_WORKERS, "thread")
+    _embedded.start()
+    return _embedded
+
+
+def embedded_stats() -> Optional[dict]:
+    """State of this process's embedded worker, None when it runs without one."""
+    return _embedded.stats() if _embedded is not None else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=None, help="default: JOB_WORKERS")
+    parser.add_argument("--pool", choices=("thread", "process"), default=None, help="default: JOB_POOL")
+    args = parser.parse_args()
+
+    from app.main import boot
+    boot()  # creates the jobs table on first use
+
+    worker = Worker(args.workers or settings.JOB_WORKERS, args.pool or settings.JOB_POOL)
+    signal.signal(signal.SIGINT, worker.stop)
+    signal.signal(signal.SIGTERM, worker.stop)
+    print(f"worker {worker.name}: {worker.workers} {args.pool or settings.JOB_POOL} slots", flush=True)
+    worker.run()
+
+
+if __name__ == "__main__":
+    main()
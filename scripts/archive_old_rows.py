@@ -0,0 +1,29 @@
+"""
+Move cold collections and orders into the archive tables.
+
+Meant for cron (e.g. nightly) against the configured DATABASE_URL; each
+batch commits on its own, so it can run while the API is serving. Run with:
+
+    python -m scripts.archive_old_rows --older-than-days 90 --batch-size 500
+"""
+import argparse
+
+from app.db.session import SessionLocal
+from app.main import boot
+from app.services.archive import archive_old_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--older-than-days", type=int, default=None, help="default: ARCHIVE_AFTER_DAYS")
+    parser.add_argument("--batch-size", type=int, default=None, help="default: ARCHIVE_BATCH_SIZE")
+    args = parser.parse_args()
+
+    boot()  # creates the archive tables on first use
+    with SessionLocal() as db:
+        moved = archive_old_rows(db, args.older_than_days, args.batch_size)
+    print(", ".join(f"{name}: {count} archived" for name, count in moved.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Checkout latency: one cart order versus one order per product.
+
+Buys the same basket of --items products many times against a throwaway
+SQLite database (or DATABASE_URL), first the old way (a `create_order`
+call and a payment per product), then with `checkout_cart` (one order, one
+payment). Monetbil itself is not called; --monetbil-ms adds a simulated
+round trip per payment. Run with:
+
+    python -m scripts.bench_checkout --items 5 --carts 500 --monetbil-ms 300
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/checkout.db")
+
+from sqlalchemy import event  # noqa: E402
+
+from app.db.base import Base  # noqa: E402
+from app.db.session import SessionLocal as Session, get_engine  # noqa: E402
+import app.models  # noqa: E402,F401 - register all tables
+from app.models.payment import Payment, PaymentStatus  # noqa: E402
+from app.models.product import Category, Product  # noqa: E402
+from app.routers.citizens import checkout_cart, create_order  # noqa: E402
+from app.schemas.order import CartCheckout, CartItem, OrderCreate  # noqa: E402
+
+
+def pay(db, user, order, monetbil_ms: float) -> None:
+    """The database side of POST /payments/monetbil, plus the simulated provider call."""
+    time.sleep(monetbil_ms / 1000)
+    db.add(Payment(user_id=user.id, order_id=order.id, amount=order.total_price,
+                   status=PaymentStatus.pending, reference=f"ORD-{order.id}"))
+    db.commit()
+
+
+def per_item(db, user, basket, monetbil_ms):
+    for product_id, quantity in basket:
+        order = create_order(order=OrderCreate(product_id=product_id, quantity=quantity), db=db, current_user=user)
+        pay(db, user, order, monetbil_ms)
+
+
+def cart(db, user, basket, monetbil_ms):
+    items = [CartItem(product_id=p, quantity=q) for p, q in basket]
+    order = checkout_cart(cart=CartCheckout(items=items), db=db, current_user=user)
+    pay(db, user, order, monetbil_ms)
+
+
+def measure(flow, carts, basket, monetbil_ms, statements):
+    timings = []
+    user = SimpleNamespace(id=1)
+    before = statements[0]
+    for _ in range(carts):
+        with Session() as db:
+            start = time.perf_counter()
+            flow(db, user, basket, monetbil_ms)
+            timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "p50": statistics.median(timings),
+        "p95": timings[int(0.95 * (len(timings) - 1))],
+        "statements": (statements[0] - before) / carts,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=5, help="distinct products per basket")
+    parser.add_argument("--carts", type=int, default=500)
+    parser.add_argument("--monetbil-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    engine = get_engine()
+    Base.metadata.create_all(bind=engine)
+    with Session() as db:
+        cat = Category(name="Bins")
+        db.add(cat)
+        db.flush()
+        products = [Product(name=f"Item {i}", price=500.0 + i, stock=10**9, category_id=cat.id) for i in range(args.items)]
+        db.add_all(products)
+        db.commit()
+        basket = [(p.id, 1 + i % 3) for i, p in enumerate(products)]
+
+    statements = [0]
+
+    def count(*_):
+        statements[0] += 1
+
+    event.listen(engine, "before_cursor_execute", count)
+
+    print(f"{args.carts} baskets of {args.items} products, Monetbil round trip {args.monetbil_ms:.0f} ms")
+    results = {}
+    for name, flow in (("per item", per_item), ("cart", cart)):
+        results[name] = r = measure(flow, args.carts, basket, args.monetbil_ms, statements)
+        print(f"  {name:<9} p50={r['p50']:8.2f} ms  p95={r['p95']:8.2f} ms  {r['statements']:.0f} statements/basket")
+    print(f"speedup p50: {results['per item']['p50'] / results['cart']['p50']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+CPU cost vs bytes saved for each response encoding and level.
+
+Seeds a throwaway database with a catalog, fetches the real GET /products/
+body, then compresses it with every available codec at several levels and
+reports ratio, compression time and the estimated time to deliver it over
+a slow link (compression + transfer). Finally it times the middleware with a
+cold and a warm compressed-body cache. Run with:
+
+    python -m scripts.bench_compression --products 2000 --kbps 400
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/compression.db")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from app.core.compression import BrotliCodec, GzipCodec, ZstdCodec  # noqa: E402
+from app.db.session import SessionLocal  # noqa: E402
+from app.main import app, boot  # noqa: E402
+from app.models.product import Category, Product  # noqa: E402
+
+LEVELS = {
+    "gzip": (GzipCodec, [1, 4, 6, 9]),
+    "br": (BrotliCodec, [1, 4, 6, 9, 11]),
+    "zstd": (ZstdCodec, [1, 3, 6, 9, 15]),
+}
+
+WORDS = ("bin", "compost", "bag", "recycling", "organic", "plastic", "glass", "paper", "heavy-duty",
+         "household", "municipal", "green", "lid", "wheels", "litres", "durable", "odour", "sealed")
+
+
+def seed(n: int) -> None:
+    rng = random.Random(1)
+    with SessionLocal() as db:
+        db.execute(insert(Category), [{"id": i, "name": f"Category {i}"} for i in range(1, 21)])
+        db.execute(insert(Product), [
+            {
+                "name": " ".join(rng.choices(WORDS, k=3)).title(),
+                "description": " ".join(rng.choices(WORDS, k=40)),
+                "price": round(rng.uniform(500, 50000), 2),
+                "stock": rng.randint(0, 500),
+                "status": "active",
+                "features": rng.sample(WORDS, 4),
+                "image": f"images/product_{i}.jpg",
+                "category_id": rng.randint(1, 20),
+            }
+            for i in range(n)
+        ])
+        db.commit()
+
+
+def timed(fn, data, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn(data)
+        best = min(best, time.perf_counter() - start)
+    return out, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--kbps", type=float, default=400, help="link speed for the delivery estimate")
+    args = parser.parse_args()
+
+    boot()
+    seed(args.products)
+    client = TestClient(app)
+    body = client.get("/products/", headers={"Accept-Encoding": "identity"}).content
+    link = args.kbps * 1000 / 8  # bytes per second
+    print(f"GET /products/: {len(body) / 1024:.0f} KiB identity, "
+          f"{len(body) / link:.2f} s over {args.kbps:.0f} kbit/s")
+    print(f"{'codec':<6}{'level':>6}{'KiB':>9}{'ratio':>8}{'ms':>9}{'MB/s':>8}{'deliver s':>11}")
+
+    for name, (cls, levels) in LEVELS.items():
+        try:
+            cls(1)
+        except ImportError:
+            print(f"{name:<6} (package not installed)")
+            continue
+        for level in levels:
+            out, secs = timed(cls(level).compress, body)
+            print(f"{name:<6}{level:>6}{len(out) / 1024:>9.1f}{len(body) / len(out):>8.1f}"
+                  f"{secs * 1000:>9.2f}{len(body) / secs / 1e6:>8.0f}{secs + len(out) / link:>11.3f}")
+
+    for encoding in ("gzip", "br", "zstd"):
+        headers = {"Accept-Encoding": encoding}
+        start = time.perf_counter()
+        first = client.get("/products/", headers=headers)
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(10):
+            client.get("/products/", headers=headers)
+        warm = (time.perf_counter() - start) / 10
+        print(f"middleware {encoding:<5} -> {first.headers.get('content-encoding', 'identity'):<8} "
+              f"cold {cold * 1000:6.1f} ms, cached {warm * 1000:6.1f} ms per request")
+
+
+if __name__ == "__main__":
+    main()
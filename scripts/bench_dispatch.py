@@ -0,0 +1,71 @@
+"""
+Time the dispatcher on a synthetic backlog and compare it with first-come.
+
+Builds 5k open requests over a few hundred neighbourhoods and 500
+collectors with learned areas and uneven current load, then solves the
+assignment with scipy (when installed) and the NumPy fallback. Reports
+time, mean distance (0 = the collector who knows the area best, 1 = a
+stranger) and load spread against a first-come baseline (requests dealt
+round-robin, which is what `accept_request` races amount to). Run with:
+
+    python -m scripts.bench_dispatch --requests 5000 --collectors 500
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.services import dispatch
+
+
+def synthetic(requests: int, collectors: int, locations: int, seed: int = 1):
+    rng = np.random.default_rng(seed)
+    popularity = rng.zipf(1.3, size=locations).astype(float)
+    request_loc = rng.choice(locations, size=requests, p=popularity / popularity.sum())
+    # each collector knows a handful of neighbourhoods, busy ones more often
+    worked = np.zeros((locations, collectors))
+    for c in range(collectors):
+        known = rng.choice(locations, size=rng.integers(1, 6), replace=False, p=popularity / popularity.sum())
+        worked[known, c] = rng.integers(1, 40, size=len(known))
+    top = worked.max(axis=1, keepdims=True)
+    affinity = np.divide(worked, top, out=np.zeros_like(worked), where=top > 0)
+    load = rng.poisson(3, size=collectors).astype(float)
+    return 1 - affinity[request_loc], load
+
+
+def report(name: str, seconds: float, distance: np.ndarray, load: np.ndarray, chosen: np.ndarray) -> None:
+    final = load + np.bincount(chosen, minlength=len(load))
+    mean = distance[np.arange(len(chosen)), chosen].mean()
+    print(f"  {name:<18} {seconds:7.2f} s   mean distance {mean:.3f}   load min/max {final.min():.0f}/{final.max():.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--collectors", type=int, default=500)
+    parser.add_argument("--locations", type=int, default=300)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--load-weight", type=float, default=0.25)
+    args = parser.parse_args()
+
+    distance, load = synthetic(args.requests, args.collectors, args.locations)
+    print(f"{args.requests} requests x {args.collectors} collectors, chunks of {args.chunk_size}")
+
+    report("first-come", 0.0, distance, load, np.arange(args.requests) % args.collectors)
+
+    solvers = [("numpy", None)]
+    if dispatch._scipy_assignment is not None:
+        solvers.insert(0, ("scipy", dispatch._scipy_assignment))
+    for name, solver in solvers:
+        saved = dispatch._scipy_assignment
+        dispatch._scipy_assignment = solver
+        try:
+            start = time.perf_counter()
+            chosen = dispatch.solve(distance, load, args.chunk_size, args.load_weight)
+            report(f"hungarian ({name})", time.perf_counter() - start, distance, load, chosen)
+        finally:
+            dispatch._scipy_assignment = saved
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Time the vectorized forecast fit against fitting locations one by one.
+
+Generates synthetic daily request counts (weekly pattern, trend, Poisson
+noise) for many locations, fits them all at once with
+app.services.forecast.fit_forecast, then fits a sample one location at a
+time to extrapolate what a per-location loop would cost. Run with:
+
+    python -m scripts.bench_forecast --locations 10000 --days 182
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.services.forecast import SEASON, fit_forecast
+
+
+def synthetic(locations: int, days: int, seed: int = 1) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    base = rng.gamma(2.0, 3.0, size=(locations, 1))
+    weekly = 1 + 0.4 * np.sin(2 * np.pi * (np.arange(days) % SEASON) / SEASON + rng.uniform(0, 6, (locations, 1)))
+    trend = 1 + rng.normal(0, 0.002, size=(locations, 1)) * np.arange(days)
+    return rng.poisson(np.clip(base * weekly * trend, 0, None)).astype(float)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--locations", type=int, default=10000)
+    parser.add_argument("--days", type=int, default=182)
+    parser.add_argument("--horizon", type=int, default=14)
+    parser.add_argument("--loop-sample", type=int, default=200, help="locations fitted one by one")
+    args = parser.parse_args()
+
+    y = synthetic(args.locations, args.days)
+    start = time.perf_counter()
+    forecast = fit_forecast(y, args.horizon)
+    vectorized = time.perf_counter() - start
+
+    sample = y[: args.loop_sample]
+    start = time.perf_counter()
+    for row in sample:
+        fit_forecast(row[None, :], args.horizon)
+    per_location = (time.perf_counter() - start) / len(sample)
+
+    actual = y[:, -args.horizon:]
+    holdout = fit_forecast(y[:, :-args.horizon], args.horizon)
+    naive = np.repeat(y[:, -2 * args.horizon:-args.horizon].mean(axis=1, keepdims=True), args.horizon, axis=1)
+
+    print(f"{args.locations} locations x {args.days} days, horizon {args.horizon}")
+    print(f"  vectorized fit:        {vectorized:8.2f} s")
+    print(f"  one-by-one (estimate): {per_location * args.locations:8.2f} s")
+    print(f"  speedup:               {per_location * args.locations / vectorized:8.1f}x")
+    print(f"  holdout MAE: {np.abs(holdout - actual).mean():.3f} "
+          f"(trailing-mean baseline {np.abs(naive - actual).mean():.3f})")
+    assert forecast.shape == (args.locations, args.horizon) and (forecast >= 0).all()
+
+
+if __name__ == "__main__":
+    main()
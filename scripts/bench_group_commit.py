@@ -0,0 +1,72 @@
+"""
+Sustained insert throughput with and without group commit.
+
+Many threads call the real `request_collection` handler against a throwaway
+SQLite database with synchronous=FULL (one fsync per commit), first with
+plain per-request commits, then with GROUP_COMMIT_ENABLED. Run with:
+
+    python -m scripts.bench_group_commit --threads 32 --inserts 200
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/group_commit.db")
+os.environ.setdefault("SQLITE_SYNCHRONOUS", "FULL")
+
+from app.core.config import get_settings  # noqa: E402
+from app.db.base import Base  # noqa: E402
+from app.db.group_commit import get_group_committer, stop_group_committer  # noqa: E402
+from app.db.session import SessionLocal, get_engine  # noqa: E402
+import app.models  # noqa: E402,F401
+from app.routers.citizens import request_collection  # noqa: E402
+from app.schemas.waste import WasteCollectionCreate  # noqa: E402
+
+
+def run(threads: int, inserts: int) -> float:
+    def client(user_id):
+        db = SessionLocal()
+        try:
+            for i in range(inserts):
+                row = request_collection(
+                    data=WasteCollectionCreate(location=f"Rue {i}, Bonamoussadi"),
+                    db=db,
+                    current_user=SimpleNamespace(id=user_id),
+                )
+                assert row.id and row.created_at
+        finally:
+            db.close()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(client, range(threads)))
+    return threads * inserts / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--inserts", type=int, default=200, help="per thread")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=get_engine())
+    settings = get_settings()
+    print(f"{settings.DATABASE_URL} synchronous={settings.SQLITE_SYNCHRONOUS} threads={args.threads}")
+
+    settings.GROUP_COMMIT_ENABLED = False
+    print(f"per-request commit: {run(args.threads, args.inserts):8.0f} inserts/s")
+
+    settings.GROUP_COMMIT_ENABLED = True
+    rate = run(args.threads, args.inserts)
+    committer = get_group_committer()
+    print(f"group commit:       {rate:8.0f} inserts/s "
+          f"(avg batch {committer.items / max(committer.batches, 1):.1f} rows, "
+          f"window {settings.GROUP_COMMIT_WINDOW_MS} ms)")
+    stop_group_committer()
+
+
+if __name__ == "__main__":
+    main()
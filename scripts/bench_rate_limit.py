@@ -0,0 +1,67 @@
+"""
+Per-request overhead of the in-memory rate limiter.
+
+Measures MemoryBackend.take() alone and the full check_rate_limit() path
+(IP + user bucket) from several threads over many distinct clients. Run with:
+
+    python -m scripts.bench_rate_limit --ops 200000 --threads 8 --clients 10000
+"""
+import argparse
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+from app.core import rate_limit
+from app.core.rate_limit import MemoryBackend, check_rate_limit, parse_limit
+
+
+def timed(threads, ops, fn):
+    per_thread = ops // threads
+
+    def work(seed):
+        rnd = random.Random(seed)
+        for _ in range(per_thread):
+            fn(rnd)
+
+    workers = [threading.Thread(target=work, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return (time.perf_counter() - start) / (per_thread * threads)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--ops", type=int, default=200_000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--clients", type=int, default=10_000)
+    args = parser.parse_args()
+
+    backend = MemoryBackend()
+    rate, capacity = parse_limit("30/minute")
+    per_op = timed(args.threads, args.ops,
+                   lambda rnd: backend.take(f"bench:user:{rnd.randrange(args.clients)}", rate, capacity))
+    print(f"MemoryBackend.take      {per_op * 1e6:7.2f} us/op  ({len(backend)} live buckets)")
+
+    rate_limit._backend = MemoryBackend()
+    rate_limit.settings.RATE_LIMITS["bench:ip"] = "1000/minute"
+    rate_limit.settings.RATE_LIMITS["bench:user"] = "30/minute"
+    requests = [SimpleNamespace(client=SimpleNamespace(host=f"10.0.{i // 256 % 256}.{i % 256}"), headers={})
+                for i in range(args.clients)]
+
+    def full_check(rnd):
+        i = rnd.randrange(args.clients)
+        try:
+            check_rate_limit("bench", requests[i], user_id=i)
+        except Exception:
+            pass  # 429s are part of the workload
+
+    per_op = timed(args.threads, args.ops, full_check)
+    print(f"check_rate_limit (2 keys) {per_op * 1e6:5.2f} us/request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Assign open collection requests to collectors, once or periodically.
+
+Each run solves a balanced assignment of every `requested` collection to
+the active collectors (app/services/dispatch.py) and applies it in one
+transaction. Run with:
+
+    python -m scripts.dispatch --every 300     # every 5 minutes
+    python -m scripts.dispatch --dry-run       # print the plan only
+"""
+import argparse
+import time
+
+from app.db.session import SessionLocal
+from app.main import boot
+from app.services.dispatch import apply_plan, plan_dispatch
+
+
+def run_once(dry_run: bool) -> None:
+    with SessionLocal() as db:
+        plan = plan_dispatch(db)
+        applied = "dry run" if dry_run else f"{apply_plan(db, plan)} assigned"
+    summary = plan.summary()
+    print(
+        f"{summary['requests']} open requests, {summary['collectors']} collectors, "
+        f"mean distance {summary['mean_distance']}, {summary['seconds']} s: {applied}",
+        flush=True,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--every", type=float, default=0, help="seconds between runs (default: run once)")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    boot()
+    while True:
+        run_once(args.dry_run)
+        if not args.every:
+            return
+        time.sleep(args.every)
+
+
+if __name__ == "__main__":
+    main()
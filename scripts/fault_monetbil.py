@@ -0,0 +1,193 @@
+"""
+Fault injection for the Monetbil integration.
+
+Starts a fake Monetbil on localhost and the API (uvicorn, in-process) on a
+throwaway SQLite database, then runs phases in which the fake is healthy,
+slow, hanging past the client timeout, failing with 500s and healthy
+again. Throughout, citizens hammer POST /payments/monetbil/quick while
+collectors poll GET /collectors/requests; each phase reports payment
+status codes and latency, collector board latency and the breaker state.
+
+    python -m scripts.fault_monetbil                  # with breaker + bulkhead
+    python -m scripts.fault_monetbil --no-isolation   # the old behaviour, for comparison
+"""
+import argparse
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class FakeMonetbil(BaseHTTPRequestHandler):
+    mode = "ok"
+    delay = 0.0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.mode in ("slow", "hang"):
+            time.sleep(self.delay)
+        if self.mode == "down":
+            body, code = {"success": False, "message": "internal error"}, 500
+        else:
+            ref = uuid.uuid4().hex
+            body, code = {"success": True, "payment_ref": ref, "payment_url": f"https://pay.example/{ref}"}, 200
+        data = json.dumps(body).encode()
+        try:
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except OSError:
+            pass  # the client timed out and hung up
+
+    def log_message(self, *args):
+        pass
+
+
+def percentile(values, q):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--phase-seconds", type=float, default=6)
+    parser.add_argument("--payers", type=int, default=48, help="concurrent payment clients")
+    parser.add_argument("--pollers", type=int, default=4, help="concurrent collector board clients")
+    parser.add_argument("--timeout", type=float, default=3, help="MONETBIL_TIMEOUT_SECONDS")
+    parser.add_argument("--no-isolation", action="store_true", help="disable the bulkhead and breaker")
+    args = parser.parse_args()
+
+    fake = ThreadingHTTPServer(("127.0.0.1", free_port()), FakeMonetbil)
+    threading.Thread(target=fake.serve_forever, daemon=True).start()
+
+    os.environ.update({
+        "DATABASE_URL": f"sqlite:///{tempfile.mkdtemp()}/fault.db",
+        "RATE_LIMIT_ENABLED": "false",
+        "MONETBIL_SERVICE_KEY": "fake",
+        "MONETBIL_SECRET_KEY": "fake",
+        "MONETBIL_API_URL": f"http://127.0.0.1:{fake.server_port}",
+        "MONETBIL_TIMEOUT_SECONDS": str(args.timeout),
+        "MONETBIL_SLOW_CALL_SECONDS": str(args.timeout / 3),
+        "MONETBIL_BREAKER_WINDOW_SECONDS": "10",
+        "MONETBIL_BREAKER_OPEN_SECONDS": str(args.phase_seconds / 2),
+    })
+    if args.no_isolation:
+        os.environ.update({"MONETBIL_CONCURRENCY": "100000", "MONETBIL_BREAKER_FAILURE_RATE": "2"})
+
+    import requests
+    import uvicorn
+
+    from app.core.circuit import guard_stats
+    from app.core.security import create_access_token
+    from app.db.session import SessionLocal
+    from app.main import app, boot
+    from app.models.order import Order
+    from app.models.user import User, UserRole
+    from app.models.waste import WasteCollection
+
+    boot()
+    with SessionLocal() as db:
+        citizen = User(username="payer", email="payer@example.cm", hashed_password="-", role=UserRole.citizen)
+        collector = User(username="board", email="board@example.cm", hashed_password="-", role=UserRole.collector)
+        db.add_all([citizen, collector])
+        db.flush()
+        order = Order(user_id=citizen.id, quantity=1, total_price=1000)
+        db.add(order)
+        db.add_all(WasteCollection(user_id=citizen.id, location=f"Rue {i}, Akwa") for i in range(50))
+        db.commit()
+        tokens = {
+            user.role: create_access_token({"sub": str(user.id), "role": user.role.value, "active": True})
+            for user in (citizen, collector)
+        }
+        order_id = order.id
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    base = f"http://127.0.0.1:{port}"
+
+    phases = [
+        ("healthy", "ok", 0.0),
+        ("slow", "slow", args.timeout * 0.8),
+        ("hanging", "hang", args.timeout * 2),
+        ("down", "down", 0.0),
+        ("recovered", "ok", 0.0),
+    ]
+    label = "without isolation" if args.no_isolation else "with breaker + bulkhead"
+    print(f"{label}: {args.payers} payers, {args.pollers} board pollers, {args.phase_seconds:.0f} s per phase")
+    print(f"{'phase':<10} {'payments (status: count)':<34} {'pay p50':>8} {'board p50':>10} {'board p95':>10}  breaker")
+    failed = False
+    baseline = None
+    for name, mode, delay in phases:
+        FakeMonetbil.mode, FakeMonetbil.delay = mode, delay
+        stop = time.monotonic() + args.phase_seconds
+        codes, pay_ms, board_ms = Counter(), [], []
+
+        def pay():
+            with requests.Session() as http:
+                while time.monotonic() < stop:
+                    start = time.perf_counter()
+                    r = http.post(f"{base}/payments/monetbil/quick", json={"order_id": order_id, "phone": "670000000"},
+                                  headers={"Authorization": f"Bearer {tokens[UserRole.citizen]}"}, timeout=60)
+                    pay_ms.append((time.perf_counter() - start) * 1000)
+                    codes[r.status_code] += 1
+                    time.sleep(0.1)
+
+        def poll():
+            with requests.Session() as http:
+                while time.monotonic() < stop:
+                    start = time.perf_counter()
+                    r = http.get(f"{base}/collectors/requests",
+                                 headers={"Authorization": f"Bearer {tokens[UserRole.collector]}"}, timeout=60)
+                    r.raise_for_status()
+                    board_ms.append((time.perf_counter() - start) * 1000)
+                    time.sleep(0.02)
+
+        with ThreadPoolExecutor(args.payers + args.pollers) as pool:
+            futures = [pool.submit(pay) for _ in range(args.payers)] + [pool.submit(poll) for _ in range(args.pollers)]
+            for f in futures:
+                f.result()
+
+        state = guard_stats().get("monetbil", {}).get("state", "-")
+        summary = ", ".join(f"{code}: {n}" for code, n in sorted(codes.items()))
+        board_p95 = percentile(board_ms, 0.95)
+        baseline = baseline or board_p95
+        print(f"{name:<10} {summary:<34} {percentile(pay_ms, 0.5):7.0f}ms {percentile(board_ms, 0.5):9.1f}ms "
+              f"{board_p95:9.1f}ms  {state}", flush=True)
+        if not args.no_isolation:
+            if mode in ("hang", "down") and codes[503] == 0:
+                print(f"  FAIL: no fast 503s while Monetbil was {mode}")
+                failed = True
+            if board_p95 > max(2 * baseline, baseline + 200):
+                print("  FAIL: the collector board slowed down with Monetbil")
+                failed = True
+    if not args.no_isolation and state != "closed":
+        print("  FAIL: the breaker did not close once Monetbil recovered")
+        failed = True
+
+    server.should_exit = True
+    fake.shutdown()
+    print("FAILED" if failed else ("OK" if not args.no_isolation else "done"))
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Import-time profile of the application.
+
+Imports `app.main` in a fresh interpreter under `-X importtime` and reports
+the total, the slowest modules by cumulative time, and the slowest of our own
+modules by self time. Importing must not touch the database or filesystem;
+the report also fails if the import created the SQLite file. Run with:
+
+    python -m scripts.import_profile --top 15
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def profile(module: str):
+    db_path = os.path.join(tempfile.mkdtemp(), "import_probe.db")
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env,
+    )
+    if proc.returncode:
+        sys.exit(proc.stderr)
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            self_us, cumulative_us, indent, name = m.groups()
+            rows.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return rows, os.path.exists(db_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    rows, touched_db = profile(args.module)
+    total = sum(r[1] for r in rows)
+    print(f"{args.module}: {len(rows)} modules, {total / 1000:.0f} ms total import time\n")
+
+    print("Slowest top-level imports (cumulative):")
+    top_level = sorted((r for r in rows if r[3] <= 1), key=lambda r: -r[2])
+    for name, _, cumulative, _ in top_level[:args.top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    print("\nSlowest app modules (self):")
+    own = sorted((r for r in rows if r[0].startswith("app")), key=lambda r: -r[1])
+    for name, self_us, _, _ in own[:args.top]:
+        print(f"  {self_us / 1000:8.1f} ms  {name}")
+
+    if touched_db:
+        sys.exit("\nFAIL: importing the app created the database file")
+    print("\nOK: import had no database side effects")
+
+
+if __name__ == "__main__":
+    main()
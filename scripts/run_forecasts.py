@@ -0,0 +1,29 @@
+"""
+Refit demand forecasts for every collection location and store them.
+
+Meant for a nightly cron against the configured DATABASE_URL; the API
+only reads the stored results (GET /admin/forecast). Run with:
+
+    python -m scripts.run_forecasts --history-days 182 --horizon 14
+"""
+import argparse
+
+from app.db.session import SessionLocal
+from app.main import boot
+from app.services.forecast import run_forecasts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--history-days", type=int, default=None, help="default: FORECAST_HISTORY_DAYS")
+    parser.add_argument("--horizon", type=int, default=None, help="default: FORECAST_HORIZON_DAYS")
+    args = parser.parse_args()
+
+    boot()  # creates the forecast table on first use
+    with SessionLocal() as db:
+        result = run_forecasts(db, args.history_days, args.horizon)
+    print(", ".join(f"{name}: {value}" for name, value in result.items()))
+
+
+if __name__ == "__main__":
+    main()
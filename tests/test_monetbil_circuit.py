@@ -0,0 +1,143 @@
+"""
+Fault injection for the Monetbil breaker and bulkhead (app/core/circuit.py):
+a fake Monetbil on localhost fails, the API answers 503 without calling it,
+a failed probe reopens the breaker and healthy probes close it again.
+
+    python -m pytest tests/test_monetbil_circuit.py
+
+scripts/fault_monetbil.py runs the same fake under load, for timings.
+"""
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+import pytest
+from fastapi.testclient import TestClient
+
+from scripts.fault_monetbil import FakeMonetbil, free_port
+
+OPEN_SECONDS = 1.0
+MIN_CALLS = 4
+PROBES = 2
+
+
+class CountingMonetbil(FakeMonetbil):
+    calls = 0
+
+    def do_POST(self):
+        type(self).calls += 1
+        super().do_POST()
+
+
+@pytest.fixture(scope="module")
+def fake():
+    server = ThreadingHTTPServer(("127.0.0.1", free_port()), CountingMonetbil)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture(scope="module")
+def client(fake):
+    from app.core.circuit import GUARDS
+    from app.core.config import get_settings
+    from app.routers.payments import monetbil_guard
+
+    def reset():
+        get_settings.cache_clear()
+        monetbil_guard.cache_clear()
+        GUARDS.clear()
+
+    with pytest.MonkeyPatch.context() as mp:
+        for name, value in {
+            "DATABASE_URL": f"sqlite:///{tempfile.mkdtemp()}/circuit.db",
+            "RATE_LIMIT_ENABLED": "false",
+            "JOB_EMBEDDED_WORKERS": "0",
+            "MONETBIL_SERVICE_KEY": "fake",
+            "MONETBIL_SECRET_KEY": "fake",
+            "MONETBIL_API_URL": f"http://127.0.0.1:{fake.server_port}",
+            "MONETBIL_TIMEOUT_SECONDS": "0.5",
+            "MONETBIL_SLOW_CALL_SECONDS": "0.3",
+            "MONETBIL_BREAKER_MIN_CALLS": str(MIN_CALLS),
+            "MONETBIL_BREAKER_FAILURE_RATE": "0.5",
+            "MONETBIL_BREAKER_OPEN_SECONDS": str(OPEN_SECONDS),
+            "MONETBIL_BREAKER_PROBES": str(PROBES),
+        }.items():
+            mp.setenv(name, value)
+        reset()
+        from app.main import app
+
+        with TestClient(app) as test_client:
+            yield test_client
+        reset()
+
+
+@pytest.fixture(scope="module")
+def pay(client):
+    from app.core.security import create_access_token
+    from app.db.session import SessionLocal
+    from app.models.order import Order
+    from app.models.user import User, UserRole
+
+    with SessionLocal() as db:
+        citizen = User(username="payer", email="payer@example.cm", hashed_password="-", role=UserRole.citizen)
+        db.add(citizen)
+        db.flush()
+        order = Order(user_id=citizen.id, quantity=1, total_price=1000)
+        db.add(order)
+        db.commit()
+        token = create_access_token({"sub": str(citizen.id), "role": "citizen", "active": True})
+        order_id = order.id
+
+    def pay():
+        return client.post(
+            "/payments/monetbil/quick",
+            json={"order_id": order_id, "phone": "670000000"},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+
+    return pay
+
+
+def breaker_state() -> str:
+    from app.core.circuit import guard_stats
+
+    return guard_stats()["monetbil"]["state"]
+
+
+def test_breaker_fails_fast_reopens_and_closes(fake, pay):
+    CountingMonetbil.mode = "ok"
+    assert pay().status_code == 200
+    assert breaker_state() == "closed"
+
+    # Monetbil answers 500: the breaker opens once enough calls in the window failed
+    CountingMonetbil.mode = "down"
+    codes = []
+    while breaker_state() != "open":
+        codes.append(pay().status_code)
+        assert len(codes) <= MIN_CALLS
+    assert set(codes) == {500}
+
+    # While open, payments get a fast 503 with Retry-After and Monetbil is not called
+    calls = CountingMonetbil.calls
+    start = time.monotonic()
+    response = pay()
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
+    assert time.monotonic() - start < 0.25
+    assert CountingMonetbil.calls == calls
+
+    # A probe that hangs past the client timeout reopens the breaker
+    time.sleep(OPEN_SECONDS + 0.1)
+    CountingMonetbil.mode, CountingMonetbil.delay = "hang", 1.0
+    assert pay().status_code == 500
+    assert breaker_state() == "open"
+    assert pay().status_code == 503
+
+    # Healthy probes close it again
+    time.sleep(OPEN_SECONDS + 0.1)
+    CountingMonetbil.mode, CountingMonetbil.delay = "ok", 0.0
+    assert [pay().status_code for _ in range(PROBES)] == [200] * PROBES
+    assert breaker_state() == "closed"
+    assert pay().status_code == 200